@@ -0,0 +1,247 @@
+"""
+Benchmark de los generadores: mide tiempo, filas por segundo y pico de memoria (RSS) de cada
+tabla y del flujo completo Main.read()/write() para varios tamaños de población, guarda los
+resultados en JSON para compararlos entre commits y avisa de crecimientos superlineales.
+
+    python benchmark.py --tamanos 1000 10000 100000 --salida bench.json
+    python benchmark.py --tamanos 1000 10000 --comparar bench_anterior.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+TAMANOS_DEFECTO = [1_000, 10_000, 100_000, 1_000_000]
+# Exponente de escalado (tiempo ~ n^k) a partir del cual se considera superlineal
+UMBRAL_ESCALADO = 1.2
+# Por debajo de este tiempo las mediciones son demasiado ruidosas para estimar el escalado
+TIEMPO_MINIMO_ESCALADO = 0.05
+
+class MedidorRSS:
+    """
+    Mide el pico de memoria residente mientras dura el bloque with, muestreando /proc/self/statm
+    en un hilo. Donde no hay /proc se usa el máximo de getrusage, que es acumulado del proceso.
+    """
+    def __init__(self, intervalo: float = 0.01):
+        """
+        intervalo: segundos entre muestras.
+        """
+        self.intervalo = intervalo
+        self.pico = 0
+        self._parar = threading.Event()
+        self._pagina = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def rss(self) -> int:
+        """
+        Devuelve la memoria residente actual en bytes.
+        """
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._pagina
+        except OSError:
+            maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss está en KB en Linux y en bytes en macOS
+            return maximo if sys.platform == "darwin" else maximo * 1024
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, self.rss())
+
+    def __enter__(self):
+        self.pico = self.rss()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+        self.pico = max(self.pico, self.rss())
+
+def medir(nombre: str, n_clientes: int, funcion: Callable[[], object], filas: Callable[[object], int]) -> Dict:
+    """
+    Ejecuta funcion y devuelve su medición: tiempo, filas, filas por segundo y pico de RSS.
+    """
+    with MedidorRSS() as medidor:
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+    n_filas = filas(resultado)
+    return {
+        "tabla": nombre,
+        "n_clientes": n_clientes,
+        "segundos": round(segundos, 4),
+        "filas": n_filas,
+        "filas_por_segundo": round(n_filas / segundos, 1) if segundos > 0 else None,
+        "pico_rss_mb": round(medidor.pico / 2**20, 1),
+    }
+
+# Fecha de referencia fija de las mediciones
+HOY = datetime(2025, 1, 1)
+
+def generadores(clientes, seed: int, workers: int = 1) -> Dict[str, Callable[[], pd.DataFrame]]:
+    """
+    Funciones que generan cada tabla dependiente (y los exclientes) para unos clientes ya generados;
+    las usan este script y la suite de pytest-benchmark (tests/benchmarks).
+    """
+    import ids
+    from fake_contratos import ContratosFaker
+    from fake_contactos import ContactosFaker
+    from fake_direcciones import DireccionesFaker
+    from fake_exclientes import ExClientesFaker
+    from fake_envios import EnviosFaker
+    from fake_cuentas_bloqueadas import CuentasBloqueadasFaker
+
+    c = clientes
+    n = c.n_clientes
+    return {
+        "contratos": lambda: ContratosFaker(c, seed=seed, hoy=HOY, workers=workers).get_contratos(),
+        "contactos": lambda: ContactosFaker(c, seed=seed, hoy=HOY, workers=workers).get_contactos(),
+        "direcciones": lambda: DireccionesFaker(c, seed=seed, workers=workers).get_direcciones(),
+        "exclientes": lambda: ExClientesFaker(max(1, n // 5), seed=seed, hoy=HOY, workers=workers,
+                                              asignador=ids.AsignadorIds(seed, "cliente_id", inicio=n)).get_exclientes(),
+        "envios": lambda: EnviosFaker(c, seed=seed, hoy=HOY).get_envios(),
+        "cuentas_bloqueadas": lambda: CuentasBloqueadasFaker(c, seed=seed, hoy=HOY).get_cuentas_bloqueadas(),
+    }
+
+def medir_tamano(n: int, seed: int, workers: int) -> List[Dict]:
+    """
+    Mide todos los generadores y el flujo completo para n clientes.
+    """
+    from fake_clientes import ClientesFaker
+    from main_fake_data import Main
+
+    hoy = HOY
+    resultados = []
+    clientes: Dict[str, ClientesFaker] = {}
+
+    def generar_clientes():
+        clientes["c"] = ClientesFaker(n, seed=seed, hoy=hoy, workers=workers)
+        return clientes["c"].get_clientes()
+
+    resultados.append(medir("clientes", n, generar_clientes, len))
+    for tabla, funcion in generadores(clientes["c"], seed, workers).items():
+        resultados.append(medir(tabla, n, funcion, len))
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        def completo():
+            main = Main(n_clientes=n, n_exclientes=max(1, n // 5), seed=seed, workers=workers, out_dir=out_dir)
+            main.hoy = hoy
+            main.read()
+            main.write()
+            return main.tablas
+        resultados.append(medir("main", n, completo, lambda tablas: sum(len(df) for df in tablas.values())))
+    return resultados
+
+def _medir_en_proceso(n: int, seed: int, workers: int) -> List[Dict]:
+    """
+    Mide un tamaño en un proceso nuevo para que el pico de memoria no arrastre el de tamaños anteriores.
+    """
+    codigo = (
+        "import json, logging, sys; logging.disable(logging.INFO); import benchmark; "
+        f"json.dump(benchmark.medir_tamano({n}, {seed}, {workers}), sys.stdout)"
+    )
+    salida = subprocess.run([sys.executable, "-c", codigo], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(salida.stdout)
+
+def escalado(resultados: List[Dict], umbral: float = UMBRAL_ESCALADO) -> List[Dict]:
+    """
+    Estima para cada tabla el exponente k de tiempo ~ n^k entre tamaños consecutivos y
+    marca como superlineal los tramos con k > umbral.
+    """
+    df = pd.DataFrame(resultados)
+    avisos = []
+    for tabla, grupo in df.sort_values("n_clientes").groupby("tabla", sort=False):
+        filas = grupo.to_dict("records")
+        for previo, actual in zip(filas, filas[1:]):
+            if previo["segundos"] < TIEMPO_MINIMO_ESCALADO:
+                continue
+            k = math.log(actual["segundos"] / previo["segundos"]) / math.log(actual["n_clientes"] / previo["n_clientes"])
+            avisos.append({
+                "tabla": tabla,
+                "desde": previo["n_clientes"],
+                "hasta": actual["n_clientes"],
+                "exponente": round(k, 2),
+                "superlineal": k > umbral,
+            })
+    return avisos
+
+def comparar(resultados: List[Dict], anterior: List[Dict]) -> pd.DataFrame:
+    """
+    Compara los tiempos con los de un JSON anterior (ratio > 1 es más lento que antes).
+    """
+    actual = pd.DataFrame(resultados).set_index(["tabla", "n_clientes"])
+    previo = pd.DataFrame(anterior).set_index(["tabla", "n_clientes"])
+    comun = actual.join(previo, rsuffix="_anterior", how="inner")
+    comun["ratio_tiempo"] = (comun["segundos"] / comun["segundos_anterior"]).round(2)
+    return comun[["segundos_anterior", "segundos", "ratio_tiempo", "pico_rss_mb_anterior", "pico_rss_mb"]]
+
+def _commit() -> Optional[str]:
+    """
+    Devuelve el commit actual del repositorio, si lo hay.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de los generadores de datos falsos.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS_DEFECTO, help="números de clientes a medir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--salida", help="fichero JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="fichero JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_ESCALADO, help="exponente máximo de escalado admitido")
+    parser.add_argument("--estricto", action="store_true", help="termina con código 1 si hay escalado superlineal")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for n in sorted(args.tamanos):
+        logging.warning(f"Midiendo {n} clientes...")
+        resultados.extend(_medir_en_proceso(n, args.seed, args.workers))
+    avisos = escalado(resultados, args.umbral)
+
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(pd.DataFrame(resultados).to_string(index=False))
+        if avisos:
+            print()
+            print(pd.DataFrame(avisos).to_string(index=False))
+        if args.comparar:
+            with open(args.comparar) as f:
+                print()
+                print(comparar(resultados, json.load(f)["resultados"]).to_string())
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({
+                "commit": _commit(),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "workers": args.workers,
+                "resultados": resultados,
+                "escalado": avisos,
+            }, f, indent=2)
+
+    superlineales = [a for a in avisos if a["superlineal"]]
+    for aviso in superlineales:
+        logging.warning(f"Escalado superlineal en {aviso['tabla']} entre {aviso['desde']} y {aviso['hasta']} "
+                        f"clientes (exponente {aviso['exponente']})")
+    return 1 if superlineales and args.estricto else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Caché de tablas generadas, direccionada por contenido: la clave es un hash del generador, sus
+parámetros (semilla incluida) y la versión de las librerías y del código de los generadores.
+
+    with cache.usar("./.cache_fakebiz", max_mb=2048):
+        clientes = ClientesFaker(1000, seed=42, hoy=datetime(2024, 1, 1))   # genera y guarda
+        clientes = ClientesFaker(1000, seed=42, hoy=datetime(2024, 1, 1))   # carga de la caché
+
+También se activa para todo un proceso (y sus workers) con la variable de entorno FAKEBIZ_CACHE
+(carpeta) y, opcionalmente, FAKEBIZ_CACHE_MB (tamaño máximo). Las tablas se guardan como Arrow IPC
+(o como columnas .npy sin pyarrow) y se cargan con memory-map, así que varios procesos que lean la
+misma entrada comparten las páginas de las columnas numéricas y, con pandas >= 3, también las de texto. Sin semilla no se guarda nada: la salida no es reproducible.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+import metricas
+
+try:
+    import pyarrow as pa
+except ImportError:  # sin pyarrow se usa el almacén de columnas .npy
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Se incrementa cuando cambia el formato de las entradas
+VERSION_CACHE = 1
+TAMANO_MAXIMO_MB = 1024
+
+# Módulos cuyo código forma parte de la clave: si cambian, las entradas antiguas dejan de usarse
+MODULOS_GENERADORES = [
+    "fake_*.py", "esquemas.py", "fechas.py", "ids.py", "semillas.py", "pools_faker.py", "paralelo.py", "compacto.py",
+    "columnar.py", "documentos.py", "geografia.py", "main_fake_data.py",
+    "data/in/*.csv"
+]
+
+# Caché activa en este proceso (None si no hay)
+_activa: Optional["CacheTablas"] = None
+_suspendida = False
+_version: Optional[str] = None
+
+class CacheTablas:
+    """
+    Caché en disco de DataFrames con expulsión LRU por tamaño. Cada entrada es un fichero
+    (o una carpeta de .npy) cuyo nombre empieza por el generador; el acceso actualiza su
+    fecha de modificación, que fija el orden de expulsión.
+    """
+    def __init__(self, directorio: str, max_mb: float = TAMANO_MAXIMO_MB):
+        """
+        directorio: carpeta de la caché.
+        max_mb: tamaño máximo en MB; al superarlo se borran las entradas usadas hace más tiempo.
+        """
+        self.directorio = directorio
+        self.max_bytes = int(max_mb * 2**20)
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, generador: str, parametros: Dict[str, Any]) -> str:
+        """
+        Clave de una tabla: hash de generador, parámetros y versión del código y las librerías.
+        """
+        contenido = json.dumps({"generador": generador, "parametros": parametros, "version": version()},
+                               sort_keys=True, default=_serializar)
+        return f"{generador}-{hashlib.sha256(contenido.encode()).hexdigest()[:32]}"
+
+    def obtener(self, clave: str) -> Optional[pd.DataFrame]:
+        """
+        Carga una entrada con memory-map; devuelve None si no existe.
+        """
+        ruta = self._ruta(clave)
+        if not os.path.exists(ruta):
+            self.fallos += 1
+            return None
+        try:
+            df = _cargar_arrow(ruta) if pa is not None else _cargar_npy(ruta)
+        except (OSError, ValueError) as e:  # entrada a medio borrar por otro proceso o corrupta
+            logger.warning(f"Entrada de caché ilegible {ruta}: {e}")
+            self.fallos += 1
+            return None
+        _tocar(ruta)
+        self.aciertos += 1
+        return df
+
+    def guardar(self, clave: str, df: pd.DataFrame):
+        """
+        Guarda una entrada (escribe a un temporal y renombra, así que los lectores
+        concurrentes nunca ven una entrada a medias) y aplica la expulsión LRU.
+        """
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        if pa is not None:
+            _guardar_arrow(temporal, df)
+        else:
+            _guardar_npy(temporal, df)
+        if os.path.isdir(ruta):
+            shutil.rmtree(ruta, ignore_errors=True)
+        os.replace(temporal, ruta)
+        self.expulsar(conservar=ruta)
+
+    def obtener_o_generar(self, generador: str, parametros: Dict[str, Any], generar: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Devuelve la tabla de la caché o la genera y la guarda.
+        """
+        clave = self.clave(generador, parametros)
+        with metricas.etapa("cache", generador=generador) as etapa:
+            df = self.obtener(clave)
+            if df is not None:
+                etapa.filas = len(df)
+                return df
+        df = generar()
+        self.guardar(clave, df)
+        return df
+
+    def invalidar(self, generador: Optional[str] = None, clave: Optional[str] = None) -> int:
+        """
+        Borra una entrada, todas las de un generador o toda la caché; devuelve cuántas se borran.
+        """
+        if clave is not None:
+            rutas = [self._ruta(clave)]
+        else:
+            rutas = self._entradas(f"{generador}-*" if generador else "*")
+        borradas = 0
+        for ruta in rutas:
+            if os.path.exists(ruta):
+                _borrar(ruta)
+                borradas += 1
+        return borradas
+
+    def expulsar(self, conservar: Optional[str] = None):
+        """
+        Borra las entradas menos usadas hasta quedar por debajo del tamaño máximo.
+        """
+        entradas = []
+        for ruta in self._entradas("*"):
+            try:
+                entradas.append((os.path.getmtime(ruta), _tamano(ruta), ruta))
+            except OSError:
+                continue
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            if ruta == conservar:
+                continue
+            _borrar(ruta)
+            total -= tamano
+            logger.info(f"Caché: expulsada {os.path.basename(ruta)}")
+
+    def tamano(self) -> int:
+        """
+        Bytes ocupados por la caché.
+        """
+        return sum(_tamano(ruta) for ruta in self._entradas("*"))
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.{'arrow' if pa is not None else 'npy'}")
+
+    def _entradas(self, patron: str) -> List[str]:
+        return [ruta for ruta in glob.glob(os.path.join(self.directorio, patron)) if not ruta.endswith(".tmp")]
+
+@contextmanager
+def usar(directorio: str, max_mb: float = TAMANO_MAXIMO_MB) -> Iterator[CacheTablas]:
+    """
+    Activa una caché mientras dura el bloque with y la devuelve.
+    """
+    global _activa
+    anterior, _activa = _activa, CacheTablas(directorio, max_mb)
+    try:
+        yield _activa
+    finally:
+        _activa = anterior
+
+@contextmanager
+def suspendida() -> Iterator[None]:
+    """
+    Desactiva la caché mientras dura el bloque with (en este proceso y en los workers que se creen
+    dentro), p. ej. para no guardar por separado los bloques de una tabla que se guarda entera.
+    """
+    global _suspendida
+    anterior, _suspendida = _suspendida, True
+    # La variable de entorno llega también a los workers que no se crean con fork
+    anterior_entorno = os.environ.get("FAKEBIZ_CACHE_SUSPENDIDA")
+    os.environ["FAKEBIZ_CACHE_SUSPENDIDA"] = "1"
+    try:
+        yield
+    finally:
+        _suspendida = anterior
+        if anterior_entorno is None:
+            os.environ.pop("FAKEBIZ_CACHE_SUSPENDIDA", None)
+        else:
+            os.environ["FAKEBIZ_CACHE_SUSPENDIDA"] = anterior_entorno
+
+def activa() -> Optional[CacheTablas]:
+    """
+    Devuelve la caché activa: la de usar() o, si no hay, la de la variable de entorno FAKEBIZ_CACHE.
+    """
+    global _activa
+    if _suspendida or os.environ.get("FAKEBIZ_CACHE_SUSPENDIDA"):
+        return None
+    if _activa is None and os.environ.get("FAKEBIZ_CACHE"):
+        _activa = CacheTablas(os.environ["FAKEBIZ_CACHE"], float(os.environ.get("FAKEBIZ_CACHE_MB", TAMANO_MAXIMO_MB)))
+    return _activa
+
+def cacheado(generador: str, parametros: Dict[str, Any], generar: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Genera la tabla pasando por la caché activa, si la hay y la semilla está fijada.
+    """
+    cache = activa()
+    if cache is None or parametros.get("seed") is None:
+        return generar()
+    return cache.obtener_o_generar(generador, parametros, generar)
+
+def huella(datos: Union[pd.DataFrame, Sequence]) -> str:
+    """
+    Hash del contenido de un DataFrame o una lista de valores, para usar datos de entrada como
+    parámetro de la clave.
+    """
+    if isinstance(datos, pd.DataFrame):
+        hashes = pd.util.hash_pandas_object(datos, index=False).to_numpy()
+    else:
+        hashes = pd.util.hash_array(np.asarray(datos, dtype=object))
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+def parametros_pools(pools) -> Optional[Dict[str, int]]:
+    """
+    Parámetros que identifican unos pools de Faker (None sin pools).
+    """
+    return {"tamano": pools.tamano, "seed": pools.seed} if pools is not None else None
+
+def version() -> str:
+    """
+    Versión de los datos: formato de la caché, librerías y hash del código de los generadores.
+    """
+    global _version
+    if _version is None:
+        import faker
+        codigo = hashlib.sha256()
+        carpeta = os.path.dirname(os.path.abspath(__file__))
+        for patron in MODULOS_GENERADORES:
+            for ruta in sorted(glob.glob(os.path.join(carpeta, patron))):
+                with open(ruta, "rb") as f:
+                    codigo.update(f.read())
+        _version = f"{VERSION_CACHE}-{faker.VERSION}-{np.__version__}-{pd.__version__}-{codigo.hexdigest()[:16]}"
+    return _version
+
+def _serializar(valor: Any) -> Any:
+    """
+    Serializa para la clave los parámetros que no son JSON.
+    """
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, pd.DataFrame):
+        return huella(valor)
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor)
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    return repr(valor)
+
+def _guardar_arrow(ruta: str, df: pd.DataFrame):
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(ruta, "wb") as f, pa.ipc.new_file(f, tabla.schema) as writer:
+        writer.write_table(tabla)
+
+def _cargar_arrow(ruta: str) -> pd.DataFrame:
+    # Los buffers apuntan al fichero mapeado. split_blocks evita que pandas junte las columnas
+    # numéricas en un bloque nuevo (quedan como vistas de solo lectura del mapa) y el texto sigue
+    # respaldado por Arrow con pandas >= 3; con pandas anteriores se copia a objetos Python.
+    with pa.memory_map(ruta, "r") as fuente:
+        tabla = pa.ipc.open_file(fuente).read_all()
+    return tabla.to_pandas(split_blocks=True)
+
+def _guardar_npy(ruta: str, df: pd.DataFrame):
+    """
+    Guarda cada columna como .npy; las de texto como cadenas de ancho fijo, que sí admiten memory-map.
+    """
+    os.makedirs(ruta)
+    columnas = []
+    for i, columna in enumerate(df.columns):
+        valores = df[columna]
+        tipo = str(valores.dtype)
+        if isinstance(valores.dtype, pd.CategoricalDtype) or not (valores.dtype.kind in "biufcmM"):
+            nulos = valores.isna().to_numpy()
+            np.save(os.path.join(ruta, f"{i}_nulos.npy"), nulos)
+            np.save(os.path.join(ruta, f"{i}.npy"), valores.astype(object).where(~nulos, "").to_numpy(dtype=str))
+        else:
+            np.save(os.path.join(ruta, f"{i}.npy"), valores.to_numpy())
+        columnas.append({"nombre": columna, "tipo": tipo})
+    with open(os.path.join(ruta, "columnas.json"), "w") as f:
+        json.dump(columnas, f)
+
+def _cargar_npy(ruta: str) -> pd.DataFrame:
+    with open(os.path.join(ruta, "columnas.json")) as f:
+        columnas = json.load(f)
+    datos = {}
+    for i, columna in enumerate(columnas):
+        valores = np.load(os.path.join(ruta, f"{i}.npy"), mmap_mode="r")
+        ruta_nulos = os.path.join(ruta, f"{i}_nulos.npy")
+        if os.path.exists(ruta_nulos):
+            valores = valores.astype(object)
+            valores[np.load(ruta_nulos)] = None
+            datos[columna["nombre"]] = pd.Series(valores).astype(columna["tipo"])
+        else:
+            datos[columna["nombre"]] = valores
+    return pd.DataFrame(datos)
+
+def _tocar(ruta: str):
+    """
+    Marca una entrada como usada ahora (orden LRU).
+    """
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+
+def _tamano(ruta: str) -> int:
+    if os.path.isdir(ruta):
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(ruta) for f in fs)
+    return os.path.getsize(ruta)
+
+def _borrar(ruta: str):
+    if os.path.isdir(ruta):
+        shutil.rmtree(ruta, ignore_errors=True)
+    else:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
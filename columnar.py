@@ -0,0 +1,71 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+class TablaColumnar:
+    """
+    Tabla en construcción guardada por columnas, con el número de filas fijado de antemano.
+    Las columnas que se rellenan por tramos (máscaras o slices) se reservan una vez con ese
+    tamaño; las que llegan enteras como array se adoptan sin copiarlas. La tabla se convierte
+    en DataFrame una sola vez, columna a columna y sin diccionarios por fila, y el desordenado
+    final es una única permutación aplicada al convertir cada columna, en lugar de una copia
+    más de la tabla completa.
+    """
+    def __init__(self, n: int, columnas: Sequence[str], tipos: Optional[Dict[str, type]] = None):
+        """
+        n: número de filas.
+        columnas: nombres de las columnas, en el orden de salida.
+        tipos: dtype de numpy por columna (opcional; por defecto object, para texto y vacíos).
+        """
+        self.n = n
+        self.tipos = {columna: (tipos or {}).get(columna, object) for columna in columnas}
+        self.columnas: Dict[str, Optional[np.ndarray]] = {columna: None for columna in columnas}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, columna: str) -> np.ndarray:
+        return self._reservar(columna)
+
+    def __setitem__(self, columna: str, valores):
+        """
+        Rellena una columna entera; un array del tamaño de la tabla se adopta sin copiarlo.
+        """
+        if isinstance(valores, np.ndarray) and valores.shape == (self.n,) and columna in self.columnas:
+            if self.tipos[columna] is not object:
+                valores = valores.astype(self.tipos[columna], copy=False)
+            self.columnas[columna] = valores
+        else:
+            self._reservar(columna)[:] = valores
+
+    def rellenar(self, columna: str, filas, valores):
+        """
+        Rellena las filas indicadas (máscara booleana, slice o índices) de una columna.
+        """
+        valores_columna = self._reservar(columna)
+        if valores_columna.dtype != self.tipos[columna]:
+            # Columna adoptada con otro dtype (p. ej. texto de ancho fijo): se convierte para no truncar
+            valores_columna = self.columnas[columna] = valores_columna.astype(self.tipos[columna])
+        valores_columna[filas] = valores
+
+    def construir(self, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+        """
+        Convierte la tabla en DataFrame columna a columna, liberando cada array al convertirlo.
+        Con rng, desordena las filas con la misma permutación que DataFrame.sample(frac=1, random_state=rng).
+        """
+        orden = rng.choice(self.n, size=self.n, replace=False) if rng is not None else None
+        series = {}
+        for columna in list(self.columnas):
+            valores = self._reservar(columna)
+            del self.columnas[columna]
+            series[columna] = pd.Series(valores if orden is None else valores[orden], copy=False)
+        return pd.DataFrame(series, copy=False)
+
+    def _reservar(self, columna: str) -> np.ndarray:
+        """
+        Devuelve el array de una columna, reservándolo si todavía no existe (las de object empiezan a None).
+        """
+        if self.columnas[columna] is None:
+            self.columnas[columna] = np.empty(self.n, dtype=self.tipos[columna])
+        return self.columnas[columna]
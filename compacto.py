@@ -0,0 +1,90 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import escritores
+from fake_contactos import ContactosFaker
+from fake_contratos import ContratosFaker
+from fake_cuentas_bloqueadas import CuentasBloqueadasFaker
+from fake_envios import EnviosFaker
+from fake_exclientes import ExClientesFaker
+from fake_personas import PersonasFaker
+
+# Categorías fijas de los códigos y etiquetas, iguales en todos los bloques para que
+# concatenarlos conserve el tipo categórico; el resto de CODIGOS toma las categorías de los datos
+CATEGORIAS: Dict[str, List[str]] = {
+    "tipo_docum": PersonasFaker.TIPOS_DOCUM,
+    "genero": PersonasFaker.GENEROS,
+    "estado_civil": PersonasFaker.ESTADOS_CIVILES,
+    "nivel_estudios": PersonasFaker.NIVELES_ESTUDIOS,
+    "codigo_idioma": PersonasFaker.IDIOMAS,
+    "motivo_baja": ExClientesFaker.MOTIVOS_BAJA,
+    "empresa": ContratosFaker.EMPRESAS,
+    "centro": ContratosFaker.CENTROS,
+    "codigo_producto": ContratosFaker.PRODUCTOS,
+    "codigo_subproducto": ["SB00"] + ContratosFaker.SUBPRODUCTOS,
+    "rel_contra": ContratosFaker.TIPOS_INTERVENTOR,
+    "situacion_actividad": ContratosFaker.SITUACIONES,
+    "tipo_contacto": ContactosFaker.TIPOS_CONTACTO,
+    "motivo_envio": EnviosFaker.MOTIVOS_ENVIO,
+    "tipo_fraude": CuentasBloqueadasFaker.TIPOS_FRAUDE,
+    "estado_fraude": CuentasBloqueadasFaker.ESTADOS_FRAUDE,
+}
+
+def compactar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Devuelve una copia compacta de una tabla generada: IDs de cliente como uint32,
+    códigos y etiquetas como Categorical y fechas como datetime64. Los escritores
+    vuelven a formatear los IDs y las fechas al escribir, así que la salida no cambia.
+    """
+    columnas = {}
+    for columna in df.columns:
+        valores = df[columna]
+        if columna in escritores.IDS_CLIENTE and not pd.api.types.is_integer_dtype(valores.dtype):
+            columnas[columna] = valores.to_numpy(dtype=object).astype(np.uint32)
+        elif columna in escritores.FECHAS and not pd.api.types.is_datetime64_dtype(valores.dtype):
+            columnas[columna] = _fechas(valores, "D")
+        elif columna in escritores.FECHAS_HORA and not pd.api.types.is_datetime64_dtype(valores.dtype):
+            columnas[columna] = _fechas(valores, "s")
+        elif columna in escritores.CODIGOS and not isinstance(valores.dtype, pd.CategoricalDtype):
+            categorias = CATEGORIAS.get(columna)
+            if categorias is not None and not valores.dropna().isin(categorias).all():
+                # Una variante del esquema con otros valores: las categorías se toman de los datos
+                categorias = None
+            columnas[columna] = pd.Categorical(valores, categories=categorias)
+        else:
+            columnas[columna] = valores
+    return pd.DataFrame(columnas, index=df.index)
+
+def concatenar(partes: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena bloques de una misma tabla unificando las categorías de las columnas
+    categóricas que no las tienen iguales en todos, para que no se conviertan a object.
+    """
+    if len(partes) == 1:
+        return partes[0].reset_index(drop=True)
+    primero = partes[0]
+    unificadas = {}
+    for columna in primero.columns:
+        if isinstance(primero[columna].dtype, pd.CategoricalDtype) and (
+                columna not in CATEGORIAS or any(not df[columna].cat.categories.equals(primero[columna].cat.categories) for df in partes)):
+            unificadas[columna] = union_categoricals([df[columna] for df in partes])
+    df = pd.concat(partes, ignore_index=True)
+    for columna, valores in unificadas.items():
+        df[columna] = valores
+    return df
+
+def memoria_mb(df: pd.DataFrame) -> float:
+    """
+    Memoria ocupada por una tabla en MB, contando las cadenas de Python.
+    """
+    return df.memory_usage(deep=True).sum() / 2**20
+
+def _fechas(valores: pd.Series, unidad: str) -> np.ndarray:
+    """
+    Convierte cadenas ISO (None para vacías) a datetime64 sin pasar por nanosegundos,
+    para admitir la fecha centinela 9999-12-31.
+    """
+    return valores.fillna("NaT").to_numpy(dtype=object).astype(f"datetime64[{unidad}]")
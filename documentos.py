@@ -0,0 +1,148 @@
+"""
+Códigos de documento de identidad (DNI, NIE, pasaporte y otros) generados por lotes.
+
+Cada tipo tiene un espacio de valores enteros [0, CAPACIDADES[tipo]) y un formato que convierte cada
+valor en un código distinto: el DNI son 8 cifras más la letra de control (número % 23), el NIE el
+prefijo X/Y/Z (valor // 10**7), 7 cifras y la letra del número con el prefijo como cifra inicial, y
+pasaportes y otros documentos cifras en base 36 sobre matrices de caracteres uint8. Los valores se
+extraen al azar o, con documentos únicos, son la imagen de la posición de cada persona en el
+asignador de cliente_id por una permutación de cada espacio (ids.AsignadorIds), así que no se repiten
+en toda la población aunque los bloques se generen en procesos distintos.
+
+Los formatos no se solapan entre tipos: el DNI empieza por cifra, el NIE por X, Y o Z, el pasaporte
+por otra letra y los demás documentos tienen 8 caracteres en lugar de 9.
+"""
+import string
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+import ids
+
+LETRAS_DNI = "TRWAGMYFPDXBNJZSQVHLCKE"
+PREFIJOS_NIE = "XYZ"
+ALFANUMERICOS = string.ascii_uppercase + string.digits
+# Primera letra de los pasaportes: ninguna de las que empiezan un NIE
+INICIALES_PASAPORTE = "".join(letra for letra in string.ascii_uppercase if letra not in PREFIJOS_NIE)
+LONGITUD_OTRO = 8
+
+# Número de códigos distintos de cada tipo
+CAPACIDADES = {
+    "DNI": 10**8,
+    "NIE": len(PREFIJOS_NIE) * 10**7,
+    "PASAPORTE": len(INICIALES_PASAPORTE) * len(ALFANUMERICOS)**8,
+    "OTRO": len(ALFANUMERICOS)**LONGITUD_OTRO,
+}
+
+_LETRAS_DNI = np.frombuffer(LETRAS_DNI.encode(), dtype=np.uint8)
+_PREFIJOS_NIE = np.frombuffer(PREFIJOS_NIE.encode(), dtype=np.uint8)
+_ALFANUMERICOS = np.frombuffer(ALFANUMERICOS.encode(), dtype=np.uint8)
+_INICIALES_PASAPORTE = np.frombuffer(INICIALES_PASAPORTE.encode(), dtype=np.uint8)
+
+def letras_dni(numeros: np.ndarray) -> np.ndarray:
+    """
+    Letras de control (códigos ASCII) de un array de números de DNI.
+    """
+    return _LETRAS_DNI[np.asarray(numeros, dtype=np.int64) % 23]
+
+def dni(valores: np.ndarray) -> np.ndarray:
+    """
+    DNI de cada valor en [0, 10**8): 8 cifras y letra de control.
+    """
+    valores = np.asarray(valores, dtype=np.int64)
+    matriz = np.empty((len(valores), 9), dtype=np.uint8)
+    matriz[:, :8] = _cifras(valores, 8, 10) + ord("0")
+    matriz[:, 8] = letras_dni(valores)
+    return _texto(matriz)
+
+def nie(valores: np.ndarray) -> np.ndarray:
+    """
+    NIE de cada valor en [0, 3 * 10**7): prefijo X/Y/Z (valor // 10**7), 7 cifras y letra de control,
+    que es la del número con el prefijo como cifra inicial (X=0, Y=1, Z=2), es decir, la del valor.
+    """
+    valores = np.asarray(valores, dtype=np.int64)
+    matriz = np.empty((len(valores), 9), dtype=np.uint8)
+    matriz[:, 0] = _PREFIJOS_NIE[valores // 10**7]
+    matriz[:, 1:8] = _cifras(valores % 10**7, 7, 10) + ord("0")
+    matriz[:, 8] = letras_dni(valores)
+    return _texto(matriz)
+
+def pasaporte(valores: np.ndarray) -> np.ndarray:
+    """
+    Pasaporte de cada valor en [0, CAPACIDADES["PASAPORTE"]): una letra inicial y 8 caracteres alfanuméricos.
+    """
+    valores = np.asarray(valores, dtype=np.int64)
+    base = len(ALFANUMERICOS)**8
+    matriz = np.empty((len(valores), 9), dtype=np.uint8)
+    matriz[:, 0] = _INICIALES_PASAPORTE[valores // base]
+    matriz[:, 1:] = _ALFANUMERICOS[_cifras(valores % base, 8, len(ALFANUMERICOS))]
+    return _texto(matriz)
+
+def otro(valores: np.ndarray) -> np.ndarray:
+    """
+    Otro documento de cada valor en [0, CAPACIDADES["OTRO"]): LONGITUD_OTRO caracteres alfanuméricos.
+    """
+    valores = np.asarray(valores, dtype=np.int64)
+    return _texto(_ALFANUMERICOS[_cifras(valores, LONGITUD_OTRO, len(ALFANUMERICOS))])
+
+FORMATOS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {"DNI": dni, "NIE": nie, "PASAPORTE": pasaporte, "OTRO": otro}
+
+class GeneradorDocumentos:
+    """
+    Genera por lotes los códigos de documento de una lista de tipos.
+    """
+    def __init__(self, seed: Optional[int] = None, unicos: bool = False):
+        """
+        seed: semilla de las permutaciones de los documentos únicos.
+        unicos: si es True, cada código sale de la posición de la persona en el asignador de cliente_id,
+            así que no se repite en la población; necesita semilla para que todos los bloques usen
+            las mismas permutaciones.
+        """
+        if unicos and seed is None:
+            raise ValueError("Los documentos únicos necesitan una semilla: todos los bloques deben usar la misma permutación")
+        self.unicos = unicos
+        self.permutaciones = {tipo: ids.AsignadorIds(seed, f"cod_docum/{tipo}", capacidad=capacidad)
+                              for tipo, capacidad in CAPACIDADES.items()} if unicos else {}
+
+    def generar(self, rng: np.random.Generator, tipos: np.ndarray, posiciones: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Devuelve el código de documento de cada fila según su tipo (los tipos sin formato propio
+        se tratan como OTRO).
+        rng: generador del que extraer los valores (documentos no únicos).
+        tipos: tipo de documento de cada fila.
+        posiciones: posición de cada persona en el asignador de cliente_id (necesaria con documentos únicos).
+        """
+        tipos = np.asarray(tipos, dtype=object)
+        if self.unicos and posiciones is None:
+            raise ValueError("Los documentos únicos necesitan la posición de cada persona")
+        codigos = np.empty(len(tipos), dtype=object)
+        conocido = np.isin(tipos, list(FORMATOS))
+        for tipo in FORMATOS:
+            mascara = tipos == tipo if tipo != "OTRO" else (tipos == tipo) | ~conocido
+            k = int(mascara.sum())
+            if not k:
+                continue
+            if self.unicos:
+                valores = np.asarray(posiciones, dtype=np.uint64)[mascara]
+                if valores.max() >= CAPACIDADES[tipo]:
+                    raise ValueError(f"No caben documentos {tipo} únicos para posiciones de hasta {int(valores.max())} "
+                                     f"(capacidad {CAPACIDADES[tipo]})")
+                valores = self.permutaciones[tipo].permutar(valores)
+            else:
+                valores = rng.integers(0, CAPACIDADES[tipo], size=k)
+            codigos[mascara] = FORMATOS[tipo](valores)
+        return codigos
+
+def _cifras(valores: np.ndarray, n: int, base: int) -> np.ndarray:
+    """
+    Matriz (filas, n) con las n cifras de cada valor en la base indicada, de la más significativa a la menos.
+    """
+    potencias = base ** np.arange(n - 1, -1, -1, dtype=np.int64)
+    return (valores[:, None] // potencias) % base
+
+def _texto(matriz: np.ndarray) -> np.ndarray:
+    """
+    Convierte una matriz uint8 de caracteres ASCII (una fila por código) en un array de cadenas.
+    """
+    matriz = np.ascontiguousarray(matriz, dtype=np.uint8)
+    return matriz.view(f"S{matriz.shape[1]}").ravel().astype(f"U{matriz.shape[1]}").astype(object)
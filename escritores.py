@@ -0,0 +1,601 @@
+import inspect
+import io
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+import fechas
+import metricas
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow solo es necesario para Parquet y Arrow IPC
+    pa = None
+    pc = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Columnas de IDs de cliente; en modo compacto son uint32 y se escriben con DIGITOS_CLIENTE dígitos
+IDS_CLIENTE = {"cliente_id", "cliente_origen_id", "cliente_destino_id"}
+DIGITOS_CLIENTE = 9
+
+# Tipos de columna para los formatos con tipos
+FECHAS = {
+    "fecha_nacimiento", "fecha_cliente", "fecha_alta_contrato", "fecha_baja_contrato",
+    "fecha_alta_contacto", "fecha_baja_contacto", "fecha_inclusion_excliente", "fecha_recuperacion_excliente"
+}
+FECHAS_HORA = {"fecha_hora_envio", "fecha_inclusion", "fecha_bloqueo"}
+IMPORTES = {"valor_envio"}
+CODIGOS = {
+    "tipo_docum", "pais_nacionalidad", "genero", "estado_civil", "nivel_estudios", "codigo_idioma",
+    "empresa", "centro", "codigo_producto", "codigo_subproducto", "rel_contra", "situacion_actividad",
+    "tipo_contacto", "provincia", "pais", "motivo_baja", "motivo_envio", "tipo_fraude", "estado_fraude"
+}
+
+# Claves de las tablas para los escritores de bases de datos, que las crean después de la carga
+CLAVES_PRIMARIAS = {"clientes": ["cliente_id"], "exclientes": ["cliente_id"]}
+CLAVES_FORANEAS = {
+    "contratos": {"cliente_id": "clientes"},
+    "contactos": {"cliente_id": "clientes"},
+    "direcciones": {"cliente_id": "clientes"},
+    "envios": {"cliente_origen_id": "clientes", "cliente_destino_id": "clientes"},
+    "cuentas_bloqueadas": {"cliente_id": "clientes"},
+}
+INDICES = {"contratos": [["identificador"]]}
+
+# Particionado de ejemplo: contratos por empresa y envíos por año de envío
+PARTICIONES_RECOMENDADAS = {"contratos": ["empresa"], "envios": ["fecha_hora_envio:anio"]}
+
+class EscritorCSV:
+    """
+    Escribe las tablas como CSV, una por fichero, admitiendo escritura por bloques.
+    """
+    extension = "csv"
+
+    def __init__(self, out_dir: str):
+        """
+        out_dir: carpeta de salida.
+        """
+        self.out_dir = out_dir
+        self._abiertas: Set[str] = set()
+
+    def escribir(self, tabla: str, df: pd.DataFrame):
+        """
+        Escribe una tabla completa.
+        """
+        self.anadir(tabla, df)
+        self.cerrar_tabla(tabla)
+
+    def anadir(self, tabla: str, df: pd.DataFrame):
+        """
+        Añade un bloque de filas a la tabla; el primer bloque crea el fichero con cabecera.
+        """
+        primero = tabla not in self._abiertas
+        df = a_texto(df)
+        df.to_csv(self.ruta(tabla), mode="w" if primero else "a", header=primero, index=False)
+        self._abiertas.add(tabla)
+
+    def cerrar_tabla(self, tabla: str):
+        """
+        Da por terminada una tabla.
+        """
+        self._abiertas.discard(tabla)
+
+    def cerrar(self):
+        """
+        Cierra todas las tablas abiertas.
+        """
+        for tabla in list(self._abiertas):
+            self.cerrar_tabla(tabla)
+
+    def ruta(self, tabla: str) -> str:
+        """
+        Ruta de salida de una tabla.
+        """
+        return os.path.join(self.out_dir, f"{tabla}.{self.extension}")
+
+class _EscritorArrow(EscritorCSV):
+    """
+    Base de los escritores con tipos: convierte cada bloque a una tabla de Arrow con fechas como
+    date32/timestamp, importes como float64 y códigos con diccionario.
+    """
+    def __init__(self, out_dir: str):
+        if pa is None:
+            raise ImportError("Se necesita pyarrow para escribir en este formato: pip install pyarrow")
+        super().__init__(out_dir)
+        # Valores de diccionario vistos por (tabla, columna); los nuevos se añaden al final para que
+        # los bloques sucesivos solo amplíen el diccionario
+        self._vocabulario: Dict[tuple, Dict[str, int]] = {}
+
+    def a_arrow(self, tabla: str, df: pd.DataFrame) -> "pa.Table":
+        """
+        Convierte un DataFrame a una tabla de Arrow con tipos.
+        """
+        columnas = {}
+        for columna in df.columns:
+            valores = df[columna]
+            if columna in IDS_CLIENTE and pd.api.types.is_integer_dtype(valores.dtype):
+                columnas[columna] = pa.array(_ids_texto(valores), type=pa.string())
+            elif columna in FECHAS:
+                columnas[columna] = pa.array(valores.to_numpy(dtype="datetime64[D]"), type=pa.date32(), from_pandas=True)
+            elif columna in FECHAS_HORA:
+                columnas[columna] = pa.array(valores.to_numpy(dtype="datetime64[s]"), type=pa.timestamp("s"), from_pandas=True)
+            elif columna in IMPORTES:
+                columnas[columna] = pa.array(valores.to_numpy(dtype=np.float64), type=pa.float64())
+            elif columna in CODIGOS:
+                columnas[columna] = self._diccionario(tabla, columna, valores)
+            elif pd.api.types.is_integer_dtype(valores.dtype):
+                columnas[columna] = pa.array(valores.to_numpy(dtype=np.int64), type=pa.int64())
+            else:
+                columnas[columna] = pa.array(valores.astype(object).to_numpy(), type=pa.string(), from_pandas=True)
+        return pa.table(columnas)
+
+    def _diccionario(self, tabla: str, columna: str, valores: pd.Series) -> "pa.DictionaryArray":
+        """
+        Codifica una columna de códigos con el diccionario acumulado de la tabla.
+        """
+        vocabulario = self._vocabulario.setdefault((tabla, columna), {})
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            # Modo compacto: se traducen los códigos de la categoría, no cada valor
+            for valor in valores.cat.categories:
+                vocabulario.setdefault(str(valor), len(vocabulario))
+            traduccion = np.array([vocabulario[str(v)] for v in valores.cat.categories] + [np.nan])
+            indices = pd.Series(traduccion[valores.cat.codes.to_numpy()])
+        else:
+            for valor in pd.unique(valores.dropna()):
+                vocabulario.setdefault(str(valor), len(vocabulario))
+            indices = valores.map(vocabulario)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices.to_numpy(dtype=float), type=pa.int32(), from_pandas=True),
+            pa.array(list(vocabulario), type=pa.string())
+        )
+
+class EscritorParquet(_EscritorArrow):
+    """
+    Escribe las tablas como Parquet, opcionalmente particionadas por columnas.
+    Una partición 'columna:anio' particiona por el año de una columna de fecha.
+    """
+    extension = "parquet"
+
+    def __init__(self, out_dir: str, compression: str = "snappy", particiones: Optional[Dict[str, List[str]]] = None):
+        """
+        out_dir: carpeta de salida.
+        compression: compresión de Parquet ('snappy', 'zstd', 'gzip' o 'none').
+        particiones: columnas de partición por tabla (opcional), p. ej. PARTICIONES_RECOMENDADAS.
+        """
+        super().__init__(out_dir)
+        self.compression = compression
+        self.particiones = particiones or {}
+        self._writers: Dict[str, "pq.ParquetWriter"] = {}
+        self._bloques: Dict[str, int] = {}
+
+    def anadir(self, tabla: str, df: pd.DataFrame):
+        """
+        Añade un bloque de filas a la tabla.
+        """
+        datos = self.a_arrow(tabla, df)
+        if tabla in self.particiones:
+            self._anadir_particionado(tabla, datos)
+        else:
+            if tabla not in self._writers:
+                self._writers[tabla] = pq.ParquetWriter(self.ruta(tabla), datos.schema, compression=self.compression)
+            self._writers[tabla].write_table(datos)
+        self._abiertas.add(tabla)
+
+    def _anadir_particionado(self, tabla: str, datos: "pa.Table"):
+        """
+        Escribe un bloque en un dataset particionado (una carpeta por tabla).
+        """
+        raiz = os.path.join(self.out_dir, tabla)
+        bloque = self._bloques.get(tabla, 0)
+        if bloque == 0 and os.path.isdir(raiz):
+            shutil.rmtree(raiz)
+        columnas_particion = []
+        for particion in self.particiones[tabla]:
+            columna, _, parte = particion.partition(":")
+            if parte == "anio":
+                nombre = f"anio_{columna}"
+                datos = datos.append_column(nombre, pc.year(datos[columna]))
+                columnas_particion.append(nombre)
+            else:
+                columnas_particion.append(columna)
+        pq.write_to_dataset(
+            datos, raiz, partition_cols=columnas_particion, compression=self.compression,
+            basename_template=f"part-{bloque:06d}-{{i}}.parquet", existing_data_behavior="overwrite_or_ignore"
+        )
+        self._bloques[tabla] = bloque + 1
+
+    def cerrar_tabla(self, tabla: str):
+        """
+        Cierra el fichero de la tabla.
+        """
+        writer = self._writers.pop(tabla, None)
+        if writer is not None:
+            writer.close()
+        self._bloques.pop(tabla, None)
+        super().cerrar_tabla(tabla)
+
+class EscritorArrowIPC(_EscritorArrow):
+    """
+    Escribe las tablas en formato Arrow IPC (Feather v2).
+    """
+    extension = "arrow"
+
+    def __init__(self, out_dir: str, compression: Optional[str] = None):
+        """
+        out_dir: carpeta de salida.
+        compression: compresión de los buffers ('lz4', 'zstd' o None).
+        """
+        super().__init__(out_dir)
+        self.opciones = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+        self._writers: Dict[str, "pa.ipc.RecordBatchFileWriter"] = {}
+
+    def anadir(self, tabla: str, df: pd.DataFrame):
+        """
+        Añade un bloque de filas a la tabla.
+        """
+        datos = self.a_arrow(tabla, df)
+        if tabla not in self._writers:
+            self._writers[tabla] = pa.ipc.new_file(self.ruta(tabla), datos.schema, options=self.opciones)
+        self._writers[tabla].write_table(datos)
+        self._abiertas.add(tabla)
+
+    def cerrar_tabla(self, tabla: str):
+        """
+        Cierra el fichero de la tabla.
+        """
+        writer = self._writers.pop(tabla, None)
+        if writer is not None:
+            writer.close()
+        super().cerrar_tabla(tabla)
+
+class EscritorFeather(EscritorArrowIPC):
+    """
+    Escribe las tablas como ficheros .feather (Arrow IPC).
+    """
+    extension = "feather"
+
+class EscritorBD(EscritorCSV):
+    """
+    Carga las tablas en una base de datos a través de una conexión DB-API 2.0: crea cada tabla con
+    tipos al recibir su primer bloque, inserta los bloques con executemany (o con COPY si el driver
+    lo ofrece, como psycopg) y crea las claves primarias, las foráneas y sus índices al cerrar,
+    cuando ya están todas las filas, en lugar de mantenerlos fila a fila durante la carga.
+    """
+    extension = "bd"
+    # Tipos SQL por tipo lógico de columna
+    TIPOS = {"texto": "TEXT", "entero": "BIGINT", "real": "DOUBLE PRECISION", "fecha": "DATE", "fecha_hora": "TIMESTAMP"}
+
+    def __init__(self, conexion, marcador: str = "%s", claves: bool = True, copia: Optional[bool] = None,
+                 out_dir: str = ""):
+        """
+        conexion: conexión DB-API abierta; el escritor confirma las transacciones pero no la cierra.
+        marcador: marcador de parámetros del driver ('%s' para paramstyle format, '?' para qmark).
+        claves: si es True, crea las claves e índices de CLAVES_PRIMARIAS, CLAVES_FORANEAS e INDICES al cerrar.
+        copia: si es True, carga con COPY FROM STDIN; por defecto se usa si el cursor la admite (psycopg2 o psycopg 3).
+        out_dir: carpeta de salida (solo informativa).
+        """
+        super().__init__(out_dir)
+        self.conexion = conexion
+        self.marcador = marcador
+        self.claves = claves
+        if copia is None:
+            cursor = conexion.cursor()
+            copia = hasattr(cursor, "copy_expert") or hasattr(cursor, "copy")
+        self.copia = copia
+        # Las conexiones DB-API no suelen admitir uso concurrente: las escrituras se serializan
+        self._lock = threading.Lock()
+        self._cargadas: Set[str] = set()
+
+    def anadir(self, tabla: str, df: pd.DataFrame):
+        """
+        Añade un bloque de filas a la tabla; el primer bloque la vuelve a crear.
+        """
+        df = a_texto(df)
+        filas = None if self.copia else _filas(df)
+        with self._lock:
+            cursor = self.conexion.cursor()
+            if tabla not in self._cargadas:
+                cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+                cursor.execute(self._crear_tabla(tabla, df))
+                self._cargadas.add(tabla)
+            if filas is None:
+                self._copiar(cursor, tabla, df)
+            else:
+                columnas = ", ".join(df.columns)
+                marcadores = ", ".join([self.marcador] * len(df.columns))
+                cursor.executemany(f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores})", filas)
+            self.conexion.commit()
+        self._abiertas.add(tabla)
+
+    def cerrar(self):
+        """
+        Crea las claves e índices de las tablas cargadas y confirma.
+        """
+        super().cerrar()
+        if self.claves and self._cargadas:
+            with self._lock, metricas.etapa("indices_bd", generador="bd") as etapa:
+                cursor = self.conexion.cursor()
+                for sentencia in self._sentencias_claves():
+                    logger.debug(sentencia)
+                    cursor.execute(sentencia)
+                    etapa.filas += 1
+                self.conexion.commit()
+        self._cargadas.clear()
+
+    def ruta(self, tabla: str) -> str:
+        """
+        Nombre de la tabla en la base de datos.
+        """
+        return tabla
+
+    def _crear_tabla(self, tabla: str, df: pd.DataFrame) -> str:
+        """
+        Sentencia CREATE TABLE con los tipos de las columnas del bloque.
+        """
+        columnas = [f"{columna} {self.TIPOS[_tipo_sql(columna, df[columna])]}" for columna in df.columns]
+        return f"CREATE TABLE {tabla} ({', '.join(columnas)})"
+
+    def _sentencias_claves(self) -> List[str]:
+        """
+        Sentencias que crean las claves e índices de las tablas cargadas. Las claves foráneas
+        solo se crean si la tabla referenciada también se ha cargado.
+        """
+        sentencias = []
+        for tabla in sorted(self._cargadas, key=lambda t: t not in CLAVES_PRIMARIAS):
+            if tabla in CLAVES_PRIMARIAS:
+                sentencias.append(f"ALTER TABLE {tabla} ADD PRIMARY KEY ({', '.join(CLAVES_PRIMARIAS[tabla])})")
+            for columna, referencia in CLAVES_FORANEAS.get(tabla, {}).items():
+                if referencia in self._cargadas:
+                    sentencias.append(
+                        f"ALTER TABLE {tabla} ADD CONSTRAINT fk_{tabla}_{columna} FOREIGN KEY ({columna}) "
+                        f"REFERENCES {referencia} ({', '.join(CLAVES_PRIMARIAS[referencia])})"
+                    )
+                sentencias.append(f"CREATE INDEX ix_{tabla}_{columna} ON {tabla} ({columna})")
+            for columnas in INDICES.get(tabla, []):
+                sentencias.append(f"CREATE INDEX ix_{tabla}_{'_'.join(columnas)} ON {tabla} ({', '.join(columnas)})")
+        return sentencias
+
+    def _copiar(self, cursor, tabla: str, df: pd.DataFrame):
+        """
+        Carga un bloque con COPY ... FROM STDIN en CSV, la vía rápida de PostgreSQL.
+        """
+        datos = df.to_csv(index=False, header=False, na_rep="\\N")
+        sentencia = f"COPY {tabla} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sentencia, io.StringIO(datos))
+        else:
+            with cursor.copy(sentencia) as copia:
+                copia.write(datos)
+
+class EscritorSQLite(EscritorBD):
+    """
+    Carga las tablas en una base de datos SQLite (out_dir/fakebiz.sqlite). Desactiva el diario y la
+    sincronización durante la carga, porque la base se genera de cero y se puede regenerar.
+    SQLite no permite añadir claves foráneas a una tabla existente, así que se declaran al crearla
+    (no se comprueban: foreign_keys está desactivado) y las claves primarias se crean al final
+    como índices únicos.
+    """
+    extension = "sqlite"
+    TIPOS = {"texto": "TEXT", "entero": "INTEGER", "real": "REAL", "fecha": "TEXT", "fecha_hora": "TEXT"}
+
+    def __init__(self, out_dir: str, nombre: str = "fakebiz.sqlite", claves: bool = True):
+        """
+        out_dir: carpeta de salida.
+        nombre: nombre del fichero de la base de datos dentro de out_dir.
+        claves: si es True, crea las claves e índices al cerrar.
+        """
+        self.archivo = os.path.join(out_dir, nombre)
+        conexion = sqlite3.connect(self.archivo, check_same_thread=False)
+        for pragma in ("journal_mode = OFF", "synchronous = OFF", "temp_store = MEMORY", "cache_size = -262144"):
+            conexion.execute(f"PRAGMA {pragma}")
+        super().__init__(conexion, marcador="?", claves=claves, copia=False, out_dir=out_dir)
+
+    def cerrar(self):
+        """
+        Crea las claves e índices y cierra la base de datos.
+        """
+        super().cerrar()
+        self.conexion.close()
+
+    def ruta(self, tabla: str) -> str:
+        """
+        Ruta del fichero de la base de datos (común a todas las tablas).
+        """
+        return self.archivo
+
+    def tamano(self, tabla: str) -> Optional[int]:
+        """
+        Bytes que ocupa una tabla en la base de datos (None si SQLite no tiene la tabla virtual dbstat).
+        """
+        try:
+            with sqlite3.connect(self.archivo) as conexion:
+                return conexion.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (tabla,)).fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            return None
+
+    def _crear_tabla(self, tabla: str, df: pd.DataFrame) -> str:
+        """
+        Sentencia CREATE TABLE con los tipos de las columnas y las claves foráneas.
+        """
+        sentencia = super()._crear_tabla(tabla, df)
+        foraneas = [
+            f"FOREIGN KEY ({columna}) REFERENCES {referencia} ({', '.join(CLAVES_PRIMARIAS[referencia])})"
+            for columna, referencia in CLAVES_FORANEAS.get(tabla, {}).items() if columna in df.columns
+        ]
+        if not foraneas:
+            return sentencia
+        return f"{sentencia[:-1]}, {', '.join(foraneas)})"
+
+    def _sentencias_claves(self) -> List[str]:
+        """
+        Claves primarias como índices únicos e índices de las claves foráneas y de INDICES.
+        """
+        sentencias = []
+        for tabla in sorted(self._cargadas):
+            if tabla in CLAVES_PRIMARIAS:
+                sentencias.append(f"CREATE UNIQUE INDEX pk_{tabla} ON {tabla} ({', '.join(CLAVES_PRIMARIAS[tabla])})")
+            for columnas in [[c] for c in CLAVES_FORANEAS.get(tabla, {})] + INDICES.get(tabla, []):
+                sentencias.append(f"CREATE INDEX ix_{tabla}_{'_'.join(columnas)} ON {tabla} ({', '.join(columnas)})")
+        return sentencias + ["ANALYZE"]
+
+ESCRITORES = {
+    "csv": EscritorCSV,
+    "parquet": EscritorParquet,
+    "arrow": EscritorArrowIPC,
+    "feather": EscritorFeather,
+    "sqlite": EscritorSQLite,
+}
+
+# Compresiones de cada formato (CSV y SQLite no admiten compresión)
+COMPRESIONES = {
+    "parquet": ("snappy", "zstd", "gzip", "brotli", "lz4", "none"),
+    "arrow": ("lz4", "zstd"),
+    "feather": ("lz4", "zstd"),
+}
+
+def validar_opciones(formato: str, opciones: Dict):
+    """
+    Comprueba, sin crear el escritor, que el formato existe y admite las opciones indicadas.
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {', '.join(ESCRITORES)}")
+    compresion = opciones.get("compression")
+    if compresion is not None and compresion not in COMPRESIONES.get(formato, ()):
+        if formato not in COMPRESIONES:
+            raise ValueError(f"El formato {formato} no admite compresión")
+        raise ValueError(f"Compresión no soportada en {formato}: {compresion}. Opciones: {', '.join(COMPRESIONES[formato])}")
+    try:
+        inspect.signature(ESCRITORES[formato]).bind(None, **opciones)
+    except TypeError as e:
+        raise ValueError(f"Opciones no válidas para el formato {formato}: {e}")
+
+def crear_escritor(formato: str, out_dir: str, **opciones) -> EscritorCSV:
+    """
+    Crea el escritor de un formato ('csv', 'parquet', 'arrow', 'feather' o 'sqlite') con sus opciones.
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {', '.join(ESCRITORES)}")
+    return ESCRITORES[formato](out_dir, **opciones)
+
+def a_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Formatea como texto las columnas de una tabla compacta (IDs numéricos y fechas datetime64),
+    de modo que el CSV sea igual que el de la tabla sin compactar. Las demás tablas no se copian.
+    """
+    columnas = {}
+    for columna in df.columns:
+        valores = df[columna]
+        if columna in IDS_CLIENTE and pd.api.types.is_integer_dtype(valores.dtype):
+            columnas[columna] = _ids_texto(valores)
+        elif pd.api.types.is_datetime64_dtype(valores.dtype):
+            unidad = "s" if columna in FECHAS_HORA else "D"
+            columnas[columna] = fechas.formatear(valores.to_numpy(dtype=f"datetime64[{unidad}]"), unidad)
+    if not columnas:
+        return df
+    return df.assign(**columnas)
+
+def _tipo_sql(columna: str, valores: pd.Series) -> str:
+    """
+    Tipo lógico de una columna para los escritores de bases de datos.
+    """
+    if columna in IDS_CLIENTE:
+        return "texto"
+    if columna in FECHAS:
+        return "fecha"
+    if columna in FECHAS_HORA:
+        return "fecha_hora"
+    if columna in IMPORTES or pd.api.types.is_float_dtype(valores.dtype):
+        return "real"
+    if pd.api.types.is_integer_dtype(valores.dtype):
+        return "entero"
+    return "texto"
+
+def _filas(df: pd.DataFrame) -> List[tuple]:
+    """
+    Convierte un bloque en tuplas de valores de Python para executemany, con None en los vacíos.
+    """
+    columnas = []
+    for columna in df.columns:
+        valores = df[columna]
+        if pd.api.types.is_integer_dtype(valores.dtype):
+            columnas.append(valores.to_numpy().tolist())
+        else:
+            columnas.append(valores.astype(object).where(valores.notna(), None).tolist())
+    return list(zip(*columnas))
+
+def _ids_texto(valores: pd.Series) -> np.ndarray:
+    """
+    Formatea IDs numéricos como cadenas de DIGITOS_CLIENTE dígitos.
+    """
+    return np.char.zfill(valores.to_numpy().astype(str), DIGITOS_CLIENTE).astype(object)
+
+def escribir_tablas(escritor: EscritorCSV, tablas: Dict[str, pd.DataFrame], hilos: Optional[int] = None):
+    """
+    Escribe varias tablas completas a la vez, cada una en un hilo (la codificación de Arrow
+    y la compresión liberan el GIL), y cierra el escritor.
+    """
+    def escribir(tabla: str, df: pd.DataFrame):
+        _anadir(escritor, tabla, df)
+        escritor.cerrar_tabla(tabla)
+
+    with ThreadPoolExecutor(max_workers=hilos or len(tablas) or 1) as executor:
+        for futuro in [executor.submit(escribir, tabla, df) for tabla, df in tablas.items()]:
+            futuro.result()
+    escritor.cerrar()
+
+def _anadir(escritor: EscritorCSV, tabla: str, df: pd.DataFrame):
+    """
+    Añade un bloque a la tabla registrando la etapa de escritura.
+    """
+    with metricas.etapa(f"escritura_{escritor.extension}", generador=tabla) as etapa:
+        escritor.anadir(tabla, df)
+        etapa.filas = len(df)
+
+class EscrituraConcurrente:
+    """
+    Escribe bloques de varias tablas en paralelo manteniendo el orden dentro de cada tabla.
+    Cada tabla tiene como mucho un bloque pendiente, así que la memoria queda acotada.
+    """
+    def __init__(self, escritor: EscritorCSV, hilos: Optional[int] = None):
+        """
+        escritor: escritor de destino.
+        hilos: número de hilos de escritura (opcional).
+        """
+        self.escritor = escritor
+        self.executor = ThreadPoolExecutor(max_workers=hilos or min(8, os.cpu_count() or 1))
+        self._pendientes: Dict[str, Future] = {}
+
+    def anadir(self, tabla: str, df: pd.DataFrame):
+        """
+        Encola un bloque de la tabla, esperando antes a que termine el anterior de la misma tabla.
+        """
+        previo = self._pendientes.get(tabla)
+        if previo is not None:
+            previo.result()
+        self._pendientes[tabla] = self.executor.submit(_anadir, self.escritor, tabla, df)
+
+    def cerrar(self):
+        """
+        Espera a los bloques pendientes y cierra el escritor.
+        """
+        for futuro in self._pendientes.values():
+            futuro.result()
+        self.executor.shutdown()
+        self.escritor.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
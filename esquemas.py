@@ -0,0 +1,277 @@
+"""
+Esquema declarativo de las tablas: distribuciones de las columnas categóricas, número de filas por
+cliente (cardinalidad), proporciones y antigüedad de las fechas. ESQUEMA es el escenario por defecto;
+un escenario distinto es una variante con solo lo que cambia, como dict o fichero JSON/YAML:
+
+    variante = {"contratos": {"columnas": {"situacion_actividad": {"pesos": [0.4, 0.3, 0.2, 0.1]}}},
+                "envios": {"cardinalidad": {"minimo": 5, "maximo": 50}}}
+    main = Main(n_clientes=100_000, seed=42, esquema=variante)
+
+Cada tabla se compila una vez por proceso y variante en un PlanMuestreo, con la distribución acumulada
+de cada columna ya normalizada, y se muestrea por lotes con rng.random + searchsorted (lo mismo que
+rng.choice con p, sin validar ni normalizar los pesos en cada llamada).
+"""
+import copy
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # PyYAML solo es necesario para leer variantes en YAML
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+# Escenario por defecto. Cada distribución es {"valores": [...], "pesos": [...]} (sin pesos, uniforme)
+# o, para cardinalidades, {"minimo": a, "maximo": b} (entero uniforme entre a y b, ambos incluidos)
+ESQUEMA: Dict[str, Dict[str, Any]] = {
+    # Columnas demográficas comunes de clientes y exclientes
+    "personas": {
+        "columnas": {
+            "tipo_docum": {"valores": ["DNI", "NIE", "PASAPORTE", "OTRO"], "pesos": [0.6, 0.15, 0.2, 0.05]},
+            # M: masculino, F: femenino
+            "genero": {"valores": ["M", "F"], "pesos": [0.49, 0.51]},
+            # Aprox. España INE
+            "estado_civil": {"valores": ["Soltero/a", "Casado/a", "Divorciado/a", "Viudo/a", "Separado/a", "Pareja de hecho"],
+                             "pesos": [0.4, 0.45, 0.06, 0.05, 0.02, 0.02]},
+            "nivel_estudios": {"valores": ["01", "02", "03", "04", "05", "06"], "pesos": [0.15, 0.2, 0.3, 0.2, 0.1, 0.05]},
+            # Español, Catalán, Gallego, Euskera, Alemán, Francés
+            "codigo_idioma": {"valores": ["E", "C", "G", "H", "A", "F"], "pesos": [0.85, 0.05, 0.03, 0.03, 0.02, 0.02]},
+        },
+        "proporciones": {"sin_apellido2": 0.25},
+        # Fechas de nacimiento en los últimos 120 años
+        "fechas": {"anios": 120},
+    },
+    "exclientes": {
+        "columnas": {"motivo_baja": {"valores": ["Voluntaria", "Incumplimiento", "Fallecimiento"]}},
+        # Exclientes que vuelven a ser clientes
+        "proporciones": {"recuperados": 0.2},
+    },
+    "contratos": {
+        # Contratos por cliente, aleatorio y decreciente
+        "cardinalidad": {"valores": list(range(3, 16)),
+                         "pesos": [0.25, 0.20, 0.15, 0.10, 0.08, 0.06, 0.05, 0.04, 0.03, 0.02, 0.01, 0.01, 0.01]},
+        "columnas": {
+            "empresa": {"valores": [f"EMP{i:02d}" for i in range(1, 6)]},
+            "centro": {"valores": [f"CEN{i:02d}" for i in range(1, 8)]},
+            "codigo_producto": {"valores": [f"PRD{i:02d}" for i in range(1, 26)]},
+            # Subproducto de los productos que tienen uno (SB00: producto sin subproducto)
+            "codigo_subproducto": {"valores": [f"SB{i:02d}" for i in range(1, 6)]},
+            "rel_contra": {"valores": ["Titular", "Cotitular", "Autorizado", "Representante", "Apoderado", "Tutor",
+                                       "Interventor judicial", "Administrador", "Heredero"],
+                           "pesos": [0.6, 0.15, 0.1, 0.05, 0.03, 0.02, 0.02, 0.02, 0.01]},
+            "situacion_actividad": {"valores": ["Activa", "Cancelada", "Vencida", "Rescindida"], "pesos": [0.7, 0.15, 0.1, 0.05]},
+        },
+        # Fechas de alta en los últimos 10 años
+        "fechas": {"anios": 10},
+    },
+    "contactos": {
+        "cardinalidad": {"minimo": 1, "maximo": 4},
+        # Más peso para email y teléfono
+        "columnas": {"tipo_contacto": {"valores": ["email", "telefono", "fax", "web"], "pesos": [0.45, 0.4, 0.08, 0.07]}},
+        # Contactos activos (baja 9999-12-31)
+        "proporciones": {"activos": 0.8},
+    },
+    "direcciones": {
+        # Domicilios por cliente: mayoría 1 o 2
+        "cardinalidad": {"valores": [1, 2, 3, 4, 5], "pesos": [0.6, 0.3, 0.07, 0.02, 0.01]},
+        # País de los domicilios no españoles
+        "columnas": {"pais_extranjero": {"valores": ["France", "Germany", "United States"]}},
+        "proporciones": {"espanolas": 0.75},
+    },
+    "envios": {
+        # Envíos por cliente origen
+        "cardinalidad": {"minimo": 2, "maximo": 20},
+        "columnas": {"motivo_envio": {"valores": ["Pago", "Regalo", "Transferencia", "Devolución", "Otro"]}},
+        "importes": {"minimo": 10, "maximo": 5000},
+        "fechas": {"anios": 5},
+    },
+    "cuentas_bloqueadas": {
+        "columnas": {
+            "tipo_fraude": {"valores": ["Phishing", "Robo de identidad", "Transacciones sospechosas", "Fraude con tarjeta",
+                                        "Lavado de dinero", "Acceso no autorizado"]},
+            "estado_fraude": {"valores": ["Investigación", "Bloqueado"]},
+        },
+        # Proporción de clientes con la cuenta bloqueada (al menos uno)
+        "proporciones": {"bloqueadas": 0.01},
+        # Antigüedad máxima de la inclusión en la lista de fraude
+        "fechas": {"anios": 3},
+    },
+}
+SECCIONES = {"columnas", "cardinalidad", "proporciones", "fechas", "importes"}
+
+# Planes compilados por (tabla, huella de la variante), uno por proceso
+_planes: Dict[tuple, "PlanMuestreo"] = {}
+
+class Distribucion:
+    """
+    Distribución discreta compilada: valores y distribución acumulada normalizada (None si es uniforme).
+    Muestrea con los mismos números aleatorios que rng.choice(valores, n, p=pesos).
+    """
+    def __init__(self, valores, pesos=None, nombre: str = ""):
+        """
+        valores: valores posibles.
+        pesos: peso relativo de cada valor (opcional, por defecto uniforme); no hace falta que sumen 1.
+        nombre: nombre de la distribución para los mensajes de error.
+        """
+        self.valores = np.asarray(valores)
+        if self.valores.ndim != 1 or len(self.valores) == 0:
+            raise ValueError(f"{nombre}: 'valores' debe ser una lista no vacía")
+        self.acumulada = None
+        if pesos is not None:
+            pesos = np.asarray(pesos, dtype=np.float64)
+            if pesos.shape != self.valores.shape:
+                raise ValueError(f"{nombre}: {len(pesos)} pesos para {len(self.valores)} valores")
+            if not np.isfinite(pesos).all() or (pesos < 0).any() or pesos.sum() <= 0:
+                raise ValueError(f"{nombre}: los pesos deben ser finitos, no negativos y con suma positiva")
+            self.acumulada = pesos.cumsum()
+            self.acumulada /= self.acumulada[-1]
+
+    @classmethod
+    def desde(cls, definicion: Dict, nombre: str = "") -> "Distribucion":
+        """
+        Compila una distribución del esquema: {"valores", "pesos"} o {"minimo", "maximo"}.
+        """
+        if "minimo" in definicion or "maximo" in definicion:
+            minimo, maximo = int(definicion["minimo"]), int(definicion["maximo"])
+            if minimo > maximo:
+                raise ValueError(f"{nombre}: minimo ({minimo}) mayor que maximo ({maximo})")
+            return cls(np.arange(minimo, maximo + 1), nombre=nombre)
+        if "valores" not in definicion:
+            raise ValueError(f"{nombre}: la distribución necesita 'valores' o 'minimo' y 'maximo'")
+        return cls(definicion["valores"], definicion.get("pesos"), nombre=nombre)
+
+    def muestrear(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """
+        Devuelve n valores al azar.
+        """
+        if self.acumulada is None:
+            return self.valores[rng.integers(0, len(self.valores), size=n)]
+        return self.valores[self.acumulada.searchsorted(rng.random(n), side="right")]
+
+    def probabilidades(self) -> np.ndarray:
+        """
+        Probabilidad de cada valor.
+        """
+        if self.acumulada is None:
+            return np.full(len(self.valores), 1 / len(self.valores))
+        return np.diff(self.acumulada, prepend=0.0)
+
+    def media(self) -> float:
+        """
+        Valor esperado (distribuciones numéricas, como las cardinalidades).
+        """
+        return float(np.dot(self.valores, self.probabilidades()))
+
+    def maximo(self):
+        """
+        Mayor valor con probabilidad positiva.
+        """
+        return self.valores[self.probabilidades() > 0].max()
+
+class PlanMuestreo:
+    """
+    Plan de muestreo compilado de una tabla: distribuciones de sus columnas y cardinalidad,
+    proporciones, antigüedad de las fechas e importes.
+    """
+    def __init__(self, tabla: str, definicion: Dict[str, Any]):
+        """
+        tabla: nombre de la tabla (clave de ESQUEMA).
+        definicion: sección de la tabla en el esquema combinado.
+        """
+        desconocidas = set(definicion) - SECCIONES
+        if desconocidas:
+            raise ValueError(f"{tabla}: secciones desconocidas {sorted(desconocidas)}. Opciones: {sorted(SECCIONES)}")
+        self.tabla = tabla
+        self.columnas = {columna: Distribucion.desde(d, f"{tabla}.{columna}") for columna, d in definicion.get("columnas", {}).items()}
+        cardinalidad = definicion.get("cardinalidad")
+        self.cardinalidad = Distribucion.desde(cardinalidad, f"{tabla}.cardinalidad") if cardinalidad is not None else None
+        if self.cardinalidad is not None and self.cardinalidad.valores.min() < 0:
+            raise ValueError(f"{tabla}.cardinalidad: el número de filas por cliente no puede ser negativo")
+        self.proporciones = dict(definicion.get("proporciones", {}))
+        for nombre, valor in self.proporciones.items():
+            if not 0 <= valor <= 1:
+                raise ValueError(f"{tabla}.proporciones.{nombre}: {valor} fuera de [0, 1]")
+        self.fechas = dict(definicion.get("fechas", {}))
+        self.importes = dict(definicion.get("importes", {}))
+
+    def muestrear(self, columna: str, rng: np.random.Generator, n: int) -> np.ndarray:
+        """
+        Devuelve n valores al azar de una columna.
+        """
+        return self.columnas[columna].muestrear(rng, n)
+
+    def valores(self, columna: str) -> list:
+        """
+        Valores posibles de una columna.
+        """
+        return self.columnas[columna].valores.tolist()
+
+def combinar(base: Dict[str, Any], variante: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Devuelve una copia de base con los cambios de variante, combinando los dicts anidados.
+    Una distribución de la variante con 'valores', 'minimo' o 'maximo' sustituye entera a la de base;
+    si solo trae 'pesos', se aplican a los valores de base.
+    """
+    resultado = copy.deepcopy(base)
+    for clave, valor in (variante or {}).items():
+        actual = resultado.get(clave)
+        if isinstance(valor, dict) and isinstance(actual, dict) and not ({"valores", "minimo", "maximo"} & set(valor)):
+            resultado[clave] = combinar(actual, valor)
+        else:
+            resultado[clave] = copy.deepcopy(valor)
+    return resultado
+
+def huella(variante: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Huella de una variante para las claves de caché (None para el escenario por defecto).
+    """
+    if not variante:
+        return None
+    return hashlib.sha256(json.dumps(variante, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def plan(tabla: str, variante: Optional[Dict[str, Any]] = None) -> PlanMuestreo:
+    """
+    Devuelve el plan compilado de una tabla para una variante del esquema (None: escenario por defecto).
+    Se compila la primera vez y se reutiliza en el resto de bloques y shards del proceso.
+    """
+    clave = (tabla, huella(variante))
+    if clave not in _planes:
+        desconocidas = set(variante or {}) - set(ESQUEMA)
+        if desconocidas:
+            raise ValueError(f"Tablas desconocidas en el esquema: {sorted(desconocidas)}. Opciones: {', '.join(ESQUEMA)}")
+        if tabla not in ESQUEMA:
+            raise ValueError(f"Tabla sin esquema: {tabla}. Opciones: {', '.join(ESQUEMA)}")
+        _planes[clave] = PlanMuestreo(tabla, combinar(ESQUEMA[tabla], (variante or {}).get(tabla)))
+    return _planes[clave]
+
+def validar(variante: Optional[Dict[str, Any]]):
+    """
+    Compila todas las tablas de una variante para detectar errores antes de generar.
+    """
+    for tabla in ESQUEMA:
+        plan(tabla, variante)
+
+def valores(tabla: str, columna: str) -> list:
+    """
+    Valores de una columna en el escenario por defecto (para los catálogos de los generadores).
+    """
+    return list(ESQUEMA[tabla]["columnas"][columna]["valores"])
+
+def cargar(ruta: str) -> Dict[str, Any]:
+    """
+    Lee una variante del esquema de un fichero JSON o, con PyYAML instalado, YAML (.yaml o .yml).
+    """
+    with open(ruta, encoding="utf-8") as f:
+        if ruta.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("Leer esquemas en YAML necesita PyYAML: pip install pyyaml")
+            variante = yaml.safe_load(f)
+        else:
+            variante = json.load(f)
+    validar(variante)
+    return variante or {}
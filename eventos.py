@@ -0,0 +1,281 @@
+"""
+Flujo de envíos ordenado por fecha_hora_envio y reproducción a ritmo controlado, para alimentar
+consumidores en streaming (por ejemplo, un servicio de scoring de fraude) con carga sostenida.
+
+    python -m eventos --n-clientes 100000 --seed 42 --rate 5000 --out tcp://127.0.0.1:9000
+    python -m eventos --seed 42 --start 2024-01-01 --speedup 3600 --out envios.ndjson
+
+Cada cliente envía según un proceso de Poisson con su propia tasa: el número de envíos de la
+cardinalidad del esquema repartido en los años de esquemas.ESQUEMA["envios"]["fechas"]. La
+superposición de esos procesos es otro proceso de Poisson cuya tasa es la suma, y el emisor de cada
+evento es el cliente i con probabilidad proporcional a su tasa, así que el flujo se genera por
+ventanas de tiempo consecutivas: número de eventos de Poisson, instantes uniformes ordenados dentro
+de la ventana y emisores elegidos por su tasa. Solo se ordena cada ventana, nunca el flujo entero,
+y cada ventana tiene su propio generador aleatorio: se puede reanudar desde cualquier instante.
+"""
+import argparse
+import contextlib
+import logging
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import esquemas
+import fechas
+import ids
+import semillas
+from fake_clientes import ClientesFaker
+from fake_envios import EnviosFaker
+
+logger = logging.getLogger(__name__)
+
+# Eventos esperados por ventana de generación (fija su duración según la tasa total)
+EVENTOS_VENTANA = 50_000
+# Espera máxima entre dos comprobaciones del reloj al reproducir
+MAX_ESPERA = 0.05
+FORMATOS = ("ndjson", "csv")
+
+class FlujoEnvios:
+    """
+    Envíos de una población de clientes como flujo de eventos en orden de fecha_hora_envio.
+    """
+    COLUMNAS = EnviosFaker.COLUMNAS
+
+    def __init__(self, clientes: Union['ClientesFaker', pd.DataFrame, None] = None, n_clientes: int = 10000,
+                 seed: Optional[int] = None, hoy: Optional[datetime] = None, desde: Optional[fechas.FechaLike] = None,
+                 hasta: Optional[fechas.FechaLike] = None, sin_fin: bool = False, esquema: Optional[Dict] = None,
+                 segundos_ventana: Optional[int] = None):
+        """
+        clientes: instancia de ClientesFaker o DataFrame con columna 'cliente_id' (opcional; por defecto
+            los n_clientes de Main(n_clientes=n_clientes, seed=seed), sin generarlos).
+        n_clientes: número de clientes de la población cuando no se pasan clientes.
+        seed: semilla para reproducibilidad (opcional).
+        hoy: fecha y hora de referencia (opcional, por defecto el momento actual).
+        desde: primer instante del flujo (opcional, por defecto hoy menos los años del esquema, como EnviosFaker).
+        hasta: último instante del flujo (opcional, por defecto hoy).
+        sin_fin: si es True el flujo no termina en hasta y sigue al mismo ritmo.
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
+        segundos_ventana: duración de cada ventana de generación (opcional, por defecto la que da
+            unos EVENTOS_VENTANA eventos).
+        """
+        self.seed = seed
+        self.esquema = esquema
+        self.plan = esquemas.plan("envios", esquema)
+        self.hoy = hoy or datetime.now()
+        if clientes is None:
+            asignador = ids.AsignadorIds(seed, "cliente_id")
+            self.cliente_ids = np.asarray(asignador.texto(asignador.permutar(np.arange(n_clientes, dtype=np.uint64))), dtype=object)
+        elif hasattr(clientes, "get_clientes"):
+            self.cliente_ids = clientes.get_clientes()["cliente_id"].to_numpy()
+        else:
+            self.cliente_ids = clientes["cliente_id"].to_numpy()
+        if len(self.cliente_ids) < 2:
+            raise ValueError("Se requieren al menos dos clientes para generar envíos.")
+        self.inicio = fechas.a_datetime64(desde, "s") if desde is not None else fechas.hace_anios(self.hoy, self.plan.fechas["anios"], "s")
+        self.fin = None if sin_fin else fechas.a_datetime64(hasta if hasta is not None else self.hoy, "s")
+        if self.fin is not None and self.fin < self.inicio:
+            raise ValueError(f"El flujo termina ({self.fin}) antes de empezar ({self.inicio})")
+        # Envíos de cada cliente en el periodo del esquema: su tasa es ese número entre la duración del periodo
+        n_envios = self.plan.cardinalidad.muestrear(semillas.generador(seed, "eventos/clientes"), len(self.cliente_ids))
+        self.acumulada = np.cumsum(n_envios)
+        periodo = int(365.24 * self.plan.fechas["anios"] * 86400)
+        self.tasa = float(self.acumulada[-1]) / periodo
+        self.segundos_ventana = segundos_ventana or max(1, int(EVENTOS_VENTANA / self.tasa))
+        logger.info(f"Flujo de envíos: {len(self.cliente_ids)} clientes, {self.tasa:.4f} envíos/s, ventanas de {self.segundos_ventana} s")
+
+    def lotes(self, reanudar: Optional[fechas.FechaLike] = None) -> Iterator[Tuple[np.ndarray, pd.DataFrame]]:
+        """
+        Devuelve los envíos por ventanas, como (instantes datetime64[s], DataFrame) en orden de tiempo.
+        reanudar: instante desde el que continuar (opcional); las ventanas anteriores no se generan.
+        """
+        ventana = 0
+        reanudar = fechas.a_datetime64(reanudar, "s") if reanudar is not None else None
+        if reanudar is not None and reanudar > self.inicio:
+            ventana = int((reanudar - self.inicio).astype(np.int64)) // self.segundos_ventana
+        while True:
+            instantes, envios = self.ventana(ventana)
+            if instantes is None:
+                return
+            if reanudar is not None:
+                quedan = instantes >= reanudar
+                instantes, envios = instantes[quedan], envios[quedan].reset_index(drop=True)
+                reanudar = None
+            if len(envios):
+                yield instantes, envios
+            ventana += 1
+
+    def ventana(self, k: int) -> Tuple[Optional[np.ndarray], Optional[pd.DataFrame]]:
+        """
+        Genera los envíos de la ventana k, ordenados; (None, None) si la ventana queda fuera del flujo.
+        """
+        ini = self.inicio + np.timedelta64(k * self.segundos_ventana, "s")
+        duracion = self.segundos_ventana
+        if self.fin is not None:
+            if ini > self.fin:
+                return None, None
+            duracion = min(duracion, int((self.fin - ini).astype(np.int64)) + 1)
+        rng = semillas.generador(self.seed, "eventos/envios", k)
+        total = int(rng.poisson(self.tasa * duracion))
+        instantes = ini + np.sort(rng.integers(0, duracion, size=total)).astype("timedelta64[s]")
+        # Emisor proporcional a su tasa; destino cualquier otro cliente, como en EnviosFaker
+        origen_idx = self.acumulada.searchsorted(rng.integers(0, self.acumulada[-1], size=total), side="right")
+        destino_idx = rng.integers(0, len(self.cliente_ids) - 1, size=total)
+        destino_idx += destino_idx >= origen_idx
+        envios = pd.DataFrame({
+            "cliente_origen_id": self.cliente_ids[origen_idx],
+            "cliente_destino_id": self.cliente_ids[destino_idx],
+            "valor_envio": np.round(rng.uniform(self.plan.importes["minimo"], self.plan.importes["maximo"], size=total), 2),
+            "fecha_hora_envio": fechas.formatear(instantes, "s"),
+            "motivo_envio": self.plan.muestrear("motivo_envio", rng, total),
+        }, columns=self.COLUMNAS)
+        return instantes, envios
+
+def reproducir(lotes: Iterable[Tuple[np.ndarray, pd.DataFrame]], destino: str = "-", formato: str = "ndjson",
+               eventos_por_segundo: Optional[float] = None, aceleracion: Optional[float] = None,
+               limite: Optional[int] = None) -> Dict[str, float]:
+    """
+    Emite los eventos de un flujo ordenado a un destino, a ritmo controlado, y devuelve las
+    estadísticas de la reproducción (eventos, segundos, eventos/s y retraso máximo respecto al plan).
+    lotes: (instantes, DataFrame) en orden de tiempo, como los de FlujoEnvios.lotes().
+    destino: '-' (salida estándar), 'tcp://host:puerto', 'unix:///ruta/socket' o la ruta de un fichero.
+    formato: 'ndjson' o 'csv'.
+    eventos_por_segundo: ritmo constante (opcional).
+    aceleracion: reloj acelerado: un segundo real equivale a `aceleracion` segundos del flujo (opcional).
+        Sin ritmo ni aceleración los eventos se emiten tan rápido como los acepta el destino.
+    limite: número máximo de eventos (opcional; necesario para parar un flujo sin fin).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {', '.join(FORMATOS)}")
+    if eventos_por_segundo is not None and aceleracion is not None:
+        raise ValueError("Indica eventos_por_segundo o aceleracion, no ambos")
+    if (eventos_por_segundo is not None and eventos_por_segundo <= 0) or (aceleracion is not None and aceleracion <= 0):
+        raise ValueError("El ritmo y la aceleración deben ser positivos")
+    enviados = 0
+    retraso = 0.0
+    origen_flujo = None
+    inicio = None
+    lotes = iter(lotes)
+    # El lote siguiente se genera y serializa en un hilo mientras se emite el actual
+    with _abrir(destino) as salida, ThreadPoolExecutor(max_workers=1) as hilo:
+        try:
+            siguiente = hilo.submit(_preparar, lotes, formato)
+            while limite is None or enviados < limite:
+                preparado = siguiente.result()
+                if preparado is None:
+                    break
+                instantes, lineas, cabecera = preparado
+                siguiente = hilo.submit(_preparar, lotes, formato)
+                if limite is not None:
+                    instantes, lineas = instantes[:limite - enviados], lineas[:limite - enviados]
+                if inicio is None:
+                    if cabecera:
+                        salida.write(cabecera)
+                    inicio = time.monotonic()
+                # Momento de emisión de cada evento, en segundos desde el inicio de la reproducción
+                if eventos_por_segundo is not None:
+                    objetivos = (enviados + np.arange(len(lineas))) / eventos_por_segundo
+                elif aceleracion is not None:
+                    origen_flujo = instantes[0] if origen_flujo is None else origen_flujo
+                    objetivos = (instantes - origen_flujo).astype(np.int64) / aceleracion
+                else:
+                    objetivos = np.zeros(len(lineas))
+                i = 0
+                while i < len(lineas):
+                    ahora = time.monotonic() - inicio
+                    j = int(objetivos.searchsorted(ahora, side="right"))
+                    if j > i:
+                        salida.write(b"".join(lineas[i:j]))
+                        salida.flush()
+                        if eventos_por_segundo is not None or aceleracion is not None:
+                            retraso = max(retraso, float(ahora - objetivos[i]))
+                        enviados += j - i
+                        i = j
+                    else:
+                        time.sleep(min(objetivos[i] - ahora, MAX_ESPERA))
+        except BrokenPipeError:
+            logger.warning("El destino cerró la conexión")
+        finally:
+            siguiente.cancel()
+    segundos = time.monotonic() - inicio if inicio is not None else 0.0
+    estadisticas = {"eventos": enviados, "segundos": round(segundos, 3),
+                    "eventos_por_segundo": round(enviados / segundos, 1) if segundos else 0.0, "retraso_max": round(retraso, 3)}
+    logger.info(f"Reproducción terminada: {estadisticas}")
+    return estadisticas
+
+@contextlib.contextmanager
+def _abrir(destino: str) -> Iterator[BinaryIO]:
+    """
+    Abre el destino de la reproducción como fichero binario.
+    """
+    if destino == "-":
+        yield sys.stdout.buffer
+        return
+    with contextlib.ExitStack() as pila:
+        if destino.startswith("tcp://"):
+            host, _, puerto = destino[len("tcp://"):].rpartition(":")
+            conexion = pila.enter_context(socket.create_connection((host or "127.0.0.1", int(puerto))))
+        elif destino.startswith("unix://"):
+            conexion = pila.enter_context(socket.socket(socket.AF_UNIX, socket.SOCK_STREAM))
+            conexion.connect(destino[len("unix://"):])
+        else:
+            yield pila.enter_context(open(destino, "wb"))
+            return
+        yield pila.enter_context(conexion.makefile("wb"))
+
+def _preparar(lotes: Iterator[Tuple[np.ndarray, pd.DataFrame]], formato: str) -> Optional[Tuple[np.ndarray, List[bytes], bytes]]:
+    """
+    Toma el lote siguiente y lo serializa en una línea por evento; devuelve también la cabecera
+    CSV (vacía en NDJSON). None al terminar el flujo.
+    """
+    siguiente = next(lotes, None)
+    if siguiente is None:
+        return None
+    instantes, df = siguiente
+    if formato == "ndjson":
+        return instantes, df.to_json(orient="records", lines=True, force_ascii=False).encode().splitlines(keepends=True), b""
+    return instantes, df.to_csv(index=False, header=False).encode().splitlines(keepends=True), df.iloc[:0].to_csv(index=False).encode()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Reproduce el flujo de envíos desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(prog="eventos", description="Emite envíos en orden de tiempo a ritmo controlado.")
+    parser.add_argument("--n-clientes", type=int, default=10000, help="Número de clientes de la población.")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla para reproducibilidad.")
+    parser.add_argument("--start", default=None, help="Primer instante ISO del flujo (por defecto hoy menos los años del esquema).")
+    parser.add_argument("--end", default=None, help="Último instante ISO del flujo (por defecto hoy).")
+    parser.add_argument("--endless", action="store_true", help="No termina en --end: sigue generando al mismo ritmo.")
+    parser.add_argument("--resume", default=None, help="Instante ISO desde el que reanudar la reproducción.")
+    parser.add_argument("--rate", type=float, default=None, help="Eventos por segundo.")
+    parser.add_argument("--speedup", type=float, default=None, help="Segundos del flujo por segundo real.")
+    parser.add_argument("--limit", type=int, default=None, help="Número máximo de eventos.")
+    parser.add_argument("--out", default="-", help="'-', tcp://host:puerto, unix:///ruta o fichero.")
+    parser.add_argument("--format", default="ndjson", choices=FORMATOS, help="Formato de los eventos.")
+    parser.add_argument("--schema", default=None, metavar="FICHERO",
+                        help="Variante del esquema de distribuciones en JSON o YAML, con solo lo que cambia.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el progreso.")
+    args = parser.parse_args(argv)
+    if args.rate is not None and args.speedup is not None:
+        parser.error("--rate y --speedup son excluyentes")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        esquema = esquemas.cargar(args.schema) if args.schema else None
+        flujo = FlujoEnvios(n_clientes=args.n_clientes, seed=args.seed, desde=args.start, hasta=args.end,
+                            sin_fin=args.endless, esquema=esquema)
+        estadisticas = reproducir(flujo.lotes(args.resume), args.out, args.format, args.rate, args.speedup, args.limit)
+    except (ValueError, ImportError, OSError) as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        return 130
+    print(f"{estadisticas['eventos']} eventos en {estadisticas['segundos']} s ({estadisticas['eventos_por_segundo']} eventos/s, "
+          f"retraso máximo {estadisticas['retraso_max']} s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
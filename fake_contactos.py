@@ -1,103 +1,178 @@
 import pandas as pd
-import random
-from faker import Faker
+import numpy as np
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Optional, Union
 import logging
 
-logging.basicConfig(level=logging.INFO)
+import cache
+import esquemas
+import fechas
+import metricas
+import paralelo
+import pools_faker
+import semillas
+from columnar import TablaColumnar
+from fake_clientes import ClientesFaker
+
+if TYPE_CHECKING:
+    from faker import Faker
+
 logger = logging.getLogger(__name__)
 
 class ContactosFaker:
     """
     Generador de contactos falsos asociados a clientes.
     """
-    def __init__(self, clientes, n_contactos_por_cliente: Optional[int] = None, seed: Optional[int] = None):
+    LOCALES_PAIS = {
+        "España": 'es_ES',
+        "France": 'fr_FR',
+        "Germany": 'de_DE',
+        "United States": 'en_US',
+    }
+    PROVEEDORES = {
+        "email": "email",
+        "telefono": "phone_number",
+        "fax": "phone_number",
+        "web": "url",
+    }
+    # Catálogo del escenario por defecto; la distribución está en esquemas.ESQUEMA["contactos"]
+    TIPOS_CONTACTO = esquemas.valores("contactos", "tipo_contacto")
+    COLUMNAS = ["cliente_id", "tipo_contacto", "valor_contacto", "fecha_alta_contacto", "fecha_baja_contacto"]
+
+    def __init__(self, clientes: Union['ClientesFaker', pd.DataFrame], n_contactos_por_cliente: Optional[int] = None, seed: Optional[int] = None,
+                 hoy: Optional[datetime] = None, workers: int = 1, bloque: int = 0,
+                 pools: Optional[pools_faker.PoolsFaker] = None, esquema: Optional[Dict] = None):
         """
-        clientes: instancia de ClientesFaker.
+        clientes: instancia de ClientesFaker o DataFrame de clientes.
         n_contactos_por_cliente: número fijo de contactos por cliente (opcional).
         seed: semilla para reproducibilidad (opcional).
+        hoy: fecha de referencia (opcional, por defecto hoy a las 00:00).
+        workers: número de procesos para generar los shards de contactos.
+        bloque: índice del bloque de clientes, que junto con seed fija el generador aleatorio.
+        pools: pools de valores de Faker de los que muestrear los contactos (opcional).
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
         """
-        if seed is not None:
-            random.seed(seed)
-            Faker.seed(seed)
-        self.clientes = clientes
+        self.seed = seed
+        self.bloque = bloque
+        self.rng = semillas.generador(seed, "contactos", bloque)
+        self.workers = workers
+        self.pools = pools
+        self.esquema = esquema
+        self.plan = esquemas.plan("contactos", esquema)
+        desconocidos = set(self.plan.valores("tipo_contacto")) - set(self.PROVEEDORES)
+        if desconocidos:
+            raise ValueError(f"contactos.tipo_contacto: tipos sin proveedor {sorted(desconocidos)}. Opciones: {', '.join(self.PROVEEDORES)}")
+        if hasattr(clientes, "get_clientes"):
+            self.clientes_df = clientes.get_clientes()
+        else:
+            self.clientes_df = clientes
+        self.hoy = hoy or fechas.hoy()
         self.n_contactos_por_cliente = n_contactos_por_cliente
-        self.fake_locales = {
-            "España": Faker('es_ES'),
-            "France": Faker('fr_FR'),
-            "Germany": Faker('de_DE'),
-            "United States": Faker('en_US'),
-        }
-        self.default_fake = Faker(['es_ES', 'en_US', 'fr_FR', 'de_DE'])
+        self.fake_locales = {pais: pools_faker.faker(locale, semillas.semilla_faker(self.rng))
+                             for pais, locale in self.LOCALES_PAIS.items()}
+        self.default_fake = pools_faker.faker(pools_faker.LOCALES, semillas.semilla_faker(self.rng))
         logger.info("Generando contactos...")
-        self.contactos = self._generar_contactos()
+        with metricas.etapa("total", generador="contactos") as etapa:
+            parametros = {"clientes": cache.huella(self.clientes_df), "n_contactos_por_cliente": n_contactos_por_cliente, "seed": seed,
+                          "bloque": bloque, "hoy": self.hoy, "pools": cache.parametros_pools(pools), "esquema": esquemas.huella(esquema)}
+            self.contactos = cache.cacheado("contactos", parametros, self._generar_contactos)
+            etapa.filas = len(self.contactos)
         logger.info(f"Contactos generados: {len(self.contactos)}")
 
-    def get_faker_for_pais(self, pais: str) -> Faker:
+    def get_faker_for_pais(self, pais: str) -> "Faker":
         """
         Devuelve el generador Faker adecuado para el país.
         """
-        # Normaliza nombres de país
+        return self.fake_locales.get(self._clave_pais(pais), self.default_fake)
+
+    def _clave_pais(self, pais: str) -> str:
+        """
+        Normaliza el nombre del país a una clave de fake_locales ('' si no tiene locale propio).
+        """
         if pais.lower() in ["españa", "spain"]:
-            return self.fake_locales["España"]
-        elif pais.lower() in ["francia", "france"]:
-            return self.fake_locales["France"]
-        elif pais.lower() in ["alemania", "germany"]:
-            return self.fake_locales["Germany"]
-        elif pais.lower() in ["estados unidos", "united states", "usa"]:
-            return self.fake_locales["United States"]
+            return "España"
+        elif pais.lower() in ["francia", "france", "frankreich"]:
+            return "France"
+        elif pais.lower() in ["alemania", "germany", "allemagne", "deutschland"]:
+            return "Germany"
+        elif pais.lower() in ["estados unidos", "united states", "usa", "états-unis", "vereinigte staaten"]:
+            return "United States"
         else:
-            return self.default_fake
+            return ""
+
+    @classmethod
+    def estimar_filas(cls, n_clientes: int, n_contactos_por_cliente: Optional[int] = None, esquema: Optional[Dict] = None) -> float:
+        """
+        Número esperado de contactos para n_clientes (según la cardinalidad del esquema, o el número fijo).
+        """
+        if n_contactos_por_cliente is not None:
+            return n_clientes * n_contactos_por_cliente
+        return n_clientes * esquemas.plan("contactos", esquema).cardinalidad.media()
 
     def _generar_contactos(self) -> pd.DataFrame:
         """
         Genera el DataFrame de contactos.
         """
-        contactos_list = []
-        tipos = ["email", "telefono", "fax", "web"]
-        pesos = [0.45, 0.4, 0.08, 0.07]  # Más peso para email y teléfono
-        hoy = datetime.today()
-        for idx, row in self.clientes.get_clientes().iterrows():
-            cliente_id = row["cliente_id"]
-            fecha_alta_cliente = pd.to_datetime(row["fecha_cliente"])
-            pais = row.get("pais", "España")  # Ajusta si el campo tiene otro nombre
-            fake = self.get_faker_for_pais(pais)
-            if self.n_contactos_por_cliente is None:
-                n_contactos = random.randint(1, 4)
-            else:
-                n_contactos = self.n_contactos_por_cliente
-            for _ in range(n_contactos):
-                tipo = random.choices(tipos, weights=pesos, k=1)[0]
-                if tipo == "email":
-                    valor = fake.email()
-                elif tipo == "telefono":
-                    valor = fake.phone_number()
-                elif tipo == "fax":
-                    valor = fake.phone_number()
-                elif tipo == "web":
-                    valor = fake.url()
-                # Fecha alta contacto entre fecha alta cliente y hoy
-                fecha_alta_contacto = fake.date_between_dates(
-                    date_start=fecha_alta_cliente, date_end=hoy
-                )
-                # 80% de contactos activos (baja 9999-12-31), 20% baja real
-                if random.random() < 0.8:
-                    fecha_baja_contacto = "9999-12-31"
-                else:
-                    fecha_baja_contacto = fake.date_between_dates(
-                        date_start=fecha_alta_contacto, date_end=hoy
-                    ).strftime("%Y-%m-%d")
-                contactos_list.append({
-                    "cliente_id": cliente_id,
-                    "tipo_contacto": tipo,
-                    "valor_contacto": valor,
-                    "fecha_alta_contacto": fecha_alta_contacto.strftime("%Y-%m-%d"),
-                    "fecha_baja_contacto": fecha_baja_contacto
-                })
-        df = pd.DataFrame(contactos_list)
-        df = df.sample(frac=1).reset_index(drop=True)  # Desordenar
-        return df
+        if len(self.clientes_df) > paralelo.TAMANO_SHARD:
+            return self._generar_por_shards()
+
+        n_clientes = len(self.clientes_df)
+        if self.n_contactos_por_cliente is None:
+            n_contactos = self.plan.cardinalidad.muestrear(self.rng, n_clientes)
+        else:
+            n_contactos = np.full(n_clientes, self.n_contactos_por_cliente)
+        # Cada contacto hereda los atributos de su cliente
+        if "pais_nacionalidad" in self.clientes_df:
+            paises = self.clientes_df["pais_nacionalidad"]
+            claves_cliente = paises.map({pais: self._clave_pais(pais) for pais in paises.unique()}).to_numpy(dtype=object)
+        else:
+            claves_cliente = np.full(n_clientes, "España", dtype=object)
+        claves_pais = np.repeat(claves_cliente, n_contactos)
+        fechas_alta_cliente = np.repeat(self.clientes_df["fecha_cliente"].to_numpy(dtype="datetime64[D]"), n_contactos)
+        total = len(claves_pais)
+        contactos = TablaColumnar(total, self.COLUMNAS)
+        contactos["cliente_id"] = np.repeat(self.clientes_df["cliente_id"].to_numpy(), n_contactos)
+        contactos["tipo_contacto"] = self.plan.muestrear("tipo_contacto", self.rng, total)
+        with metricas.etapa("valores") as etapa:
+            self._generar_valores(contactos, claves_pais)
+            etapa.filas = total
+        with metricas.etapa("fechas") as etapa:
+            # Fecha alta contacto entre fecha alta cliente y hoy
+            alta = fechas.fechas_entre(self.rng, fechas_alta_cliente, self.hoy)
+            # Contactos activos (baja 9999-12-31; 80% por defecto) y el resto con baja real
+            activo = self.rng.random(total) < self.plan.proporciones["activos"]
+            baja = np.where(activo, fechas.CENTINELA, fechas.fechas_entre(self.rng, alta, self.hoy))
+            contactos["fecha_alta_contacto"] = fechas.formatear(alta)
+            contactos["fecha_baja_contacto"] = fechas.formatear(baja)
+            etapa.filas = total
+        with metricas.etapa("desordenar") as etapa:
+            etapa.filas = total
+            return contactos.construir(self.rng)  # Desordenar
+
+    def _generar_valores(self, contactos: TablaColumnar, claves_pais: np.ndarray):
+        """
+        Rellena en bloque los valores de contacto de cada combinación de país y tipo.
+        """
+        tipos = contactos["tipo_contacto"]
+        for clave in [*self.fake_locales, ""]:
+            fake = self.fake_locales.get(clave, self.default_fake)
+            locales = self.LOCALES_PAIS.get(clave, pools_faker.LOCALES)
+            for tipo, proveedor in self.PROVEEDORES.items():
+                mascara = (claves_pais == clave) & (tipos == tipo)
+                k = int(mascara.sum())
+                if k:
+                    contactos.rellenar("valor_contacto", mascara, pools_faker.valores(self.pools, self.rng, fake, locales, proveedor, k))
+
+    def _generar_por_shards(self) -> pd.DataFrame:
+        """
+        Genera los contactos por shards de clientes, en paralelo si workers > 1.
+        El shard i usa el bloque bloque + i.
+        """
+        tamano = paralelo.TAMANO_SHARD
+        shards = [self.clientes_df.iloc[i:i + tamano] for i in range(0, len(self.clientes_df), tamano)]
+        tareas = [(shard, self.n_contactos_por_cliente, self.seed, self.bloque + i, self.hoy, self.pools, self.esquema)
+                  for i, shard in enumerate(shards)]
+        return pd.concat(paralelo.ejecutar(_generar_shard, tareas, self.workers), ignore_index=True)
 
     def get_contactos(self) -> pd.DataFrame:
         """
@@ -105,3 +180,11 @@ class ContactosFaker:
         """
         logger.info("Obteniendo DataFrame de contactos")
         return self.contactos
+
+def _generar_shard(clientes_df: pd.DataFrame, n_contactos_por_cliente: Optional[int], seed: Optional[int], bloque: int,
+                   hoy: datetime, pools: Optional[pools_faker.PoolsFaker], esquema: Optional[Dict]) -> pd.DataFrame:
+    """
+    Genera los contactos de un shard de clientes (función de nivel de módulo para poder enviarla a otro proceso).
+    """
+    return ContactosFaker(clientes_df, n_contactos_por_cliente=n_contactos_por_cliente, seed=seed, hoy=hoy,
+                          bloque=bloque, pools=pools, esquema=esquema).get_contactos()
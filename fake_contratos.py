@@ -1,111 +1,172 @@
 import pandas as pd
 import numpy as np
-import random
-from faker import Faker
 from datetime import datetime
-from typing import Optional
+import math
+from typing import Dict, Optional, Union
 import logging
 
-logging.basicConfig(level=logging.INFO)
+import cache
+import esquemas
+import fechas
+import metricas
+import ids
+import paralelo
+import semillas
+from columnar import TablaColumnar
+from fake_clientes import ClientesFaker
+
 logger = logging.getLogger(__name__)
 
 class ContratosFaker:
     """
     Generador de contratos falsos asociados a clientes.
     """
-    def __init__(self, clientes, seed: Optional[int] = None):
+    # Catálogos del escenario por defecto; las distribuciones están en esquemas.ESQUEMA["contratos"]
+    EMPRESAS = esquemas.valores("contratos", "empresa")
+    PRODUCTOS = esquemas.valores("contratos", "codigo_producto")
+    # Catálogo fijo de productos con subproducto, igual en todos los bloques y shards
+    PRODUCTOS_CON_SUB = sorted(np.random.default_rng(0).choice(PRODUCTOS, 10, replace=False).tolist())
+    CENTROS = esquemas.valores("contratos", "centro")
+    # SB00: producto sin subproducto
+    SUBPRODUCTOS = esquemas.valores("contratos", "codigo_subproducto")
+    TIPOS_INTERVENTOR = esquemas.valores("contratos", "rel_contra")
+    SITUACIONES = esquemas.valores("contratos", "situacion_actividad")
+    # Tope de contratos por cliente de cualquier esquema: fija el rango de identificadores de cada shard
+    MAX_CONTRATOS_CLIENTE = 15
+    COLUMNAS = [
+        "cliente_id", "empresa", "centro", "codigo_producto", "codigo_subproducto",
+        "identificador", "rel_contra", "fecha_alta_contrato",
+        "fecha_baja_contrato", "situacion_actividad"
+    ]
+    # Cada shard de clientes reserva este rango de posiciones en el espacio de identificadores
+    CONTRATOS_POR_SHARD = paralelo.TAMANO_SHARD * MAX_CONTRATOS_CLIENTE
+
+    def __init__(self, clientes: Union['ClientesFaker', pd.DataFrame], seed: Optional[int] = None, hoy: Optional[datetime] = None, workers: int = 1,
+                 bloque: int = 0, digitos_identificador: Optional[int] = None, inicio_identificador: Optional[int] = None,
+                 esquema: Optional[Dict] = None):
         """
-        clientes: instancia de ClientesFaker.
+        clientes: instancia de ClientesFaker o DataFrame con columna 'cliente_id'.
         seed: semilla para reproducibilidad (opcional).
+        hoy: fecha de referencia (opcional, por defecto hoy a las 00:00).
+        workers: número de procesos para generar los shards de contratos.
+        bloque: índice del bloque de clientes, que junto con seed fija el generador aleatorio.
+        digitos_identificador: dígitos del identificador de contrato (opcional, 7 o los necesarios
+            para que los identificadores de todos los bloques hasta este sean únicos).
+        inicio_identificador: posición del espacio de identificadores desde la que emitir (opcional, por
+            defecto el rango reservado al bloque, bloque * CONTRATOS_POR_SHARD).
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
         """
-        if seed is not None:
-            random.seed(seed)
-            Faker.seed(seed)
-            np.random.seed(seed)
-        self.fake = Faker(['es_ES', 'en_US', 'fr_FR', 'de_DE'])
-        self.clientes = clientes
-        self.hoy = datetime.today()
+        self.seed = seed
+        self.esquema = esquema
+        self.plan = self.plan_contratos(esquema)
+        self.bloque = bloque
+        self.rng = semillas.generador(seed, "contratos", bloque)
+        self.workers = workers
+        if hasattr(clientes, "get_clientes"):
+            self.clientes_df = clientes.get_clientes()
+        else:
+            self.clientes_df = clientes
+        n_shards = math.ceil(len(self.clientes_df) / paralelo.TAMANO_SHARD)
+        self.digitos_identificador = digitos_identificador or digitos_necesarios(self.bloque + n_shards)
+        self.inicio_identificador = inicio_identificador if inicio_identificador is not None else bloque * self.CONTRATOS_POR_SHARD
+        self.hoy = hoy or fechas.hoy()
         logger.info("Generando contratos...")
-        self.contratos = self._generar_contratos()
+        with metricas.etapa("total", generador="contratos") as etapa:
+            parametros = {"clientes": cache.huella(self.clientes_df[["cliente_id"]]), "seed": seed, "bloque": bloque,
+                          "hoy": self.hoy, "digitos": self.digitos_identificador, "inicio": self.inicio_identificador,
+                          "esquema": esquemas.huella(esquema)}
+            self.contratos = cache.cacheado("contratos", parametros, self._generar_contratos)
+            etapa.filas = len(self.contratos)
         logger.info(f"Contratos generados: {len(self.contratos)}")
 
-    def _generar_contratos(self) -> pd.DataFrame:
+    @classmethod
+    def plan_contratos(cls, esquema: Optional[Dict] = None) -> esquemas.PlanMuestreo:
         """
-        Genera el DataFrame de contratos.
+        Plan de muestreo de los contratos, comprobando que el número de contratos por cliente
+        no supera MAX_CONTRATOS_CLIENTE (los identificadores de un shard saldrían de su rango).
         """
-        empresas = [f"EMP{str(i+1).zfill(2)}" for i in range(5)]
-        centros_por_empresa = {e: [f"CEN{str(j+1).zfill(2)}" for j in range(7)] for e in empresas}
-        productos = [f"PRD{str(i+1).zfill(2)}" for i in range(25)]
+        plan = esquemas.plan("contratos", esquema)
+        if plan.cardinalidad.maximo() > cls.MAX_CONTRATOS_CLIENTE:
+            raise ValueError(f"contratos.cardinalidad: como máximo {cls.MAX_CONTRATOS_CLIENTE} contratos por cliente")
+        return plan
 
-        productos_con_sub = np.random.choice(productos, 10, replace=False)
-        subproductos = [f"SB{str(i+1).zfill(2)}" for i in range(5)]
+    @classmethod
+    def estimar_filas(cls, n_clientes: int, esquema: Optional[Dict] = None) -> float:
+        """
+        Número esperado de contratos para n_clientes según la distribución de contratos por cliente.
+        """
+        return n_clientes * cls.plan_contratos(esquema).cardinalidad.media()
 
-        tipos_interventor = [
-            "Titular",
-            "Cotitular",
-            "Autorizado",
-            "Representante",
-            "Apoderado",
-            "Tutor",
-            "Interventor judicial",
-            "Administrador",
-            "Heredero"
-        ]
-        pesos_interventor = [0.6, 0.15, 0.1, 0.05, 0.03, 0.02, 0.02, 0.02, 0.01]
+    def _generar_contratos(self) -> pd.DataFrame:
+        """
+        Genera el DataFrame de contratos.
+        """
+        if len(self.clientes_df) > paralelo.TAMANO_SHARD:
+            return self._generar_por_shards()
 
-        situaciones = ["Activa", "Cancelada", "Vencida", "Rescindida"]
-        pesos = [0.7, 0.15, 0.1, 0.05]
+        plan = self.plan
+        # Número de contratos por cliente (aleatorio y decreciente); con él se conoce el total de filas
+        n_contratos = plan.cardinalidad.muestrear(self.rng, len(self.clientes_df))
+        total = int(n_contratos.sum())
+        contratos = TablaColumnar(total, self.COLUMNAS)
+        with metricas.etapa("atributos") as etapa:
+            contratos["cliente_id"] = np.repeat(self.clientes_df["cliente_id"].to_numpy(dtype=object), n_contratos)
+            contratos["empresa"] = plan.muestrear("empresa", self.rng, total)
+            contratos["centro"] = plan.muestrear("centro", self.rng, total)
+            contratos["codigo_producto"] = plan.muestrear("codigo_producto", self.rng, total)
+            # Solo los productos del catálogo con subproducto tienen uno distinto de SB00
+            con_sub = np.isin(contratos["codigo_producto"], self.PRODUCTOS_CON_SUB)
+            contratos["codigo_subproducto"] = "SB00"
+            contratos.rellenar("codigo_subproducto", con_sub, plan.muestrear("codigo_subproducto", self.rng, int(con_sub.sum())))
+            contratos["rel_contra"] = plan.muestrear("rel_contra", self.rng, total)
+            contratos["situacion_actividad"] = plan.muestrear("situacion_actividad", self.rng, total)
+            etapa.filas = total
+        # Identificadores únicos: cada bloque emite desde su propio rango del espacio permutado
+        with metricas.etapa("ids") as etapa:
+            asignador = ids.AsignadorIds(self.seed, "identificador", self.digitos_identificador,
+                                         inicio=self.inicio_identificador)
+            contratos["identificador"] = asignador.asignar_texto(total)
+            etapa.filas = total
+        # Fechas de alta en los últimos años (10 por defecto) y de baja posteriores, salvo activos (9999-12-31)
+        with metricas.etapa("fechas") as etapa:
+            alta = fechas.fechas_entre(self.rng, fechas.hace_anios(self.hoy, plan.fechas["anios"]), self.hoy, size=total)
+            activo = contratos["situacion_actividad"] == "Activa"
+            baja = np.where(activo, fechas.CENTINELA, fechas.fechas_entre(self.rng, alta, self.hoy))
+            contratos["fecha_alta_contrato"] = fechas.formatear(alta)
+            contratos["fecha_baja_contrato"] = fechas.formatear(baja)
+            etapa.filas = total
+        with metricas.etapa("desordenar") as etapa:
+            etapa.filas = total
+            return contratos.construir(self.rng)  # Desordenar
 
-        contratos_list = []
-        cliente_ids = self.clientes.clientes["cliente_id"]
-        # El número de contratos por cliente es aleatorio y decreciente
-        posibles = list(range(3, 16))
-        pesos_contratos = [0.25, 0.20, 0.15, 0.10, 0.08, 0.06, 0.05, 0.04, 0.03, 0.02, 0.01, 0.01, 0.01]
-        pesos_contratos = [p / sum(pesos_contratos) for p in pesos_contratos]
-        for cliente_id in cliente_ids:
-            # Selección aleatoria ponderada del número de contratos por cliente
-            n = random.choices(posibles, weights=pesos_contratos, k=1)[0]
-            for _ in range(n):
-                empresa = random.choice(empresas)
-                centro = random.choice(centros_por_empresa[empresa])
-                codigo_producto = random.choice(productos)
-                if codigo_producto in productos_con_sub:
-                    codigo_subproducto = random.choice(subproductos)
-                else:
-                    codigo_subproducto = "SB00"
-                identificador = str(random.randint(0, 10**7-1)).zfill(7)
-                rel_contra = random.choices(tipos_interventor, weights=pesos_interventor, k=1)[0]
-                fecha_alta_contrato = self.fake.date_between(start_date='-10y', end_date='today')
-                situacion_actividad = random.choices(situaciones, weights=pesos, k=1)[0]
-                if situacion_actividad == "Activa":
-                    fecha_baja_contrato = "9999-12-31"
-                else:
-                    fecha_baja_contrato = str(self.fake.date_between(start_date=fecha_alta_contrato, end_date=self.hoy))
-                contratos_list.append({
-                    "cliente_id": cliente_id,
-                    "empresa": empresa,
-                    "centro": centro,
-                    "codigo_producto": codigo_producto,
-                    "codigo_subproducto": codigo_subproducto,
-                    "identificador": identificador,
-                    "rel_contra": rel_contra,
-                    "fecha_alta_contrato": fecha_alta_contrato,
-                    "fecha_baja_contrato": fecha_baja_contrato,
-                    "situacion_actividad": situacion_actividad
-                })
-        contratos = pd.DataFrame(contratos_list)
-        column_order = [
-            "cliente_id", "empresa", "centro", "codigo_producto", "codigo_subproducto",
-            "identificador", "rel_contra", "fecha_alta_contrato",
-            "fecha_baja_contrato", "situacion_actividad"
-        ]
-        contratos = contratos[column_order]
-        contratos = contratos.sample(frac=1).reset_index(drop=True)  # Desordenar
-        return contratos
+    def _generar_por_shards(self) -> pd.DataFrame:
+        """
+        Genera los contratos por shards de clientes, en paralelo si workers > 1.
+        El shard i usa el bloque bloque + i.
+        """
+        tamano = paralelo.TAMANO_SHARD
+        shards = [self.clientes_df.iloc[i:i + tamano] for i in range(0, len(self.clientes_df), tamano)]
+        tareas = [(shard, self.seed, self.bloque + i, self.hoy, self.digitos_identificador,
+                   self.inicio_identificador + i * self.CONTRATOS_POR_SHARD, self.esquema) for i, shard in enumerate(shards)]
+        return pd.concat(paralelo.ejecutar(_generar_shard, tareas, self.workers), ignore_index=True)
 
     def get_contratos(self) -> pd.DataFrame:
         """
         Devuelve el DataFrame de contratos.
         """
         logger.info("Obteniendo DataFrame de contratos")
-        return self.contratos
\ No newline at end of file
+        return self.contratos
+
+def digitos_necesarios(n_shards: int) -> int:
+    """
+    Dígitos del identificador de contrato para que n_shards shards de clientes tengan rangos disjuntos (mínimo 7).
+    """
+    return max(7, math.ceil(math.log10(max(1, n_shards) * ContratosFaker.CONTRATOS_POR_SHARD)))
+
+def _generar_shard(clientes_df: pd.DataFrame, seed: Optional[int], bloque: int, hoy: datetime,
+                   digitos_identificador: int, inicio_identificador: int, esquema: Optional[Dict]) -> pd.DataFrame:
+    """
+    Genera los contratos de un shard de clientes (función de nivel de módulo para poder enviarla a otro proceso).
+    """
+    return ContratosFaker(clientes_df, seed=seed, hoy=hoy, bloque=bloque, digitos_identificador=digitos_identificador,
+                          inicio_identificador=inicio_identificador, esquema=esquema).get_contratos()
@@ -1,74 +1,104 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-from typing import Optional, Union
+from datetime import datetime
+from typing import Dict, Optional, Union
 import logging
 
+import cache
+import esquemas
+import fechas
+import metricas
+import pools_faker
+import semillas
+from columnar import TablaColumnar
 from fake_clientes import ClientesFaker
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class CuentasBloqueadasFaker:
     """
     Generador de cuentas bloqueadas por fraude.
     """
-    TIPOS_FRAUDE = [
-        'Phishing',
-        'Robo de identidad',
-        'Transacciones sospechosas',
-        'Fraude con tarjeta',
-        'Lavado de dinero',
-        'Acceso no autorizado'
-    ]
+    # Catálogos del escenario por defecto; proporción y antigüedad están en esquemas.ESQUEMA["cuentas_bloqueadas"]
+    TIPOS_FRAUDE = esquemas.valores("cuentas_bloqueadas", "tipo_fraude")
+    ESTADOS_FRAUDE = esquemas.valores("cuentas_bloqueadas", "estado_fraude")
+    COLUMNAS = ['cliente_id', 'tipo_fraude', 'estado_fraude', 'fecha_inclusion', 'fecha_bloqueo', 'motivo']
 
-    def __init__(self, clientes: Union[pd.DataFrame, 'ClientesFaker'], seed: Optional[int] = None):
+    def __init__(self, clientes: Union[pd.DataFrame, 'ClientesFaker'], seed: Optional[int] = None, hoy: Optional[datetime] = None,
+                 bloque: int = 0, proporcion: Optional[float] = None, desde: Optional[datetime] = None,
+                 esquema: Optional[Dict] = None):
         """
         clientes: DataFrame con columna 'cliente_id' o instancia de ClientesFaker.
         seed: semilla para reproducibilidad (opcional).
+        hoy: fecha y hora de referencia (opcional, por defecto hoy a las 00:00).
+        bloque: índice del bloque de clientes, que junto con seed fija el generador aleatorio.
+        proporcion: proporción de clientes bloqueados (opcional, por defecto la del esquema).
+        desde: inicio del periodo de inclusión (opcional, por defecto la antigüedad máxima del esquema).
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
         """
         logger.info("Generando cuentas bloqueadas por fraude...")
         self.seed = seed
-        if seed is not None:
-            np.random.seed(seed)
-            Faker.seed(seed)
-        self.fake = Faker('es_ES')
+        self.bloque = bloque
+        self.rng = semillas.generador(seed, "cuentas_bloqueadas", bloque)
+        self.esquema = esquema
+        self.plan = esquemas.plan("cuentas_bloqueadas", esquema)
+        self.fake = pools_faker.faker('es_ES', semillas.semilla_faker(self.rng))
+        self.hoy = hoy or fechas.hoy()
+        self.proporcion = self.plan.proporciones["bloqueadas"] if proporcion is None else proporcion
+        self.desde = desde
         if hasattr(clientes, "get_clientes"):
             self.clientes_df = clientes.get_clientes()
         else:
             self.clientes_df = clientes
-        self.cuentas_bloqueadas = self._generar_cuentas_bloqueadas()
+        with metricas.etapa("total", generador="cuentas_bloqueadas") as etapa:
+            parametros = {"clientes": cache.huella(self.clientes_df), "seed": seed, "bloque": bloque, "hoy": self.hoy,
+                          "proporcion": self.proporcion, "desde": desde, "esquema": esquemas.huella(esquema)}
+            self.cuentas_bloqueadas = cache.cacheado("cuentas_bloqueadas", parametros, self._generar_cuentas_bloqueadas)
+            etapa.filas = len(self.cuentas_bloqueadas)
         logger.info(f"Cuentas bloqueadas generadas: {len(self.cuentas_bloqueadas)}")
 
+    @classmethod
+    def estimar_filas(cls, n_clientes: int, proporcion: Optional[float] = None, esquema: Optional[Dict] = None) -> int:
+        """
+        Número de cuentas bloqueadas para n_clientes.
+        """
+        proporcion = esquemas.plan("cuentas_bloqueadas", esquema).proporciones["bloqueadas"] if proporcion is None else proporcion
+        return max(1, int(np.floor(n_clientes * proporcion)))
+
     def _generar_cuentas_bloqueadas(self) -> pd.DataFrame:
         """
         Genera el DataFrame de cuentas bloqueadas.
         """
         cliente_ids = self.clientes_df['cliente_id'].tolist()
         n_clientes = len(cliente_ids)
-        n_bloqueadas = max(1, int(np.floor(n_clientes * 0.01)))
-        bloqueados = np.random.choice(cliente_ids, n_bloqueadas, replace=False)
-        cuentas = []
-        for cid in bloqueados:
-            tipo_fraude = np.random.choice(self.TIPOS_FRAUDE)
-            estado_fraude = np.random.choice(['Investigación', 'Bloqueado'])
-            fecha_inclusion = self.fake.date_time_between(start_date='-3y', end_date='now')
-            if estado_fraude == 'Bloqueado':
-                fecha_bloqueo = self.fake.date_time_between(
-                    start_date=fecha_inclusion, end_date='now'
-                ).strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                fecha_bloqueo = None
-            motivo = self.fake.sentence(nb_words=8)
-            cuentas.append({
-                'cliente_id': cid,
-                'tipo_fraude': tipo_fraude,
-                'estado_fraude': estado_fraude,
-                'fecha_inclusion': fecha_inclusion.strftime('%Y-%m-%d %H:%M:%S'),
-                'fecha_bloqueo': fecha_bloqueo,
-                'motivo': motivo
-            })
-        return pd.DataFrame(cuentas)
+        n_bloqueadas = self.estimar_filas(n_clientes, self.proporcion)
+        bloqueados = self.rng.choice(cliente_ids, n_bloqueadas, replace=False)
+        tipo_fraude = self.plan.muestrear('tipo_fraude', self.rng, n_bloqueadas)
+        estado_fraude = self.plan.muestrear('estado_fraude', self.rng, n_bloqueadas)
+        # Inclusión en los últimos años del esquema (o desde `desde`); bloqueo posterior solo si el estado es 'Bloqueado'
+        if self.desde is not None:
+            desde = fechas.a_datetime64(self.desde, 's')
+        else:
+            desde = fechas.hace_anios(self.hoy, self.plan.fechas["anios"], 's')
+        inclusion = fechas.fechas_entre(self.rng, desde, self.hoy, size=n_bloqueadas, unidad='s')
+        bloqueo = np.where(
+            estado_fraude == 'Bloqueado',
+            fechas.fechas_entre(self.rng, inclusion, self.hoy, unidad='s'),
+            np.datetime64('NaT', 's')
+        )
+        with metricas.etapa("motivos") as etapa:
+            motivo = [self.fake.sentence(nb_words=8) for _ in range(n_bloqueadas)]
+            metricas.contar_faker(n_bloqueadas)
+            etapa.filas = n_bloqueadas
+        # Los clientes bloqueados ya salen en orden aleatorio: no hace falta desordenar
+        cuentas = TablaColumnar(n_bloqueadas, self.COLUMNAS)
+        cuentas['cliente_id'] = bloqueados
+        cuentas['tipo_fraude'] = tipo_fraude
+        cuentas['estado_fraude'] = estado_fraude
+        cuentas['fecha_inclusion'] = fechas.formatear(inclusion, 's')
+        cuentas['fecha_bloqueo'] = fechas.formatear(bloqueo, 's')
+        cuentas['motivo'] = motivo
+        return cuentas.construir()
 
     def get_cuentas_bloqueadas(self) -> pd.DataFrame:
         """
@@ -1,89 +1,144 @@
 import pandas as pd
-import random
-from faker import Faker
-from typing import Optional
+import numpy as np
+from typing import Dict, Optional, Union
 import logging
 
-logging.basicConfig(level=logging.INFO)
+import cache
+import esquemas
+import geografia
+import metricas
+import paralelo
+import pools_faker
+import semillas
+from columnar import TablaColumnar
+from fake_clientes import ClientesFaker
+
 logger = logging.getLogger(__name__)
 
 class DireccionesFaker:
     """
     Generador de direcciones falsas asociadas a clientes.
     """
-    def __init__(self, clientes, seed: Optional[int] = None):
+    LOCALES_PAIS = {
+        "España": 'es_ES',
+        "France": 'fr_FR',
+        "Germany": 'de_DE',
+        "United States": 'en_US',
+    }
+    NOMBRES_PAIS = {
+        "España": "España",
+        "France": "Francia",
+        "Germany": "Alemania",
+        "United States": "Estados Unidos"
+    }
+    COLUMNAS = ["cliente_id", "numero_domicilio", "direccion", "ciudad", "provincia", "codigo_postal", "pais"]
+
+    def __init__(self, clientes: Union['ClientesFaker', pd.DataFrame], seed: Optional[int] = None, workers: int = 1, bloque: int = 0,
+                 pools: Optional[pools_faker.PoolsFaker] = None, esquema: Optional[Dict] = None):
         """
-        clientes: instancia de ClientesFaker.
+        clientes: instancia de ClientesFaker o DataFrame con columna 'cliente_id'.
         seed: semilla para reproducibilidad (opcional).
+        workers: número de procesos para generar los shards de direcciones.
+        bloque: índice del bloque de clientes, que junto con seed fija el generador aleatorio.
+        pools: pools de valores de Faker de los que muestrear las direcciones (opcional).
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
         """
-        if seed is not None:
-            random.seed(seed)
-            Faker.seed(seed)
-        self.clientes = clientes
-        self.fake_locales = {
-            "España": Faker('es_ES'),
-            "France": Faker('fr_FR'),
-            "Germany": Faker('de_DE'),
-            "United States": Faker('en_US'),
-        }
-        self.default_fake = Faker(['es_ES', 'en_US', 'fr_FR', 'de_DE'])
-        self.ciudades_provincias_es = self._cargar_ciudades_provincias_es()
+        self.seed = seed
+        self.bloque = bloque
+        self.rng = semillas.generador(seed, "direcciones", bloque)
+        self.workers = workers
+        self.pools = pools
+        self.esquema = esquema
+        self.plan = esquemas.plan("direcciones", esquema)
+        desconocidos = set(self.plan.valores("pais_extranjero")) - set(self.LOCALES_PAIS)
+        if desconocidos:
+            raise ValueError(f"direcciones.pais_extranjero: países sin locale {sorted(desconocidos)}. Opciones: {', '.join(self.LOCALES_PAIS)}")
+        if hasattr(clientes, "get_clientes"):
+            self.clientes_df = clientes.get_clientes()
+        else:
+            self.clientes_df = clientes
+        self.fake_locales = {pais: pools_faker.faker(locale, semillas.semilla_faker(self.rng))
+                             for pais, locale in self.LOCALES_PAIS.items()}
+        self.default_fake = pools_faker.faker(pools_faker.LOCALES, semillas.semilla_faker(self.rng))
         logger.info("Generando direcciones...")
-        self.direcciones = self._generar_direcciones()
+        with metricas.etapa("total", generador="direcciones") as etapa:
+            parametros = {"clientes": cache.huella(self.clientes_df), "seed": seed, "bloque": bloque, "pools": cache.parametros_pools(pools),
+                          "esquema": esquemas.huella(esquema)}
+            self.direcciones = cache.cacheado("direcciones", parametros, self._generar_direcciones)
+            etapa.filas = len(self.direcciones)
         logger.info(f"Direcciones generadas: {len(self.direcciones)}")
 
-    def _cargar_ciudades_provincias_es(self):
+    @classmethod
+    def estimar_filas(cls, n_clientes: int, esquema: Optional[Dict] = None) -> float:
         """
-        Carga el mapeo de ciudades y provincias españolas desde CSV.
+        Número esperado de direcciones para n_clientes.
         """
-        df = pd.read_csv('./data/in/ciudades_provincias_es.csv')
-        # Espera columnas: ciudad,provincia
-        return list(df.itertuples(index=False, name=None))
+        return n_clientes * esquemas.plan("direcciones", esquema).cardinalidad.media()
 
     def _generar_direcciones(self) -> pd.DataFrame:
         """
         Genera el DataFrame de direcciones.
         """
-        direcciones_list = []
-        # Pesos: mayoría 1 o 2 domicilios
-        pesos_domicilios = [0.6, 0.3, 0.07, 0.02, 0.01]
-        for idx, row in self.clientes.get_clientes().iterrows():
-            cliente_id = row["cliente_id"]
-            n_domicilios = random.choices([1,2,3,4,5], weights=pesos_domicilios, k=1)[0]
-            for num_dom in range(1, n_domicilios + 1):
-                # 75% domicilios españoles, 25% otros países
-                if random.random() < 0.75:
-                    fake = self.fake_locales["España"]
-                    direccion = fake.street_address()
-                    ciudad, provincia = random.choice(self.ciudades_provincias_es)
-                    codigo_postal = fake.postcode()
-                    pais = "España"
+        if len(self.clientes_df) > paralelo.TAMANO_SHARD:
+            return self._generar_por_shards()
+
+        # Número de domicilios por cliente: mayoría 1 o 2
+        n_domicilios = self.plan.cardinalidad.muestrear(self.rng, len(self.clientes_df))
+        total = int(n_domicilios.sum())
+        direcciones = TablaColumnar(total, self.COLUMNAS, tipos={"numero_domicilio": np.int64})
+        direcciones["cliente_id"] = np.repeat(self.clientes_df["cliente_id"].to_numpy(), n_domicilios)
+        # Número de domicilio 1..n dentro de cada cliente
+        inicio = np.repeat(np.cumsum(n_domicilios) - n_domicilios, n_domicilios)
+        direcciones["numero_domicilio"] = np.arange(total) - inicio + 1
+        # Domicilios españoles (75% por defecto) y del resto de países
+        espanol = self.rng.random(total) < self.plan.proporciones["espanolas"]
+        n_espanol = int(espanol.sum())
+        pais = np.empty(total, dtype=object)
+        pais[espanol] = "España"
+        pais[~espanol] = self.plan.muestrear("pais_extranjero", self.rng, total - n_espanol)
+        with metricas.etapa("valores") as etapa:
+            self._rellenar_por_pais(direcciones, pais)
+            etapa.filas = total
+        direcciones["pais"] = pd.Series(pais).map(self.NOMBRES_PAIS).to_numpy(dtype=object)
+        with metricas.etapa("desordenar") as etapa:
+            etapa.filas = total
+            return direcciones.construir(self.rng)  # Desordenar
+
+    def _rellenar_por_pais(self, direcciones: TablaColumnar, paises: np.ndarray):
+        """
+        Rellena en bloque la dirección de cada país con su Faker. Ciudad, provincia y código postal
+        salen del índice geográfico del país (coherentes entre sí) y, si no lo tiene o no incluye
+        ciudades, de Faker.
+        """
+        for pais, fake in self.fake_locales.items():
+            mascara = paises == pais
+            k = int(mascara.sum())
+            if not k:
+                continue
+            proveedores = {"direccion": "street_address"}
+            indice = geografia.indice(pais)
+            if indice is None:
+                proveedores.update({"ciudad": "city", "provincia": "state", "codigo_postal": "postcode"})
+            else:
+                ciudad, provincia, codigo_postal = indice.muestrear(self.rng, k)
+                direcciones.rellenar("provincia", mascara, provincia)
+                direcciones.rellenar("codigo_postal", mascara, codigo_postal)
+                if ciudad is None:
+                    proveedores["ciudad"] = "city"
                 else:
-                    pais_opciones = ["France", "Germany", "United States"]
-                    pais_elegido = random.choice(pais_opciones)
-                    fake = self.fake_locales.get(pais_elegido, self.default_fake)
-                    direccion = fake.street_address()
-                    # Para otros países, usamos city y state coherentes
-                    ciudad = fake.city()
-                    provincia = fake.state() if hasattr(fake, "state") else ""
-                    codigo_postal = fake.postcode()
-                    pais = {
-                        "France": "Francia",
-                        "Germany": "Alemania",
-                        "United States": "Estados Unidos"
-                    }.get(pais_elegido, pais_elegido)
-                direcciones_list.append({
-                    "cliente_id": cliente_id,
-                    "numero_domicilio": num_dom,
-                    "direccion": direccion,
-                    "ciudad": ciudad,
-                    "provincia": provincia,
-                    "codigo_postal": codigo_postal,
-                    "pais": pais
-                })
-        df = pd.DataFrame(direcciones_list)
-        df = df.sample(frac=1).reset_index(drop=True)  # Desordenar
-        return df
+                    direcciones.rellenar("ciudad", mascara, ciudad)
+            for columna, proveedor in proveedores.items():
+                direcciones.rellenar(columna, mascara, pools_faker.valores(self.pools, self.rng, fake, self.LOCALES_PAIS[pais], proveedor, k))
+
+    def _generar_por_shards(self) -> pd.DataFrame:
+        """
+        Genera las direcciones por shards de clientes, en paralelo si workers > 1.
+        El shard i usa el bloque bloque + i.
+        """
+        tamano = paralelo.TAMANO_SHARD
+        shards = [self.clientes_df.iloc[i:i + tamano] for i in range(0, len(self.clientes_df), tamano)]
+        tareas = [(shard, self.seed, self.bloque + i, self.pools, self.esquema) for i, shard in enumerate(shards)]
+        return pd.concat(paralelo.ejecutar(_generar_shard, tareas, self.workers), ignore_index=True)
 
     def get_direcciones(self) -> pd.DataFrame:
         """
@@ -91,3 +146,10 @@ class DireccionesFaker:
         """
         logger.info("Obteniendo DataFrame de direcciones")
         return self.direcciones
+
+def _generar_shard(clientes_df: pd.DataFrame, seed: Optional[int], bloque: int,
+                   pools: Optional[pools_faker.PoolsFaker], esquema: Optional[Dict]) -> pd.DataFrame:
+    """
+    Genera las direcciones de un shard de clientes (función de nivel de módulo para poder enviarla a otro proceso).
+    """
+    return DireccionesFaker(clientes_df, seed=seed, bloque=bloque, pools=pools, esquema=esquema).get_direcciones()
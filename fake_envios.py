@@ -1,68 +1,95 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
 from datetime import datetime
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 import logging
 
+import cache
+import esquemas
+import fechas
+import metricas
+import semillas
+from columnar import TablaColumnar
 from fake_clientes import ClientesFaker
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnviosFaker:
     """
     Generador de envíos falsos entre clientes.
     """
-    def __init__(self, clientes: Union['ClientesFaker', pd.DataFrame], seed: Optional[int] = None):
+    # Catálogo del escenario por defecto; envíos por cliente, importes y antigüedad están en esquemas.ESQUEMA["envios"]
+    MOTIVOS_ENVIO = esquemas.valores("envios", "motivo_envio")
+    COLUMNAS = ['cliente_origen_id', 'cliente_destino_id', 'valor_envio', 'fecha_hora_envio', 'motivo_envio']
+
+    def __init__(self, clientes: Union['ClientesFaker', pd.DataFrame], seed: Optional[int] = None, hoy: Optional[datetime] = None,
+                 bloque: int = 0, esquema: Optional[Dict] = None):
         """
         clientes: instancia de ClientesFaker o DataFrame con columna 'cliente_id'.
         seed: semilla para reproducibilidad (opcional).
+        hoy: fecha y hora de referencia (opcional, por defecto hoy a las 00:00).
+        bloque: índice del bloque de clientes, que junto con seed fija el generador aleatorio.
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
         """
         logger.info("Generando envíos...")
         self.seed = seed
-        if seed is not None:
-            np.random.seed(seed)
-            Faker.seed(seed)
-        self.fake = Faker('es_ES')
+        self.esquema = esquema
+        self.plan = esquemas.plan("envios", esquema)
+        self.bloque = bloque
+        self.rng = semillas.generador(seed, "envios", bloque)
+        self.hoy = hoy or fechas.hoy()
         # Permitir tanto instancia como DataFrame
         if hasattr(clientes, "get_clientes"):
             self.clientes_df = clientes.get_clientes()
         else:
             self.clientes_df = clientes
-        self.envios = self._generar_envios()
+        with metricas.etapa("total", generador="envios") as etapa:
+            parametros = {"clientes": cache.huella(self.clientes_df), "seed": seed, "bloque": bloque, "hoy": self.hoy,
+                          "esquema": esquemas.huella(esquema)}
+            self.envios = cache.cacheado("envios", parametros, self._generar_envios)
+            etapa.filas = len(self.envios)
         logger.info(f"Envíos generados: {len(self.envios)}")
 
+    @classmethod
+    def estimar_filas(cls, n_clientes: int, esquema: Optional[Dict] = None) -> float:
+        """
+        Número esperado de envíos para n_clientes.
+        """
+        return n_clientes * esquemas.plan("envios", esquema).cardinalidad.media()
+
     def _generar_envios(self) -> pd.DataFrame:
         """
-        Genera el DataFrame de envíos.
+        Genera el DataFrame de envíos de forma vectorizada.
         """
-        MOTIVOS_ENVIO = ['Pago', 'Regalo', 'Transferencia', 'Devolución', 'Otro']
-        cliente_ids = self.clientes_df['cliente_id'].tolist()
+        cliente_ids = self.clientes_df['cliente_id'].to_numpy()
         n_clientes = len(cliente_ids)
         if n_clientes < 2:
             raise ValueError("Se requieren al menos dos clientes para generar envíos.")
-        envios = []
-        for origen in cliente_ids:
-            n_envios = np.random.randint(2, 21)  # Entre 2 y 20 envíos por cliente
-            posibles_destinos = [cid for cid in cliente_ids if cid != origen]
-            for _ in range(n_envios):
-                destino = np.random.choice(posibles_destinos)
-                valor_envio = round(np.random.uniform(10, 5000), 2)
-                fecha_hora_envio = self.fake.date_time_between(
-                    start_date='-5y', end_date='now'
-                ).strftime('%Y-%m-%d %H:%M:%S')
-                motivo_envio = np.random.choice(MOTIVOS_ENVIO)
-                envios.append({
-                    'cliente_origen_id': origen,
-                    'cliente_destino_id': destino,
-                    'valor_envio': valor_envio,
-                    'fecha_hora_envio': fecha_hora_envio,
-                    'motivo_envio': motivo_envio
-                })
-        df = pd.DataFrame(envios)
-        df = df.sample(frac=1).reset_index(drop=True)  # Desordenar
-        return df
+        plan = self.plan
+        # Número de envíos por cliente (entre 2 y 20 por defecto) y expansión de orígenes
+        n_envios = plan.cardinalidad.muestrear(self.rng, n_clientes)
+        origen_idx = np.repeat(np.arange(n_clientes), n_envios)
+        total = len(origen_idx)
+        # Destino: índice en [0, n-2] desplazado en uno si es >= origen, así nunca coincide
+        destino_idx = self.rng.integers(0, n_clientes - 1, size=total)
+        destino_idx += destino_idx >= origen_idx
+        valor_envio = np.round(self.rng.uniform(plan.importes["minimo"], plan.importes["maximo"], size=total), 2)
+        # Fecha y hora uniforme en los últimos años (5 por defecto), con resolución de segundos
+        with metricas.etapa("fechas") as etapa:
+            desde = fechas.hace_anios(self.hoy, plan.fechas["anios"], 's')
+            fecha_hora_envio = fechas.fechas_entre(self.rng, desde, self.hoy, size=total, unidad='s')
+            texto_fecha_hora = fechas.formatear(fecha_hora_envio, 's')
+            etapa.filas = total
+        motivo_envio = plan.muestrear('motivo_envio', self.rng, total)
+        envios = TablaColumnar(total, self.COLUMNAS, tipos={'valor_envio': np.float64})
+        envios['cliente_origen_id'] = cliente_ids[origen_idx]
+        envios['cliente_destino_id'] = cliente_ids[destino_idx]
+        envios['valor_envio'] = valor_envio
+        envios['fecha_hora_envio'] = texto_fecha_hora
+        envios['motivo_envio'] = motivo_envio
+        with metricas.etapa("desordenar") as etapa:
+            etapa.filas = total
+            return envios.construir(self.rng)  # Desordenar
 
     def get_envios(self) -> pd.DataFrame:
         """
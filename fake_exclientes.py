@@ -1,161 +1,73 @@
 import pandas as pd
-import random
-import string
-from faker import Faker
-from datetime import datetime, timedelta
-from typing import Optional, Union, Set, List
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional, Union, Set, List
 import logging
 
-logging.basicConfig(level=logging.INFO)
+import esquemas
+import fechas
+import ids
+import metricas
+import pools_faker
+from fake_personas import PersonasFaker
+
 logger = logging.getLogger(__name__)
 
-class ExClientesFaker:
+class ExClientesFaker(PersonasFaker):
     """
     Generador de exclientes falsos con motivos de baja y posible recuperación.
     """
-    def __init__(self, n_exclientes: Optional[int] = None, exclude_ids: Optional[Union[Set[str], List[str]]] = None, seed: Optional[int] = None):
+    TABLA = "exclientes"
+    MOTIVOS_BAJA = esquemas.valores("exclientes", "motivo_baja")
+    COLUMNAS = PersonasFaker.COLUMNAS + ["motivo_baja", "fecha_inclusion_excliente", "fecha_recuperacion_excliente"]
+
+    def __init__(self, n_exclientes: int = 100, exclude_ids: Optional[Union[Set[str], List[str]]] = None, seed: Optional[int] = None,
+                 cliente_ids: Optional[List[str]] = None, hoy: Optional[datetime] = None, workers: int = 1, bloque: int = 0,
+                 pools: Optional[pools_faker.PoolsFaker] = None, asignador: Optional[ids.AsignadorIds] = None,
+                 esquema: Optional[Dict] = None, documentos_unicos: bool = False):
         """
         n_exclientes: número de exclientes a generar.
         exclude_ids: conjunto/lista de IDs a excluir.
         seed: semilla para reproducibilidad (opcional).
+        cliente_ids: IDs ya asignados a usar en lugar de generarlos (opcional).
+        hoy: fecha de referencia (opcional, por defecto la fecha actual).
+        workers: número de procesos para generar los shards de exclientes.
+        bloque: índice del primer bloque de filas, que junto con seed fija el generador aleatorio.
+        pools: pools de valores de Faker de los que muestrear nombres y países (opcional).
+        asignador: asignador de IDs compartido con otros generadores, p. ej. el de unos clientes (opcional).
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
+        documentos_unicos: si es True, cod_docum no se repite en la población (necesita semilla).
         """
-        if seed is not None:
-            random.seed(seed)
-            Faker.seed(seed)
-        self.n_exclientes = n_exclientes
-        self.exclude_ids = set(exclude_ids) if exclude_ids else set()
-        self.fake = Faker(['es_ES', 'en_US', 'fr_FR', 'de_DE'])
-        self.fake_global = Faker()
-        self.hoy = datetime.today()
+        super().__init__(n_exclientes, exclude_ids=exclude_ids, seed=seed, cliente_ids=cliente_ids, hoy=hoy,
+                         workers=workers, bloque=bloque, pools=pools, asignador=asignador, esquema=esquema,
+                         documentos_unicos=documentos_unicos)
+        self.n_exclientes = self.n
+        self.plan_baja = esquemas.plan("exclientes", esquema)
         logger.info("Generando exclientes...")
-        self._exclientes = self.__generar_exclientes()
+        with metricas.etapa("total", generador=self.TABLA) as etapa:
+            self._exclientes = self.tabla = self._generar()
+            etapa.filas = len(self._exclientes)
         logger.info(f"Exclientes generados: {len(self._exclientes)}")
 
-    def gen_cod_docum(self, tipo: str) -> str:
-        """
-        Genera un código de documento según el tipo.
-        """
-        if tipo == "DNI":
-            return self.fake.nif()
-        elif tipo == "NIE":
-            return self.fake.nie()
-        elif tipo == "PASAPORTE":
-            return ''.join(random.choices(string.ascii_uppercase + string.digits, k=9))
-        else:  # OTRO
-            return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-
-    def random_fecha_nacimiento(self) -> datetime:
-        """
-        Genera una fecha de nacimiento aleatoria.
-        """
-        max_years = 120
-        start_date = self.hoy - timedelta(days=365.25 * max_years)
-        nacimiento = self.fake.date_between(start_date=start_date, end_date=self.hoy)
-        return nacimiento
-
-    def random_fecha_cliente(self, fecha_nac: datetime) -> datetime:
-        """
-        Genera una fecha de alta de cliente posterior a la fecha de nacimiento.
-        """
-        cliente = self.fake.date_between(start_date=fecha_nac, end_date=self.hoy)
-        return cliente
-
-    def __generar_exclientes(self) -> pd.DataFrame:
+    def _generar_tabla(self, cliente_ids: List[str]) -> pd.DataFrame:
         """
-        Genera el DataFrame de exclientes.
+        Genera el DataFrame de exclientes: columnas demográficas comunes más baja y recuperación.
         """
-        tipos = ["DNI", "NIE", "PASAPORTE", "OTRO"]
-        pesos = [0.6, 0.15, 0.2, 0.05]
-        motivos = ("Voluntaria", "Incumplimiento", "Fallecimiento")
-
-        # Generar n_exclientes números únicos de 9 dígitos que no estén en exclude_ids
-        ids_generados = set()
-        while len(ids_generados) < self.n_exclientes:
-            num = random.randint(0, 999999999)
-            id_str = str(num).zfill(9)
-            if id_str not in self.exclude_ids:
-                ids_generados.add(id_str)
-        cliente_ids = list(ids_generados)
-
-        tipo_docum = random.choices(tipos, weights=pesos, k=self.n_exclientes)
-        cod_docum = [self.gen_cod_docum(t) for t in tipo_docum]
-
-        nombres, apellidos1, apellidos2 = [], [], []
-        for _ in range(self.n_exclientes):
-            nombre = self.fake.first_name()
-            apellido1 = self.fake.last_name()
-            if random.random() < 0.25:
-                apellido2 = ''
-            else:
-                apellido2 = self.fake.last_name()
-            nombres.append(nombre)
-            apellidos1.append(apellido1)
-            apellidos2.append(apellido2)
-
-        pais_nacionalidad = [
-            "España" if t in ["DNI", "NIE"] else self.fake_global.country()
-            for t in tipo_docum
-        ]
-
-        fechas_nac, fechas_cliente = [], []
-        for _ in range(self.n_exclientes):
-            f_nac = self.random_fecha_nacimiento()
-            f_cli = self.random_fecha_cliente(f_nac)
-            fechas_nac.append(f_nac.strftime("%Y-%m-%d"))
-            fechas_cliente.append(f_cli.strftime("%Y-%m-%d"))
-
-        generos = random.choices(["M", "F"], weights=[0.49, 0.51], k=self.n_exclientes)
-        estados = ["Soltero/a", "Casado/a", "Divorciado/a", "Viudo/a", "Separado/a", "Pareja de hecho"]
-        pesos_estados = [0.4, 0.45, 0.06, 0.05, 0.02, 0.02]
-        estado_civil = random.choices(estados, weights=pesos_estados, k=self.n_exclientes)
-
-        niveles = ["01", "02", "03", "04", "05", "06"]
-        pesos_niveles = [0.15, 0.2, 0.3, 0.2, 0.1, 0.05]
-        nivel_estudios = random.choices(niveles, weights=pesos_niveles, k=self.n_exclientes)
-
-        idiomas = ["E", "C", "G", "H", "A", "F"]
-        pesos_idiomas = [0.85, 0.05, 0.03, 0.03, 0.02, 0.02]
-        codigo_idioma = random.choices(idiomas, weights=pesos_idiomas, k=self.n_exclientes)
-
-        motivo_baja = [random.choice(motivos) for _ in range(self.n_exclientes)]
-        fecha_inclusion_excliente = []
-        fecha_recuperacion_excliente = []  # Fecha en la que el excliente vuelve a ser cliente
-        for fc in fechas_cliente:
-            # Convertir string a objeto datetime
-            if isinstance(fc, str):
-                fecha_cliente_dt = datetime.strptime(fc, "%Y-%m-%d")
-            else:
-                fecha_cliente_dt = fc
-            fecha_incl = self.fake.date_between(start_date=fecha_cliente_dt, end_date=self.hoy)
-            fecha_inclusion_excliente.append(fecha_incl.strftime("%Y-%m-%d"))
-            # 20% tienen fecha de recuperación (vuelven a ser clientes)
-            if random.random() < 0.2:
-                fecha_recuperacion = self.fake.date_between(start_date=fecha_incl, end_date=self.hoy)
-                fecha_recuperacion_excliente.append(fecha_recuperacion.strftime("%Y-%m-%d"))
-            else:
-                fecha_recuperacion_excliente.append(None)
-
-        exclientes = pd.DataFrame({
-            "cliente_id": cliente_ids,
-            "tipo_docum": tipo_docum,
-            "cod_docum": cod_docum,
-            "nombre": nombres,
-            "apellido1": apellidos1,
-            "apellido2": apellidos2,
-            "pais_nacionalidad": pais_nacionalidad,
-            "fecha_nacimiento": fechas_nac,
-            "fecha_cliente": fechas_cliente,
-            "genero": generos,
-            "estado_civil": estado_civil,
-            "nivel_estudios": nivel_estudios,
-            "codigo_idioma": codigo_idioma,
-            "motivo_baja": motivo_baja,
-            "fecha_inclusion_excliente": fecha_inclusion_excliente,
+        exclientes, f_cli = self._generar_personas(cliente_ids)
+        n = len(exclientes)
+        with metricas.etapa("baja") as etapa:
+            exclientes["motivo_baja"] = self.plan_baja.muestrear("motivo_baja", self.rng, n)
+            f_incl = fechas.fechas_entre(self.rng, f_cli, self.hoy)
+            # Una parte (20% por defecto) tiene fecha de recuperación (vuelven a ser clientes)
+            recuperado = self.rng.random(n) < self.plan_baja.proporciones["recuperados"]
+            f_recup = np.where(recuperado, fechas.fechas_entre(self.rng, f_incl, self.hoy), np.datetime64("NaT", "D"))
+            exclientes["fecha_inclusion_excliente"] = fechas.formatear(f_incl)
             # Fecha en la que el excliente vuelve a ser cliente (recuperación)
-            "fecha_recuperacion_excliente": fecha_recuperacion_excliente
-        })
-        exclientes = exclientes.sample(frac=1).reset_index(drop=True)
-        return exclientes
+            exclientes["fecha_recuperacion_excliente"] = fechas.formatear(f_recup)
+            etapa.filas = n
+        with metricas.etapa("desordenar") as etapa:
+            etapa.filas = n
+            return exclientes.construir(self.rng)
 
     def get_exclientes(self) -> pd.DataFrame:
         """
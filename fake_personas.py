@@ -0,0 +1,219 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import cache
+import documentos
+import esquemas
+import fechas
+import ids
+import metricas
+import paralelo
+import pools_faker
+import semillas
+from columnar import TablaColumnar
+
+class PersonasFaker:
+    """
+    Motor demográfico común de ClientesFaker y ExClientesFaker: genera por columnas los datos de
+    identificación y demográficos de un lote de personas. Las subclases añaden sus columnas
+    propias en _generar_tabla.
+    """
+    # Nombre de la tabla, que fija el flujo aleatorio de la subclase
+    TABLA = "personas"
+    # Catálogos del escenario por defecto; las distribuciones están en esquemas.ESQUEMA["personas"]
+    TIPOS_DOCUM = esquemas.valores("personas", "tipo_docum")
+    GENEROS = esquemas.valores("personas", "genero")
+    ESTADOS_CIVILES = esquemas.valores("personas", "estado_civil")
+    NIVELES_ESTUDIOS = esquemas.valores("personas", "nivel_estudios")
+    IDIOMAS = esquemas.valores("personas", "codigo_idioma")
+    # Columnas de la tabla; las subclases añaden las suyas al final
+    COLUMNAS = [
+        "cliente_id", "tipo_docum", "cod_docum", "nombre", "apellido1", "apellido2", "pais_nacionalidad",
+        "fecha_nacimiento", "fecha_cliente", "genero", "estado_civil", "nivel_estudios", "codigo_idioma"
+    ]
+
+    def __init__(self, n: int = 100, exclude_ids: Optional[Union[Set[str], List[str]]] = None, seed: Optional[int] = None,
+                 cliente_ids: Optional[List[str]] = None, hoy: Optional[datetime] = None, workers: int = 1, bloque: int = 0,
+                 pools: Optional[pools_faker.PoolsFaker] = None, asignador: Optional[ids.AsignadorIds] = None,
+                 esquema: Optional[Dict] = None, documentos_unicos: bool = False):
+        """
+        n: número de personas a generar.
+        exclude_ids: conjunto/lista de IDs a excluir.
+        seed: semilla para reproducibilidad (opcional).
+        cliente_ids: IDs ya asignados a usar en lugar de generarlos (opcional).
+        hoy: fecha de referencia (opcional, por defecto hoy a las 00:00).
+        workers: número de procesos para generar los shards.
+        bloque: índice del primer bloque de filas, que junto con seed fija el generador aleatorio.
+        pools: pools de valores de Faker de los que muestrear nombres y países (opcional).
+        asignador: asignador de IDs compartido con otros generadores, p. ej. el de unos clientes (opcional).
+        esquema: variante del esquema de distribuciones (opcional, por defecto esquemas.ESQUEMA).
+        documentos_unicos: si es True, cod_docum no se repite en la población (necesita semilla).
+        """
+        self.seed = seed
+        self.bloque = bloque
+        self.rng = semillas.generador(seed, self.TABLA, bloque)
+        self.workers = workers
+        self.pools = pools
+        self.esquema = esquema
+        self.plan = esquemas.plan("personas", esquema)
+        self.documentos_unicos = documentos_unicos
+        self.documentos = documentos.GeneradorDocumentos(seed, unicos=documentos_unicos)
+        self.cliente_ids = cliente_ids
+        self.n = len(cliente_ids) if cliente_ids is not None else n
+        # Sin asignador compartido se crea uno propio a partir de la semilla
+        self.asignador = asignador or ids.AsignadorIds(seed, "cliente_id")
+        if exclude_ids:
+            self.asignador.excluir(exclude_ids)
+        self.fake = pools_faker.faker(pools_faker.LOCALES, semillas.semilla_faker(self.rng))
+        self.fake_global = pools_faker.faker("en_US", semillas.semilla_faker(self.rng))
+        self.hoy = hoy or fechas.hoy()
+        # Tabla generada; la rellena la subclase con _generar()
+        self.tabla: Optional[pd.DataFrame] = None
+
+    def letra_dni(self, numero: Union[int, str]) -> str:
+        """
+        Calcula la letra del DNI español para un número dado.
+        """
+        return documentos.LETRAS_DNI[int(numero) % 23]
+
+    def gen_cod_docum(self, tipo: str, posicion: Optional[int] = None) -> str:
+        """
+        Genera un código de documento suelto según el tipo con self.documentos, como las tablas por lotes;
+        con documentos únicos hace falta la posición del cliente_id en el asignador.
+        """
+        posiciones = np.array([posicion], dtype=np.uint64) if posicion is not None else None
+        return self.documentos.generar(self.rng, [tipo], posiciones)[0]
+
+    def random_fecha_nacimiento(self, n: int) -> np.ndarray:
+        """
+        Genera n fechas de nacimiento aleatorias (datetime64[D]).
+        """
+        start_date = fechas.hace_anios(self.hoy, self.plan.fechas["anios"])
+        return fechas.fechas_entre(self.rng, start_date, self.hoy, size=n)
+
+    def random_fecha_cliente(self, fechas_nac: np.ndarray) -> np.ndarray:
+        """
+        Genera las fechas de alta de cliente, cada una posterior a su fecha de nacimiento.
+        """
+        return fechas.fechas_entre(self.rng, fechas_nac, self.hoy)
+
+    def _generar(self) -> pd.DataFrame:
+        """
+        Asigna los IDs y genera la tabla, por shards si supera el tamaño de shard.
+        """
+        if self.cliente_ids is not None:
+            cliente_ids = list(self.cliente_ids)
+        else:
+            with metricas.etapa("ids") as etapa:
+                cliente_ids = self.asignador.asignar_texto(self.n)
+                etapa.filas = len(cliente_ids)
+
+        parametros = {"ids": cache.huella(cliente_ids), "seed": self.seed, "bloque": self.bloque, "hoy": self.hoy,
+                      "pools": cache.parametros_pools(self.pools), "esquema": esquemas.huella(self.esquema),
+                      "documentos_unicos": self.documentos_unicos}
+        return cache.cacheado(self.TABLA, parametros, lambda: self._generar_filas(cliente_ids))
+
+    def _generar_filas(self, cliente_ids: List[str]) -> pd.DataFrame:
+        """
+        Genera la tabla para unos IDs ya asignados.
+        """
+        # Por encima del tamaño de shard se reparte el trabajo en shards con semilla propia
+        if self.n > paralelo.TAMANO_SHARD:
+            return self._generar_por_shards(cliente_ids)
+        return self._generar_tabla(cliente_ids)
+
+    def _generar_tabla(self, cliente_ids: List[str]) -> pd.DataFrame:
+        """
+        Genera la tabla de un shard; las subclases añaden aquí sus columnas.
+        """
+        personas, _ = self._generar_personas(cliente_ids)
+        with metricas.etapa("desordenar") as etapa:
+            etapa.filas = len(personas)
+            return personas.construir(self.rng)  # Desordenar
+
+    def _generar_personas(self, cliente_ids: List[str]) -> Tuple[TablaColumnar, np.ndarray]:
+        """
+        Genera las columnas demográficas comunes en una tabla columnar con las columnas de la
+        subclase (COLUMNAS), que rellena después las suyas. Devuelve la tabla y las fechas de alta
+        de cliente (datetime64[D]) para las etapas que dependen de ellas.
+        """
+        n = len(cliente_ids)
+        with metricas.etapa("documentos") as etapa:
+            tipo_docum = self.plan.muestrear("tipo_docum", self.rng, n).tolist()
+            # Con documentos únicos, cada código sale de la posición del cliente_id en el asignador
+            posiciones = self.asignador.invertir(np.asarray(cliente_ids).astype(np.uint64)) if self.documentos_unicos else None
+            cod_docum = self.documentos.generar(self.rng, tipo_docum, posiciones)
+            etapa.filas = n
+
+        # Generar nombres y apellidos separados, y a veces dejar apellido2 vacío
+        with metricas.etapa("nombres") as etapa:
+            nombres = pools_faker.valores(self.pools, self.rng, self.fake, pools_faker.LOCALES, "first_name", n)
+            apellidos1 = pools_faker.valores(self.pools, self.rng, self.fake, pools_faker.LOCALES, "last_name", n)
+            # Una parte de los casos (25% por defecto) sin apellido2
+            apellidos2 = np.full(n, '', dtype=object)
+            con_apellido2 = self.rng.random(n) >= self.plan.proporciones["sin_apellido2"]
+            apellidos2[con_apellido2] = pools_faker.valores(
+                self.pools, self.rng, self.fake, pools_faker.LOCALES, "last_name", int(con_apellido2.sum())
+            )
+
+            pais_nacionalidad = np.full(n, "España", dtype=object)
+            extranjero = ~np.isin(tipo_docum, ["DNI", "NIE"])
+            pais_nacionalidad[extranjero] = pools_faker.valores(
+                self.pools, self.rng, self.fake_global, "en_US", "country", int(extranjero.sum())
+            )
+            etapa.filas = n
+
+        with metricas.etapa("fechas") as etapa:
+            f_nac = self.random_fecha_nacimiento(n)
+            f_cli = self.random_fecha_cliente(f_nac)
+            fecha_nacimiento = fechas.formatear(f_nac)
+            fecha_cliente = fechas.formatear(f_cli)
+            etapa.filas = n
+
+        generos = self.plan.muestrear("genero", self.rng, n)
+        estado_civil = self.plan.muestrear("estado_civil", self.rng, n)
+        nivel_estudios = self.plan.muestrear("nivel_estudios", self.rng, n)
+        codigo_idioma = self.plan.muestrear("codigo_idioma", self.rng, n)
+
+        personas = TablaColumnar(n, self.COLUMNAS)
+        personas["cliente_id"] = cliente_ids
+        personas["tipo_docum"] = tipo_docum
+        personas["cod_docum"] = cod_docum
+        personas["nombre"] = nombres
+        personas["apellido1"] = apellidos1
+        personas["apellido2"] = apellidos2
+        personas["pais_nacionalidad"] = pais_nacionalidad
+        personas["fecha_nacimiento"] = fecha_nacimiento
+        personas["fecha_cliente"] = fecha_cliente
+        personas["genero"] = generos
+        personas["estado_civil"] = estado_civil
+        personas["nivel_estudios"] = nivel_estudios
+        personas["codigo_idioma"] = codigo_idioma
+        return personas, f_cli
+
+    def _generar_por_shards(self, cliente_ids: List[str]) -> pd.DataFrame:
+        """
+        Genera la tabla por shards de IDs, en paralelo si workers > 1.
+        El shard i usa el bloque de filas bloque + i.
+        """
+        tamano = paralelo.TAMANO_SHARD
+        shards = [cliente_ids[i:i + tamano] for i in range(0, len(cliente_ids), tamano)]
+        tareas = [(type(self), ids, self.seed, self.bloque + i, self.hoy, self.pools, self.esquema, self.documentos_unicos)
+                  for i, ids in enumerate(shards)]
+        return pd.concat(paralelo.ejecutar(_generar_shard, tareas, self.workers), ignore_index=True)
+
+    def get_tabla(self) -> Optional[pd.DataFrame]:
+        """
+        Devuelve la tabla generada por la subclase (None si aún no se ha generado).
+        """
+        return self.tabla
+
+def _generar_shard(clase: type, cliente_ids: List[str], seed: Optional[int], bloque: int, hoy: datetime,
+                   pools: Optional[pools_faker.PoolsFaker], esquema: Optional[Dict], documentos_unicos: bool) -> pd.DataFrame:
+    """
+    Genera un shard de la subclase indicada (función de nivel de módulo para poder enviarla a otro proceso).
+    """
+    return clase(cliente_ids=cliente_ids, seed=seed, hoy=hoy, bloque=bloque, pools=pools, esquema=esquema,
+                 documentos_unicos=documentos_unicos).get_tabla()
@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional
+
+import escritores
+import esquemas
+import incremental
+from main_fake_data import Main, TABLAS
+
+# Opciones de la población completa: un delta las toma del manifiesto, así que no se combinan con --delta
+OPCIONES_POBLACION = ("tables", "n_clientes", "n_exclientes", "seed", "chunk_size", "schema", "compact", "unique_docs",
+                      "state", "dry_run")
+
+def _tablas(valores: List[str]) -> List[str]:
+    """
+    Separa la lista de tablas, admitiendo espacios y comas.
+    """
+    return [tabla for valor in valores for tabla in valor.split(",") if tabla]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Punto de entrada de la línea de comandos: genera las tablas seleccionadas o estima su tamaño.
+    """
+    parser = argparse.ArgumentParser(prog="fakebiz", description="Genera datos falsos de clientes y sus tablas relacionadas.")
+    parser.add_argument("--tables", nargs="+", default=None,
+                        help=f"Tablas a generar (por defecto todas): {', '.join(TABLAS)}. "
+                             "Se generan también las que necesitan, pero solo se escriben las indicadas.")
+    parser.add_argument("--n-clientes", type=int, default=10000, help="Número de clientes.")
+    parser.add_argument("--n-exclientes", type=int, default=2000, help="Número de exclientes.")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla para reproducibilidad.")
+    parser.add_argument("--out", default="./data/out", help="Carpeta de salida.")
+    parser.add_argument("--format", default="csv", choices=list(escritores.ESCRITORES), help="Formato de salida.")
+    parser.add_argument("--compression", default=None,
+                        help="Compresión del formato: " + "; ".join(f"{formato}: {', '.join(compresiones)}"
+                                                                  for formato, compresiones in escritores.COMPRESIONES.items()) + ".")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos que generan bloques en paralelo.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Clientes por bloque.")
+    parser.add_argument("--schema", default=None, metavar="FICHERO",
+                        help="Variante del esquema de distribuciones en JSON o YAML, con solo lo que cambia.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Pasa los bloques entre procesos con tipos compactos (IDs uint32, categorías, fechas).")
+    parser.add_argument("--unique-docs", action="store_true",
+                        help="Genera cod_docum sin repetir en toda la población (necesita --seed).")
+    parser.add_argument("--state", action="store_true",
+                        help="Guarda el manifiesto de estado (estado.json en --out) para generar deltas después.")
+    parser.add_argument("--delta", type=int, default=None, metavar="DIAS",
+                        help="Genera solo el delta de los siguientes DIAS días a partir del estado.json de --out.")
+    parser.add_argument("--dry-run", action="store_true", help="Estima filas y tamaño de salida sin generar los datos.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el progreso de cada generador.")
+    args = parser.parse_args(argv)
+
+    if args.state and args.seed is None:
+        parser.error("--state necesita --seed para poder regenerar los bloques en los deltas")
+    if args.unique_docs and args.seed is None:
+        parser.error("--unique-docs necesita --seed para que todos los bloques usen la misma permutación")
+    if args.compression and args.format not in escritores.COMPRESIONES:
+        parser.error(f"--compression no se puede usar con --format {args.format}")
+    if args.delta is not None:
+        ignoradas = [f"--{opcion.replace('_', '-')}" for opcion in OPCIONES_POBLACION
+                     if getattr(args, opcion) != parser.get_default(opcion)]
+        if ignoradas:
+            parser.error(f"--delta toma la población del manifiesto; no se puede usar con {', '.join(ignoradas)}")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    opciones = {"compression": args.compression} if args.compression else {}
+
+    if args.delta is not None:
+        ruta = os.path.join(args.out, incremental.MANIFIESTO)
+        if not os.path.exists(ruta):
+            parser.error(f"No hay manifiesto en {ruta}: genera antes la población con --state")
+        try:
+            escritores.validar_opciones(args.format, opciones)
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            estado = incremental.EstadoIncremental.cargar(ruta)
+        except (ValueError, KeyError, TypeError) as e:
+            parser.error(f"Manifiesto no válido en {ruta}: {e}")
+        carpeta = incremental.generar_delta(estado, dias=args.delta, out_dir=args.out, formato=args.format, opciones_escritor=opciones)
+        estado.guardar(ruta)
+        print(f"Delta {estado.deltas} escrito en {carpeta} (hasta {estado.hasta})")
+        return 0
+    try:
+        esquema = esquemas.cargar(args.schema) if args.schema else None
+        main = Main(n_clientes=args.n_clientes, n_exclientes=args.n_exclientes, chunk_size=args.chunk_size, seed=args.seed,
+                    workers=args.workers, out_dir=args.out, formato=args.format, opciones_escritor=opciones,
+                    seleccion=_tablas(args.tables) if args.tables else None, compacta=args.compact, esquema=esquema,
+                    documentos_unicos=args.unique_docs)
+    except (ValueError, ImportError, OSError) as e:
+        parser.error(str(e))
+
+    if args.dry_run:
+        estimacion = main.estimar()
+        print(estimacion.to_string(index=False))
+        print(f"Total: {estimacion['filas'].sum()} filas, {estimacion['mb'].sum():.1f} MB")
+        return 0
+    main.write_stream()
+    if args.state:
+        incremental.EstadoIncremental.desde_main(main).guardar(os.path.join(args.out, incremental.MANIFIESTO))
+    print(f"Tablas escritas en {args.out}: {', '.join(main.seleccion)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from typing import Optional, Union
+
+import numpy as np
+
+# Fecha de baja de los registros activos
+CENTINELA = np.datetime64("9999-12-31", "D")
+
+FechaLike = Union[datetime, date, str, np.datetime64, np.ndarray]
+
+def hoy() -> datetime:
+    """
+    Devuelve la fecha actual a las 00:00, la referencia por defecto de los generadores: no cambia
+    durante el día, así que las claves de la caché coinciden sin fijar hoy.
+    """
+    return datetime.combine(date.today(), datetime.min.time())
+
+def a_datetime64(valor: FechaLike, unidad: str = "D") -> np.ndarray:
+    """
+    Convierte una fecha, cadena ISO o array de fechas a datetime64 con la unidad indicada ('D' o 's').
+    """
+    if isinstance(valor, datetime) and unidad == "D":
+        valor = valor.date()
+    return np.asarray(valor).astype(f"datetime64[{unidad}]")
+
+def hace_anios(hoy: FechaLike, anios: float, unidad: str = "D") -> np.datetime64:
+    """
+    Devuelve la fecha de hace `anios` años respecto a hoy (años de 365,24 días, como Faker).
+    """
+    segundos = int(365.24 * anios * 86400)
+    return (a_datetime64(hoy, "s") - np.timedelta64(segundos, "s")).astype(f"datetime64[{unidad}]")
+
+def fechas_entre(rng: np.random.Generator, inicio: FechaLike, fin: FechaLike, size: Optional[int] = None, unidad: str = "D") -> np.ndarray:
+    """
+    Extrae fechas uniformes entre inicio y fin (ambos incluidos) en un solo paso.
+    inicio y fin pueden ser escalares o arrays, de modo que las fechas dependientes
+    (alta >= nacimiento, baja >= alta, bloqueo >= inclusión) se obtienen pasando
+    como inicio el array de fechas previas.
+    """
+    inicio = a_datetime64(inicio, unidad)
+    fin = a_datetime64(fin, unidad)
+    rango = (fin - inicio).astype(np.int64)
+    return inicio + rng.integers(0, rango + 1, size=size).astype(f"timedelta64[{unidad}]")
+
+def formatear(fechas: np.ndarray, unidad: str = "D") -> np.ndarray:
+    """
+    Formatea un array datetime64 como cadenas 'YYYY-MM-DD' (unidad 'D') o
+    'YYYY-MM-DD HH:MM:SS' (unidad 's'); los NaT quedan como None.
+    """
+    fechas = np.asarray(fechas)
+    if fechas.size == 0:
+        return np.empty(fechas.shape, dtype=object)
+    texto = np.datetime_as_string(fechas, unit=unidad).astype(object)
+    if unidad == "s":
+        texto = np.char.replace(texto.astype(str), "T", " ").astype(object)
+    texto[np.isnat(fechas)] = None
+    return texto
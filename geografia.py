@@ -0,0 +1,197 @@
+"""
+Índice geográfico por país para las direcciones: provincias (o departamentos, o estados), sus
+ciudades y el rango de códigos postales válidos de cada una, de modo que ciudad, provincia y código
+postal de una dirección son coherentes entre sí.
+
+    indice = geografia.indice("España")
+    ciudad, provincia, codigo_postal = indice.muestrear(rng, 1000)
+
+Cada índice se construye una vez, se guarda como Arrow IPC (en la caché de tablas activa o, sin ella,
+en DIRECTORIO_INDICES) y cada proceso lo carga de ahí y lo muestrea por lotes indexando arrays. Las ciudades se guardan ordenadas por
+provincia con el desplazamiento de cada provincia, así que las ciudades de una provincia son un
+tramo contiguo. Para añadir un país basta con registrar en FUENTES una función que devuelva su tabla
+(provincia, ciudad, cp_min, cp_max); los países sin índice siguen usando Faker.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import cache
+
+logger = logging.getLogger(__name__)
+
+RUTA_CIUDADES_ES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "in", "ciudades_provincias_es.csv")
+DIGITOS_CP = 5
+
+# Carpeta de los índices guardados cuando no hay caché de tablas activa (la variable de entorno
+# FAKEBIZ_GEOGRAFIA la cambia)
+DIRECTORIO_INDICES = os.environ.get("FAKEBIZ_GEOGRAFIA", os.path.join(tempfile.gettempdir(), "fakebiz_geografia"))
+TAMANO_INDICES_MB = 64
+
+# Código INE de cada provincia, que son las dos primeras cifras de sus códigos postales
+PREFIJOS_CP_ES = {
+    "Álava": 1, "Araba": 1, "Albacete": 2, "Alicante": 3, "Alacant": 3, "Almería": 4, "Ávila": 5, "Badajoz": 6,
+    "Baleares": 7, "Illes Balears": 7, "Barcelona": 8, "Burgos": 9, "Cáceres": 10, "Cádiz": 11, "Castellón": 12,
+    "Castelló": 12, "Ciudad Real": 13, "Córdoba": 14, "A Coruña": 15, "La Coruña": 15, "Cuenca": 16, "Girona": 17,
+    "Gerona": 17, "Granada": 18, "Guadalajara": 19, "Guipúzcoa": 20, "Gipuzkoa": 20, "Huelva": 21, "Huesca": 22,
+    "Jaén": 23, "León": 24, "Lleida": 25, "Lérida": 25, "La Rioja": 26, "Lugo": 27, "Madrid": 28, "Málaga": 29,
+    "Murcia": 30, "Navarra": 31, "Ourense": 32, "Orense": 32, "Asturias": 33, "Palencia": 34, "Las Palmas": 35,
+    "Pontevedra": 36, "Salamanca": 37, "Santa Cruz de Tenerife": 38, "Cantabria": 39, "Segovia": 40, "Sevilla": 41,
+    "Soria": 42, "Tarragona": 43, "Teruel": 44, "Toledo": 45, "Valencia": 46, "València": 46, "Valladolid": 47,
+    "Vizcaya": 48, "Bizkaia": 48, "Zamora": 49, "Zaragoza": 50, "Ceuta": 51, "Melilla": 52,
+}
+
+class IndiceGeografico:
+    """
+    Provincias de un país con sus ciudades (opcionales) y su rango de códigos postales, en arrays.
+    """
+    def __init__(self, pais: str, tabla: pd.DataFrame):
+        """
+        pais: nombre del país.
+        tabla: una fila por ciudad (o por provincia, con ciudad vacía si el país no tiene ciudades
+            en el índice) con columnas provincia, ciudad, cp_min y cp_max.
+        """
+        self.pais = pais
+        tabla = tabla.sort_values("provincia", kind="stable").reset_index(drop=True)
+        provincia = tabla["provincia"].to_numpy(dtype=object)
+        self.provincias, self.inicio, self.n_ciudades = np.unique(provincia, return_index=True, return_counts=True)
+        self.fila_provincia = np.repeat(np.arange(len(self.provincias)), self.n_ciudades)
+        self.cp_min = tabla["cp_min"].to_numpy(dtype=np.int64)[self.inicio]
+        self.cp_max = tabla["cp_max"].to_numpy(dtype=np.int64)[self.inicio]
+        ciudades = tabla["ciudad"].fillna("").to_numpy(dtype=object)
+        self.ciudades = ciudades if (ciudades != "").all() else None
+
+    def __len__(self) -> int:
+        return len(self.fila_provincia)
+
+    def muestrear(self, rng: np.random.Generator, n: int,
+                  provincias: Optional[Sequence[str]] = None) -> Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Devuelve n (ciudad, provincia, código postal) al azar; ciudad es None si el índice no tiene ciudades.
+        Sin provincias, cada fila del índice es igual de probable (las provincias con más ciudades salen más);
+        con provincias, la ciudad y el código postal se eligen dentro de la provincia de cada fila.
+        """
+        if provincias is None:
+            fila = rng.integers(0, len(self), size=n)
+            p = self.fila_provincia[fila]
+        else:
+            p = self.posiciones(provincias)
+            fila = self.inicio[p] + (rng.random(n) * self.n_ciudades[p]).astype(np.int64)
+        cp = self.cp_min[p] + rng.integers(0, self.cp_max[p] - self.cp_min[p] + 1)
+        codigo_postal = np.char.zfill(cp.astype(str), DIGITOS_CP).astype(object)
+        ciudad = self.ciudades[fila] if self.ciudades is not None else None
+        return ciudad, self.provincias[p], codigo_postal
+
+    def ciudades_de(self, provincia: str) -> np.ndarray:
+        """
+        Ciudades de una provincia (tramo contiguo del array de ciudades).
+        """
+        if self.ciudades is None:
+            return np.empty(0, dtype=object)
+        p = self.posiciones([provincia])[0]
+        return self.ciudades[self.inicio[p]:self.inicio[p] + self.n_ciudades[p]]
+
+    def posiciones(self, provincias: Sequence[str]) -> np.ndarray:
+        """
+        Posición de cada provincia en el índice (error si alguna no existe).
+        """
+        provincias = np.asarray(provincias, dtype=object)
+        p = np.searchsorted(self.provincias, provincias)
+        p[p == len(self.provincias)] = 0
+        desconocidas = self.provincias[p] != provincias
+        if desconocidas.any():
+            raise ValueError(f"{self.pais}: provincias desconocidas {sorted(set(provincias[desconocidas]))[:5]}")
+        return p
+
+def _tabla_espana() -> pd.DataFrame:
+    """
+    Ciudades y provincias españolas del CSV de entrada, con el rango de códigos postales de su provincia.
+    """
+    tabla = pd.read_csv(RUTA_CIUDADES_ES, comment="#", dtype=str).dropna(subset=["ciudad", "provincia"])
+    tabla["provincia"] = tabla["provincia"].str.strip()
+    tabla["ciudad"] = tabla["ciudad"].str.strip()
+    prefijo = tabla["provincia"].map(PREFIJOS_CP_ES)
+    if prefijo.isna().any():
+        raise ValueError(f"{RUTA_CIUDADES_ES}: provincias sin prefijo postal {sorted(set(tabla['provincia'][prefijo.isna()]))}")
+    prefijo = prefijo.astype(np.int64) * 1000
+    return pd.DataFrame({"provincia": tabla["provincia"], "ciudad": tabla["ciudad"], "cp_min": prefijo + 1, "cp_max": prefijo + 999})
+
+def _tabla_francia() -> pd.DataFrame:
+    """
+    Departamentos franceses de Faker; el código postal empieza por el número del departamento
+    (20 en Córcega, tres cifras en ultramar).
+    """
+    from faker.providers.address.fr_FR import Provider  # Se importa al usarlo, como en pools_faker
+
+    filas = []
+    for codigo, nombre in Provider.departments:
+        prefijo = "20" if codigo in ("2A", "2B") else codigo
+        base = int(prefijo) * 10 ** (DIGITOS_CP - len(prefijo))
+        filas.append((nombre, "", base + 1 if len(prefijo) == 2 else base, base + 10 ** (DIGITOS_CP - len(prefijo)) - 1))
+    return pd.DataFrame(filas, columns=["provincia", "ciudad", "cp_min", "cp_max"])
+
+def _tabla_estados_unidos() -> pd.DataFrame:
+    """
+    Estados de Estados Unidos con su rango de códigos ZIP, de los datos de Faker.
+    """
+    from faker.providers.address.en_US import Provider
+
+    # states_abbr incluye DC, que no está en states; sin ella las dos listas van en el mismo orden
+    abreviaturas = [abreviatura for abreviatura in Provider.states_abbr if abreviatura != "DC"]
+    filas = [(nombre, "", *Provider.states_postcode[abreviatura]) for abreviatura, nombre in zip(abreviaturas, Provider.states)]
+    return pd.DataFrame(filas, columns=["provincia", "ciudad", "cp_min", "cp_max"])
+
+# Países con índice; el resto usa city, state y postcode de Faker
+FUENTES: Dict[str, Callable[[], pd.DataFrame]] = {
+    "España": _tabla_espana,
+    "France": _tabla_francia,
+    "United States": _tabla_estados_unidos,
+}
+
+# Índices construidos en este proceso
+_indices: Dict[str, IndiceGeografico] = {}
+
+def indice(pais: str) -> Optional[IndiceGeografico]:
+    """
+    Devuelve el índice de un país (None si no tiene), cargándolo la primera vez que se pide en el
+    proceso. La tabla del índice se guarda en la caché de tablas activa o, sin ella, en
+    DIRECTORIO_INDICES, y solo se construye si no está en ninguna.
+    """
+    if pais not in FUENTES:
+        return None
+    if pais not in _indices:
+        almacen = _almacen()
+        if almacen is not None:
+            tabla = almacen.obtener_o_generar("geografia", {"pais": pais, "fuente": _huella_fuente(pais)}, FUENTES[pais])
+        else:
+            tabla = FUENTES[pais]()
+        _indices[pais] = IndiceGeografico(pais, tabla)
+        logger.info(f"Índice geográfico de {pais}: {len(_indices[pais].provincias)} provincias, {len(_indices[pais])} filas")
+    return _indices[pais]
+
+def _almacen() -> Optional[cache.CacheTablas]:
+    """
+    Caché donde se guardan los índices: la activa o, si no hay, la de DIRECTORIO_INDICES
+    (None si no se puede crear la carpeta).
+    """
+    almacen = cache.activa()
+    if almacen is None:
+        try:
+            almacen = cache.CacheTablas(DIRECTORIO_INDICES, TAMANO_INDICES_MB)
+        except OSError as e:
+            logger.warning(f"No se guardan los índices geográficos en {DIRECTORIO_INDICES}: {e}")
+    return almacen
+
+def _huella_fuente(pais: str) -> Optional[str]:
+    """
+    Hash del fichero de entrada del índice, si lo tiene, para que la entrada guardada se renueve al cambiarlo.
+    """
+    if pais != "España":
+        return None
+    with open(RUTA_CIUDADES_ES, "rb") as fichero:
+        return hashlib.sha256(fichero.read()).hexdigest()
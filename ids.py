@@ -0,0 +1,147 @@
+import math
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+
+import semillas
+
+# Número de rondas de la red de Feistel
+RONDAS = 4
+_MULTIPLICADOR = np.uint64(0x9E3779B97F4A7C15)
+
+class AsignadorIds:
+    """
+    Asignador de IDs numéricos únicos de `digitos` dígitos, sin bucle de rechazo.
+    El i-ésimo ID emitido es la imagen de i por una permutación biyectiva pseudoaleatoria de
+    [0, 10**digitos) (red de Feistel con cycle-walking), así que los IDs no se repiten nunca
+    y el registro de emitidos es solo un contador: comprobar si un ID se ha emitido consiste
+    en invertir la permutación y compararlo con el contador, sin guardar los IDs.
+    Los IDs ajenos a excluir se guardan en un array ordenado.
+    """
+    def __init__(self, seed: Optional[int] = None, espacio: str = "cliente_id", digitos: int = 9, inicio: int = 0,
+                 excluir: Optional[Iterable[Union[str, int]]] = None, capacidad: Optional[int] = None):
+        """
+        seed: semilla de la permutación; sin semilla se parte de entropía nueva.
+        espacio: nombre del espacio de IDs, que junto con seed fija la permutación.
+        digitos: número de dígitos de los IDs.
+        inicio: posición del contador desde la que emitir (para repartir rangos entre bloques).
+        excluir: IDs que no deben emitirse (opcional).
+        capacidad: tamaño del espacio (opcional, por defecto 10**digitos), para espacios que no son de
+            números decimales, como los códigos de documento.
+        """
+        self.digitos = digitos
+        self.capacidad = capacidad or 10 ** digitos
+        self.contador = inicio
+        # Bits de la potencia de 2 par más pequeña que cubre el espacio
+        bits = math.ceil(math.log2(self.capacidad))
+        self._mitad = (bits + 1) // 2
+        self._mascara = np.uint64((1 << self._mitad) - 1)
+        rng = semillas.generador(seed, f"ids/{espacio}")
+        self._claves = rng.integers(0, 2**32, size=RONDAS, dtype=np.uint64)
+        self._excluidos = np.empty(0, dtype=np.uint64)
+        if excluir is not None:
+            self.excluir(excluir)
+
+    def asignar(self, n: int) -> np.ndarray:
+        """
+        Emite n IDs nuevos (uint64) en orden de emisión.
+        """
+        partes = []
+        faltan = n
+        while faltan:
+            fin = self.contador + faltan
+            if fin > self.capacidad:
+                raise ValueError(f"Espacio de IDs de {self.digitos} dígitos agotado: se piden {n} y quedan "
+                                 f"{self.capacidad - self.contador}")
+            ids = self.permutar(np.arange(self.contador, fin, dtype=np.uint64))
+            self.contador = fin
+            if self._excluidos.size:
+                ids = ids[~self._en_excluidos(ids)]
+            partes.append(ids)
+            faltan -= len(ids)
+        return np.concatenate(partes) if partes else np.empty(0, dtype=np.uint64)
+
+    def saltar(self, n: int):
+        """
+        Avanza el contador n posiciones sin emitir IDs, para que lo que se emita después no dependa
+        de si se generaron los IDs anteriores.
+        """
+        self.contador += n
+
+    def asignar_texto(self, n: int) -> List[str]:
+        """
+        Emite n IDs nuevos como cadenas con ceros a la izquierda.
+        """
+        return self.texto(self.asignar(n))
+
+    def excluir(self, ids: Iterable[Union[str, int]]):
+        """
+        Añade IDs que no deben emitirse (por ejemplo, IDs de otra fuente).
+        """
+        nuevos = np.fromiter((int(i) for i in ids), dtype=np.uint64)
+        self._excluidos = np.union1d(self._excluidos, nuevos)
+
+    def emitido(self, ids: Union[np.ndarray, Iterable[Union[str, int]]]) -> np.ndarray:
+        """
+        Indica para cada ID si lo ha emitido este asignador.
+        """
+        ids = np.asarray([int(i) for i in ids] if not isinstance(ids, np.ndarray) else ids, dtype=np.uint64)
+        return (self.invertir(ids) < np.uint64(self.contador)) & ~self._en_excluidos(ids)
+
+    def texto(self, ids: np.ndarray) -> List[str]:
+        """
+        Formatea IDs numéricos como cadenas de `digitos` dígitos.
+        """
+        return np.char.zfill(ids.astype(str), self.digitos).astype(object).tolist()
+
+    def permutar(self, x: np.ndarray) -> np.ndarray:
+        """
+        Aplica la permutación a un array de posiciones en [0, capacidad).
+        """
+        y = self._feistel(x, self._claves)
+        fuera = y >= self.capacidad
+        while fuera.any():  # cycle-walking: se reaplica hasta caer dentro del espacio
+            y[fuera] = self._feistel(y[fuera], self._claves)
+            fuera = y >= self.capacidad
+        return y
+
+    def invertir(self, y: np.ndarray) -> np.ndarray:
+        """
+        Aplica la permutación inversa (ID -> posición de emisión).
+        """
+        x = self._feistel(y, self._claves[::-1], inversa=True)
+        fuera = x >= self.capacidad
+        while fuera.any():
+            x[fuera] = self._feistel(x[fuera], self._claves[::-1], inversa=True)
+            fuera = x >= self.capacidad
+        return x
+
+    def _feistel(self, x: np.ndarray, claves: np.ndarray, inversa: bool = False) -> np.ndarray:
+        """
+        Red de Feistel equilibrada sobre 2 * _mitad bits.
+        """
+        mitad = np.uint64(self._mitad)
+        izquierda, derecha = x >> mitad, x & self._mascara
+        if inversa:
+            izquierda, derecha = derecha, izquierda
+        for clave in claves:
+            izquierda, derecha = derecha, izquierda ^ self._ronda(derecha, clave)
+        if inversa:
+            izquierda, derecha = derecha, izquierda
+        return (izquierda << mitad) | derecha
+
+    def _ronda(self, r: np.ndarray, clave: np.uint64) -> np.ndarray:
+        """
+        Función de ronda: mezcla multiplicativa de la mitad derecha con la clave.
+        """
+        return (((r + clave) * _MULTIPLICADOR) >> np.uint64(32)) & self._mascara
+
+    def _en_excluidos(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Indica qué IDs están en el array ordenado de excluidos.
+        """
+        if not self._excluidos.size:
+            return np.zeros(len(ids), dtype=bool)
+        posiciones = np.searchsorted(self._excluidos, ids)
+        posiciones[posiciones == len(self._excluidos)] = 0
+        return self._excluidos[posiciones] == ids
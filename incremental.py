@@ -0,0 +1,426 @@
+"""
+Generación incremental: tras una ejecución completa se guarda un manifiesto de estado compacto
+y cada ejecución posterior genera solo el delta de una ventana de días (altas de clientes con sus
+contratos, contactos y direcciones, bajas de contratos, envíos y nuevas cuentas bloqueadas).
+
+    main = Main(n_clientes=1_000_000, seed=42)
+    main.write_stream()
+    estado = EstadoIncremental.desde_main(main)
+    estado.guardar("./data/out/estado.json")
+
+    estado = EstadoIncremental.cargar("./data/out/estado.json")
+    generar_delta(estado, dias=1, out_dir="./data/out")
+    estado.guardar("./data/out/estado.json")
+
+El manifiesto no guarda filas: los IDs existentes se obtienen de su posición en la permutación del
+asignador y los contratos de un bloque se regeneran de forma determinista, así que el coste de un
+delta depende del tamaño del delta (más los bloques que reciben bajas), no de la población. Los
+contratos ya dados de baja se guardan como diferencias de sus identificadores ordenados, comprimidas.
+"""
+import base64
+import json
+import logging
+import math
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+import escritores
+import esquemas
+import fechas
+import ids
+import metricas
+import paralelo
+import pools_faker
+import semillas
+from fake_clientes import ClientesFaker
+from fake_contactos import ContactosFaker
+from fake_contratos import ContratosFaker, digitos_necesarios
+from fake_cuentas_bloqueadas import CuentasBloqueadasFaker
+from fake_direcciones import DireccionesFaker
+
+logger = logging.getLogger(__name__)
+
+# 2: cerrados como diferencias comprimidas en lugar de una lista de identificadores
+VERSION = 2
+# Nombre del manifiesto dentro de la carpeta de salida
+MANIFIESTO = "estado.json"
+DIAS_ANIO = 365.24
+
+# Tasas diarias por cliente (o por contrato activo) con las que se generan los deltas; las de envíos
+# y bloqueos salen del esquema (tasas_diarias), para que sigan el ritmo de la población de partida
+TASA_ALTAS = 0.10 / DIAS_ANIO
+TASA_BAJAS_CONTRATO = 0.05 / DIAS_ANIO
+# Proporción de contratos activos en la población de partida
+PROPORCION_ACTIVOS = 0.7
+
+def tasas_diarias(esquema: Optional[Dict] = None) -> Dict[str, float]:
+    """
+    Envíos y bloqueos diarios por cliente que reparten en la ventana del esquema los de la población de partida.
+    """
+    envios = esquemas.plan("envios", esquema)
+    bloqueos = esquemas.plan("cuentas_bloqueadas", esquema)
+    return {
+        "envios": envios.cardinalidad.media() / (envios.fechas["anios"] * DIAS_ANIO),
+        "cuentas_bloqueadas": bloqueos.proporciones["bloqueadas"] / (bloqueos.fechas["anios"] * DIAS_ANIO),
+    }
+
+class EstadoIncremental:
+    """
+    Manifiesto de estado de una población generada: semilla, contador del asignador de IDs,
+    bloques de clientes (para regenerarlos), contador de identificadores de contrato,
+    contratos dados de baja en deltas y marcas de agua por tabla.
+    """
+    def __init__(self, seed: int, hoy: datetime, chunk_size: int, digitos_identificador: int, contador_ids: int,
+                 contador_identificador: int, siguiente_bloque: int, bloques: List[Dict], hasta: Optional[datetime] = None,
+                 deltas: int = 0, cerrados: Optional[Union[np.ndarray, Sequence]] = None, marcas: Optional[Dict[str, str]] = None,
+                 filas: Optional[Dict[str, int]] = None, pools: Optional[Dict] = None, esquema: Optional[Dict] = None,
+                 documentos_unicos: bool = False):
+        """
+        seed: semilla de la población (obligatoria para poder regenerar bloques).
+        hoy: fecha de referencia de la ejecución completa.
+        chunk_size: clientes por bloque de la ejecución completa.
+        digitos_identificador: dígitos del identificador de contrato.
+        contador_ids: posición del asignador de cliente_id tras la última ejecución.
+        contador_identificador: siguiente posición libre del espacio de identificadores de contrato.
+        siguiente_bloque: primer índice de bloque sin usar.
+        bloques: bloques de clientes, cada uno con 'bloque', 'posicion', 'n', 'hoy' y, en los de
+            un delta, 'inicio_identificador' y 'delta'.
+        hasta: fin de la última ventana generada (opcional, por defecto hoy).
+        deltas: número de deltas generados.
+        cerrados: identificadores de contrato dados de baja en deltas anteriores (opcional); se guardan
+            como array uint64 ordenado y sin repetidos.
+        marcas: fecha máxima emitida por tabla (opcional).
+        filas: filas emitidas por tabla en los deltas (opcional).
+        pools: tamano y seed de los pools de Faker de la ejecución completa (opcional, None si no se usaron).
+        esquema: variante del esquema de distribuciones de la ejecución completa (opcional, None para el escenario por defecto).
+        documentos_unicos: si la ejecución completa generó cod_docum únicos (las altas siguen sin repetirlos).
+        """
+        if seed is None:
+            raise ValueError("La generación incremental necesita una semilla fija")
+        self.seed = seed
+        self.hoy = hoy
+        self.chunk_size = chunk_size
+        self.digitos_identificador = digitos_identificador
+        self.contador_ids = contador_ids
+        self.contador_identificador = contador_identificador
+        self.siguiente_bloque = siguiente_bloque
+        self.bloques = bloques
+        self.hasta = hasta or hoy
+        self.deltas = deltas
+        self.cerrados = np.unique(np.asarray(cerrados if cerrados is not None else [], dtype=np.uint64))
+        self.marcas = marcas or {}
+        self.filas = filas or {}
+        self.pools = pools
+        self.esquema = esquema
+        self.documentos_unicos = documentos_unicos
+
+    @classmethod
+    def desde_main(cls, main) -> "EstadoIncremental":
+        """
+        Crea el estado de la población que genera una instancia de Main (con la misma
+        disposición de bloques e IDs que Main.stream() y Main.write_stream()).
+        """
+        paso = math.ceil(main.chunk_size / paralelo.TAMANO_SHARD)
+        bloques = [
+            {"bloque": k * paso, "posicion": k * main.chunk_size, "n": n, "hoy": main.hoy.isoformat()}
+            for k, n in enumerate(main._tamanos_bloque(main.n_clientes))
+        ]
+        # Como en Main.stream(): un último bloque unido al anterior puede ocupar sus shards
+        siguiente_bloque = math.ceil(main.n_clientes / main.chunk_size) * paso
+        return cls(
+            seed=main.seed, hoy=main.hoy, chunk_size=main.chunk_size,
+            digitos_identificador=digitos_necesarios(siguiente_bloque),
+            contador_ids=main.n_clientes + main.n_exclientes,
+            contador_identificador=siguiente_bloque * ContratosFaker.CONTRATOS_POR_SHARD,
+            siguiente_bloque=siguiente_bloque, bloques=bloques,
+            pools={"tamano": main.pools.tamano, "seed": main.pools.seed} if main.pools else None,
+            esquema=main.esquema, documentos_unicos=main.documentos_unicos,
+        )
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "EstadoIncremental":
+        """
+        Lee el manifiesto de un fichero JSON.
+        """
+        with open(ruta) as f:
+            datos = json.load(f)
+        version = datos.pop("version")
+        if version == 1:  # cerrados como lista de identificadores en texto
+            datos["cerrados"] = [int(identificador) for identificador in datos["cerrados"]]
+        elif version == VERSION:
+            datos["cerrados"] = _decodificar_cerrados(datos["cerrados"])
+        else:
+            raise ValueError(f"Versión de manifiesto no soportada en {ruta}")
+        for campo in ("hoy", "hasta"):
+            datos[campo] = datetime.fromisoformat(datos[campo])
+        return cls(**datos)
+
+    def guardar(self, ruta: str):
+        """
+        Guarda el manifiesto como JSON (escritura atómica).
+        """
+        datos = {"version": VERSION, **vars(self), "hoy": self.hoy.isoformat(), "hasta": self.hasta.isoformat(),
+                 "cerrados": _codificar_cerrados(self.cerrados)}
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w") as f:
+            json.dump(datos, f, indent=1)
+        os.replace(temporal, ruta)
+
+    @property
+    def n_clientes(self) -> int:
+        """
+        Clientes activos (población de partida más altas de los deltas).
+        """
+        return sum(b["n"] for b in self.bloques)
+
+class DeltaFaker:
+    """
+    Generador del delta de una ventana de días a partir de un EstadoIncremental, que actualiza.
+    Cada delta usa sus propios flujos aleatorios (clave 'delta/<tabla>' y número de delta),
+    así que repetir un delta con el mismo manifiesto da el mismo resultado.
+    """
+    def __init__(self, estado: EstadoIncremental, dias: int = 1, n_clientes_nuevos: Optional[int] = None,
+                 pools: Optional[pools_faker.PoolsFaker] = None):
+        """
+        estado: manifiesto de la población; se actualiza al terminar.
+        dias: días de la ventana, que empieza donde terminó la anterior.
+        n_clientes_nuevos: altas de clientes en la ventana (opcional, por defecto según TASA_ALTAS).
+        pools: pools de valores de Faker (opcional, por defecto se construyen con los parámetros del
+            manifiesto); para regenerar bloques deben ser equivalentes a los de la ejecución completa.
+        """
+        self.estado = estado
+        self.numero = estado.deltas + 1
+        self.desde = estado.hasta
+        self.hasta = estado.hasta + timedelta(days=dias)
+        self.dias = dias
+        if pools is None and estado.pools:
+            pools = pools_faker.PoolsFaker(**estado.pools)
+        self.pools = pools
+        self.esquema = estado.esquema
+        self.tasas = tasas_diarias(estado.esquema)
+        self.rng = semillas.generador(estado.seed, "delta", self.numero)
+        self.asignador = ids.AsignadorIds(estado.seed, "cliente_id")
+        # Bloque de las altas de la ventana (None si no hay altas)
+        self.alta: Optional[Dict] = None
+        n_existentes = estado.n_clientes
+        if n_clientes_nuevos is None:
+            n_clientes_nuevos = int(self.rng.poisson(n_existentes * TASA_ALTAS * dias))
+        logger.info(f"Generando delta {self.numero} ({self.desde} - {self.hasta})...")
+        with metricas.etapa("total", generador="delta") as etapa:
+            self.tablas = self._generar_altas(n_clientes_nuevos)
+            # Envíos, bloqueos y bajas sobre toda la población, incluidas las altas de la ventana
+            self.tablas["contratos_bajas"] = self._generar_bajas(n_existentes)
+            self.tablas["envios"] = self._generar_envios()
+            self.tablas["cuentas_bloqueadas"] = self._generar_bloqueos()
+            etapa.filas = sum(len(df) for df in self.tablas.values())
+        self._actualizar_estado()
+        logger.info(f"Delta {self.numero} generado: {etapa.filas} filas")
+
+    def _ventana(self, unidad: str = "D"):
+        """
+        Inicio y fin (incluido) de la ventana en la unidad indicada.
+        """
+        fin = fechas.a_datetime64(self.hasta, "s") - np.timedelta64(1, "s")
+        return fechas.a_datetime64(self.desde, unidad), fin.astype(f"datetime64[{unidad}]")
+
+    def _generar_altas(self, n: int) -> Dict[str, pd.DataFrame]:
+        """
+        Genera las altas de clientes como un bloque nuevo, con sus contratos, contactos y direcciones.
+        """
+        estado = self.estado
+        if n == 0:
+            return {}
+        rng = semillas.generador(estado.seed, "delta/altas", self.numero)
+        posicion = estado.contador_ids
+        self.asignador.contador = posicion
+        cliente_ids = self.asignador.asignar_texto(n)
+        bloque = estado.siguiente_bloque
+        clientes = ClientesFaker(cliente_ids=cliente_ids, seed=estado.seed, hoy=self.hasta, bloque=bloque, pools=self.pools,
+                                 esquema=self.esquema, documentos_unicos=estado.documentos_unicos).get_clientes()
+        # Alta de cliente dentro de la ventana
+        desde, fin = self._ventana()
+        f_cli = fechas.fechas_entre(rng, desde, fin, size=n)
+        clientes["fecha_cliente"] = fechas.formatear(f_cli)
+
+        contratos = ContratosFaker(clientes, seed=estado.seed, hoy=self.hasta, bloque=bloque,
+                                   digitos_identificador=estado.digitos_identificador,
+                                   inicio_identificador=estado.contador_identificador, esquema=self.esquema).get_contratos()
+        # Contratos nuevos: activos, con alta entre el alta de su cliente y el fin de la ventana
+        alta_cliente = pd.Series(f_cli, index=clientes["cliente_id"]).reindex(contratos["cliente_id"]).to_numpy()
+        contratos["fecha_alta_contrato"] = fechas.formatear(fechas.fechas_entre(rng, alta_cliente, fin))
+        contratos["fecha_baja_contrato"] = fechas.formatear(np.full(len(contratos), fechas.CENTINELA))
+        contratos["situacion_actividad"] = "Activa"
+
+        self.alta = {
+            "bloque": bloque, "posicion": posicion, "n": n, "hoy": self.hasta.isoformat(),
+            "inicio_identificador": estado.contador_identificador, "delta": self.numero,
+        }
+        return {
+            "clientes": clientes,
+            "contratos": contratos,
+            "contactos": ContactosFaker(clientes, seed=estado.seed, hoy=self.hasta, bloque=bloque, pools=self.pools,
+                                        esquema=self.esquema).get_contactos(),
+            "direcciones": DireccionesFaker(clientes, seed=estado.seed, bloque=bloque, pools=self.pools,
+                                            esquema=self.esquema).get_direcciones(),
+        }
+
+    def _generar_bajas(self, n_existentes: int) -> pd.DataFrame:
+        """
+        Da de baja contratos activos repartidos entre los bloques de clientes en proporción a su tamaño;
+        solo se regeneran, de forma determinista, los bloques que reciben alguna baja.
+        """
+        estado = self.estado
+        rng = semillas.generador(estado.seed, "delta/contratos_bajas", self.numero)
+        columnas = ["identificador", "cliente_id", "fecha_baja_contrato", "situacion_actividad"]
+        n_activos = ContratosFaker.estimar_filas(n_existentes, esquema=self.esquema) * PROPORCION_ACTIVOS
+        n_bajas = int(rng.poisson(n_activos * TASA_BAJAS_CONTRATO * self.dias))
+        if n_bajas == 0 or not estado.bloques:
+            return pd.DataFrame(columns=columnas)
+        tamanos = np.array([b["n"] for b in estado.bloques], dtype=float)
+        partes = []
+        for entrada, n in zip(estado.bloques, rng.multinomial(n_bajas, tamanos / tamanos.sum())):
+            if n == 0:
+                continue
+            with metricas.etapa("regenerar_bloque", generador="delta") as etapa:
+                activos = self._contratos_activos(entrada)
+                etapa.filas = len(activos)
+            activos = activos[~np.isin(activos["identificador"].to_numpy().astype(np.uint64), estado.cerrados)]
+            n = min(n, len(activos))
+            partes.append(activos.iloc[np.sort(rng.choice(len(activos), n, replace=False))])
+        bajas = pd.concat(partes, ignore_index=True)
+        n_bajas = len(bajas)
+        desde, fin = self._ventana()
+        return pd.DataFrame({
+            "identificador": bajas["identificador"],
+            "cliente_id": bajas["cliente_id"],
+            "fecha_baja_contrato": fechas.formatear(fechas.fechas_entre(rng, desde, fin, size=n_bajas)),
+            "situacion_actividad": rng.choice([s for s in ContratosFaker.plan_contratos(self.esquema).valores("situacion_actividad")
+                                               if s != "Activa"], size=n_bajas),
+        }, columns=columnas)
+
+    def _contratos_activos(self, entrada: Dict) -> pd.DataFrame:
+        """
+        Regenera los contratos de un bloque de clientes y devuelve los activos. Los clientes del bloque
+        también se regeneran, porque los contratos siguen su orden (desordenado) en la tabla de clientes.
+        """
+        estado = self.estado
+        hoy = datetime.fromisoformat(entrada["hoy"])
+        self.asignador.contador = entrada["posicion"]
+        clientes = ClientesFaker(cliente_ids=self.asignador.asignar_texto(entrada["n"]), seed=estado.seed, hoy=hoy,
+                                 bloque=entrada["bloque"], pools=self.pools, esquema=self.esquema,
+                                 documentos_unicos=estado.documentos_unicos).get_clientes()[["cliente_id"]]
+        contratos = ContratosFaker(clientes, seed=estado.seed, hoy=hoy,
+                                   bloque=entrada["bloque"], digitos_identificador=estado.digitos_identificador,
+                                   inicio_identificador=entrada.get("inicio_identificador"), esquema=self.esquema).get_contratos()
+        if entrada.get("delta") is not None:
+            return contratos  # los contratos de las altas nacen activos
+        return contratos[contratos["situacion_actividad"] == "Activa"]
+
+    def _clientes_al_azar(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """
+        Elige n cliente_id al azar entre los bloques de clientes, a partir de su posición en el asignador.
+        """
+        bloques = self.estado.bloques + ([self.alta] if self.alta else [])
+        tamanos = np.array([b["n"] for b in bloques], dtype=np.int64)
+        posiciones = np.array([b["posicion"] for b in bloques], dtype=np.int64)
+        limites = np.cumsum(tamanos)
+        r = rng.integers(0, limites[-1], size=n)
+        i = np.searchsorted(limites, r, side="right")
+        desplazamiento = r - (limites[i] - tamanos[i])
+        return np.asarray(self.asignador.texto(self.asignador.permutar((posiciones[i] + desplazamiento).astype(np.uint64))), dtype=object)
+
+    def _generar_envios(self) -> pd.DataFrame:
+        """
+        Genera los envíos de la ventana entre clientes elegidos al azar de toda la población.
+        """
+        rng = semillas.generador(self.estado.seed, "delta/envios", self.numero)
+        n_clientes = self.estado.n_clientes + (self.alta["n"] if self.alta else 0)
+        total = int(rng.poisson(n_clientes * self.tasas["envios"] * self.dias)) if n_clientes >= 2 else 0
+        origen = self._clientes_al_azar(rng, total)
+        destino = self._clientes_al_azar(rng, total)
+        # Si coinciden, se vuelve a elegir el destino
+        iguales = origen == destino
+        while iguales.any():
+            destino[iguales] = self._clientes_al_azar(rng, int(iguales.sum()))
+            iguales = origen == destino
+        desde, fin = self._ventana("s")
+        fecha_hora_envio = np.sort(fechas.fechas_entre(rng, desde, fin, size=total, unidad="s"))
+        plan = esquemas.plan("envios", self.esquema)
+        return pd.DataFrame({
+            "cliente_origen_id": origen,
+            "cliente_destino_id": destino,
+            "valor_envio": np.round(rng.uniform(plan.importes["minimo"], plan.importes["maximo"], size=total), 2),
+            "fecha_hora_envio": fechas.formatear(fecha_hora_envio, "s"),
+            "motivo_envio": plan.muestrear("motivo_envio", rng, total),
+        })
+
+    def _generar_bloqueos(self) -> pd.DataFrame:
+        """
+        Genera las cuentas bloqueadas en la ventana, sobre clientes elegidos al azar.
+        """
+        rng = semillas.generador(self.estado.seed, "delta/cuentas_bloqueadas", self.numero)
+        n = int(rng.poisson(self.estado.n_clientes * self.tasas["cuentas_bloqueadas"] * self.dias))
+        if n == 0:
+            return pd.DataFrame(columns=["cliente_id", "tipo_fraude", "estado_fraude", "fecha_inclusion", "fecha_bloqueo", "motivo"])
+        clientes = pd.DataFrame({"cliente_id": pd.unique(self._clientes_al_azar(rng, n))})
+        return CuentasBloqueadasFaker(clientes, seed=self.estado.seed, hoy=self.hasta - timedelta(seconds=1),
+                                      bloque=self.numero, proporcion=1.0, desde=self.desde, esquema=self.esquema).get_cuentas_bloqueadas()
+
+    def _actualizar_estado(self):
+        """
+        Avanza el manifiesto: contadores, bloque de altas, contratos cerrados y marcas de agua.
+        """
+        estado = self.estado
+        if self.alta:
+            estado.bloques.append(self.alta)
+            estado.contador_ids += self.alta["n"]
+            # ContratosFaker reserva un rango de CONTRATOS_POR_SHARD identificadores por shard de altas
+            shards = math.ceil(self.alta["n"] / paralelo.TAMANO_SHARD)
+            estado.contador_identificador += shards * ContratosFaker.CONTRATOS_POR_SHARD
+            estado.siguiente_bloque += shards
+        cerrados = self.tablas["contratos_bajas"]["identificador"].to_numpy().astype(np.uint64)
+        estado.cerrados = np.union1d(estado.cerrados, cerrados)
+        for tabla, df in self.tablas.items():
+            estado.filas[tabla] = estado.filas.get(tabla, 0) + len(df)
+            if len(df):
+                estado.marcas[tabla] = self.hasta.isoformat()
+        estado.hasta = self.hasta
+        estado.deltas = self.numero
+
+    def get_tablas(self) -> Dict[str, pd.DataFrame]:
+        """
+        Devuelve las tablas del delta.
+        """
+        return self.tablas
+
+def _codificar_cerrados(cerrados: np.ndarray) -> str:
+    """
+    Codifica identificadores ordenados como diferencias uint64 comprimidas con zlib, en base64.
+    """
+    diferencias = np.diff(cerrados, prepend=np.uint64(0)).astype("<u8")
+    return base64.b64encode(zlib.compress(diferencias.tobytes())).decode("ascii")
+
+def _decodificar_cerrados(texto: str) -> np.ndarray:
+    """
+    Inversa de _codificar_cerrados.
+    """
+    return np.cumsum(np.frombuffer(zlib.decompress(base64.b64decode(texto)), dtype="<u8"), dtype=np.uint64)
+
+def generar_delta(estado: EstadoIncremental, dias: int = 1, out_dir: str = "./data/out", formato: str = "csv",
+                  opciones_escritor: Optional[Dict] = None, n_clientes_nuevos: Optional[int] = None,
+                  pools: Optional[pools_faker.PoolsFaker] = None) -> str:
+    """
+    Genera el delta de la siguiente ventana, lo escribe en out_dir/delta_NNNN y actualiza el estado
+    (sin guardarlo). Devuelve la carpeta del delta.
+    """
+    delta = DeltaFaker(estado, dias=dias, n_clientes_nuevos=n_clientes_nuevos, pools=pools)
+    carpeta = os.path.join(out_dir, f"delta_{delta.numero:04d}")
+    os.makedirs(carpeta, exist_ok=True)
+    escritor = escritores.crear_escritor(formato, carpeta, **(opciones_escritor or {}))
+    escritores.escribir_tablas(escritor, {tabla: df for tabla, df in delta.get_tablas().items() if len(df)})
+    return carpeta
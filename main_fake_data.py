@@ -1,40 +1,375 @@
+import logging
+import math
+import os
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+import cache
+import compacto
+import escritores
+import esquemas
+import fechas
+import ids
+import metricas
+import paralelo
+import pools_faker
 from fake_clientes import ClientesFaker
-from fake_contratos import ContratosFaker
+from fake_contratos import ContratosFaker, digitos_necesarios
 from fake_contactos import ContactosFaker
 from fake_direcciones import DireccionesFaker
 from fake_exclientes import ExClientesFaker
 from fake_envios import EnviosFaker
 from fake_cuentas_bloqueadas import CuentasBloqueadasFaker
 
+# Clientes por bloque de stream() si no se indica chunk_size; fijo para que la salida no dependa de workers
+CHUNK_SIZE_DEFECTO = 10_000
+# Tamaño mínimo del último bloque: uno menor se une al anterior (los envíos necesitan dos clientes)
+MIN_BLOQUE = 2
+
+# Tablas que necesita cada tabla para generarse, en el orden en que se escriben
+DEPENDENCIAS = {
+    "clientes": [],
+    "contratos": ["clientes"],
+    "contactos": ["clientes"],
+    "direcciones": ["clientes"],
+    "envios": ["clientes"],
+    "cuentas_bloqueadas": ["clientes"],
+    "exclientes": [],
+}
+TABLAS = list(DEPENDENCIAS)
+
+def tablas_necesarias(seleccion: Iterable[str]) -> Set[str]:
+    """
+    Devuelve las tablas seleccionadas junto con todas las que necesitan para generarse.
+    """
+    necesarias: Set[str] = set()
+    pendientes = list(seleccion)
+    while pendientes:
+        tabla = pendientes.pop()
+        if tabla not in DEPENDENCIAS:
+            raise ValueError(f"Tabla desconocida: {tabla}. Opciones: {', '.join(TABLAS)}")
+        if tabla not in necesarias:
+            necesarias.add(tabla)
+            pendientes.extend(DEPENDENCIAS[tabla])
+    return necesarias
+
 class Main:
     """
     Clase principal para generar y guardar los datos falsos.
     """
+    def __init__(self, n_clientes: int = 10000, n_exclientes: int = 2000, chunk_size: Optional[int] = None,
+                 seed: Optional[int] = None, workers: int = 1, out_dir: str = "./data/out",
+                 pools: Optional[pools_faker.PoolsFaker] = None, formato: str = "csv",
+                 opciones_escritor: Optional[Dict] = None, seleccion: Optional[Sequence[str]] = None,
+                 compacta: bool = False, hoy: Optional[datetime] = None, esquema: Optional[Dict] = None,
+                 documentos_unicos: bool = False):
+        """
+        n_clientes: número de clientes a generar.
+        n_exclientes: número de exclientes a generar.
+        chunk_size: número de clientes por bloque (opcional). Sin él, read() genera la población
+            completa como un único bloque y stream() usa bloques de CHUNK_SIZE_DEFECTO.
+        seed: semilla para reproducibilidad (opcional).
+        workers: número de procesos que generan bloques en paralelo.
+        out_dir: carpeta de salida de los ficheros.
+        pools: pools de valores de Faker compartidos por los generadores (opcional).
+        formato: formato de salida ('csv', 'parquet', 'arrow', 'feather' o 'sqlite').
+        opciones_escritor: opciones del escritor, p. ej. {"compression": "zstd", "particiones": {...}} (opcional).
+        seleccion: tablas a generar (opcional, por defecto todas); solo se generan estas y las que necesitan.
+        compacta: si es True, las tablas se guardan en memoria con tipos compactos (IDs uint32, códigos
+            categóricos y fechas datetime64); la salida escrita es la misma.
+        hoy: fecha y hora de referencia (opcional, por defecto hoy a las 00:00); fijarla junto con
+            seed hace la salida reproducible entre días.
+        esquema: variante del esquema de distribuciones, con solo lo que cambia respecto a
+            esquemas.ESQUEMA (opcional); se valida aquí, antes de generar.
+        documentos_unicos: si es True, cod_docum no se repite entre clientes y exclientes (necesita seed).
+        """
+        self.n_clientes = n_clientes
+        self.n_exclientes = n_exclientes
+        self.chunk_size = chunk_size or CHUNK_SIZE_DEFECTO
+        self.por_bloques = chunk_size is not None
+        self.seed = seed
+        self.workers = workers
+        self.out_dir = out_dir
+        self.pools = pools
+        self.formato = formato
+        self.opciones_escritor = opciones_escritor or {}
+        escritores.validar_opciones(formato, self.opciones_escritor)
+        # Tablas que se devuelven y tablas que hay que generar para obtenerlas
+        self.necesarias = tablas_necesarias(seleccion or TABLAS)
+        self.compacta = compacta
+        self.seleccion = [t for t in TABLAS if t in set(seleccion or TABLAS)]
+        self.hoy = hoy or fechas.hoy()
+        esquemas.validar(esquema)
+        ContratosFaker.plan_contratos(esquema)
+        self.esquema = esquema
+        if documentos_unicos and seed is None:
+            raise ValueError("documentos_unicos necesita seed: todos los bloques deben usar la misma permutación")
+        self.documentos_unicos = documentos_unicos
+
     def read(self):
         """
-        Genera los datos falsos.
+        Genera los datos falsos: la población completa como un único bloque o, con chunk_size,
+        por bloques como stream(). Con una caché activa (cache.usar o FAKEBIZ_CACHE) y semilla fijada,
+        las tablas ya generadas con los mismos parámetros se cargan de la caché.
+        """
+        with metricas.etapa("read", generador="main") as etapa:
+            self.tablas = self._leer_cache()
+            if self.tablas is None:
+                partes: Dict[str, List[pd.DataFrame]] = defaultdict(list)
+                # Los bloques no se guardan por separado en la caché: se guardan las tablas completas
+                # Sin chunk_size, un único bloque: los destinos de los envíos se eligen en toda la población
+                tamano = self.chunk_size if self.por_bloques else max(self.n_clientes, self.n_exclientes, 1)
+                with cache.suspendida():
+                    for tabla, df in self.stream(tamano_bloque=tamano):
+                        partes[tabla].append(df)
+                self.tablas = {tabla: compacto.concatenar(dfs) for tabla, dfs in partes.items()}
+                self._guardar_cache()
+            etapa.filas = sum(len(df) for df in self.tablas.values())
+
+    def write(self, escritor: Optional[escritores.EscritorCSV] = None):
+        """
+        Guarda los datos generados en el formato de salida, escribiendo las tablas a la vez.
+        escritor: escritor de destino en lugar del del formato, p. ej. un EscritorBD (opcional).
+        """
+        with metricas.etapa("write", generador="main") as etapa:
+            escritores.escribir_tablas(escritor or self._escritor(), self.tablas)
+            etapa.filas = sum(len(df) for df in self.tablas.values())
+
+    def stream(self, bloque_inicial: int = 0, tamano_bloque: Optional[int] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Genera los datos por bloques de chunk_size clientes y devuelve pares (tabla, DataFrame)
+        de las tablas seleccionadas, empezando por el bloque bloque_inicial de cada población
+        (los bloques anteriores no se generan, pero sus IDs se reservan igual).
+        Las tablas dependientes usan solo el bloque de clientes correspondiente, por lo que
+        los destinos de los envíos se eligen dentro del mismo bloque. Cada bloque tiene su
+        propio generador aleatorio, así que el resultado es el mismo con cualquier número de workers.
+        tamano_bloque: clientes por bloque en lugar de chunk_size (opcional).
+        """
+        tamano = tamano_bloque or self.chunk_size
+        # Índice de bloque de filas en unidades de TAMANO_SHARD, para que cada shard tenga su propio flujo
+        paso = math.ceil(tamano / paralelo.TAMANO_SHARD)
+        # Los IDs de clientes y exclientes salen, bloque a bloque, de un único asignador en el
+        # proceso principal, así que las dos poblaciones no comparten IDs
+        asignador = ids.AsignadorIds(self.seed, "cliente_id")
+        # Mismo ancho de identificador de contrato en todos los bloques
+        digitos = digitos_necesarios(math.ceil(self.n_clientes / tamano) * paso)
+        # Con un único bloque por población, los workers reparten los shards dentro del bloque
+        unico = tamano >= max(self.n_clientes, self.n_exclientes)
+        workers_bloque, workers = (self.workers, 1) if unico else (1, self.workers)
+
+        dependientes = tuple(t for t in self.seleccion if t in GENERADORES_DEPENDIENTES)
+
+        def tareas():
+            if "clientes" in self.necesarias:
+                for k, n in enumerate(self._tamanos_bloque(self.n_clientes, tamano)):
+                    if k < bloque_inicial:
+                        asignador.saltar(n)
+                        continue
+                    yield (self.compacta, _generar_bloque_clientes, asignador.asignar_texto(n), self.seed, k * paso, self.hoy, self.pools,
+                           self.esquema, digitos, "clientes" in self.seleccion, dependientes, self.documentos_unicos, workers_bloque)
+            else:
+                # Los exclientes reciben los mismos IDs que si se hubieran generado los clientes
+                asignador.saltar(self.n_clientes)
+            if "exclientes" in self.necesarias:
+                for k, n in enumerate(self._tamanos_bloque(self.n_exclientes, tamano)):
+                    if k < bloque_inicial:
+                        asignador.saltar(n)
+                        continue
+                    yield (self.compacta, _generar_bloque_exclientes, asignador.asignar_texto(n), self.seed, k * paso, self.hoy, self.pools,
+                           self.esquema, self.documentos_unicos, workers_bloque)
+
+        for resultado in paralelo.ejecutar(_generar_bloque, tareas(), workers):
+            yield from resultado
+
+    def write_stream(self, escritor: Optional[escritores.EscritorCSV] = None):
         """
-        self.clientes = ClientesFaker(n_clientes=10000)
-        self.contratos = ContratosFaker(self.clientes)
-        self.contactos = ContactosFaker(self.clientes)
-        self.direcciones = DireccionesFaker(self.clientes)
-        self.exclientes = ExClientesFaker(n_exclientes=2000)
-        self.envios = EnviosFaker(self.clientes)
-        self.cuentas_bloqueadas = CuentasBloqueadasFaker(self.clientes)
+        Genera y guarda los datos bloque a bloque, sin mantener las tablas completas en memoria.
+        escritor: escritor de destino en lugar del del formato, p. ej. un EscritorBD (opcional).
+        """
+        with metricas.etapa("write_stream", generador="main") as etapa:
+            with escritores.EscrituraConcurrente(escritor or self._escritor()) as escritura:
+                for tabla, df in self.stream():
+                    escritura.anadir(tabla, df)
+                    etapa.filas += len(df)
 
-    def write(self):
+    def estimar(self, muestra: int = 500) -> pd.DataFrame:
         """
-        Guarda los datos generados en archivos CSV.
+        Estima, sin generar la población, las filas y el tamaño de salida de cada tabla seleccionada.
+        Las filas salen de las distribuciones del esquema y los bytes por fila de una muestra
+        de `muestra` clientes escrita en el formato de salida.
         """
-        self.clientes.get_clientes().to_csv("./data/out/clientes.csv", index=False)
-        self.contratos.get_contratos().to_csv("./data/out/contratos.csv", index=False)
-        self.contactos.get_contactos().to_csv("./data/out/contactos.csv", index=False)
-        self.direcciones.get_direcciones().to_csv("./data/out/direcciones.csv", index=False)
-        self.exclientes.get_exclientes().to_csv("./data/out/exclientes.csv", index=False)
-        self.envios.get_envios().to_csv("./data/out/envios.csv", index=False)
-        self.cuentas_bloqueadas.get_cuentas_bloqueadas().to_csv("./data/out/cuentas_bloqueadas.csv", index=False)
+        filas = {}
+        bloques = list(self._tamanos_bloque(self.n_clientes))
+        por_cliente = {
+            "clientes": lambda n: n,
+            "contratos": lambda n: ContratosFaker.estimar_filas(n, esquema=self.esquema),
+            "contactos": lambda n: ContactosFaker.estimar_filas(n, esquema=self.esquema),
+            "direcciones": lambda n: DireccionesFaker.estimar_filas(n, esquema=self.esquema),
+            "envios": lambda n: EnviosFaker.estimar_filas(n, esquema=self.esquema),
+            "cuentas_bloqueadas": lambda n: CuentasBloqueadasFaker.estimar_filas(n, esquema=self.esquema),
+        }
+        for tabla in self.seleccion:
+            if tabla == "exclientes":
+                filas[tabla] = self.n_exclientes
+            else:
+                filas[tabla] = sum(por_cliente[tabla](n) for n in bloques)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            ejemplo = Main(n_clientes=muestra, n_exclientes=muestra, seed=self.seed, out_dir=out_dir, formato=self.formato,
+                           opciones_escritor=self.opciones_escritor, seleccion=self.seleccion, esquema=self.esquema)
+            ejemplo.hoy = self.hoy
+            ejemplo.read()
+            escritor = ejemplo._escritor()
+            ejemplo.write(escritor)
+            bytes_fila = {tabla: _tamano(escritor, tabla) / max(1, len(df)) for tabla, df in ejemplo.tablas.items()}
+
+        estimacion = pd.DataFrame({"tabla": list(filas), "filas": [int(round(f)) for f in filas.values()]})
+        estimacion["bytes_por_fila"] = estimacion["tabla"].map(bytes_fila).round(1)
+        estimacion["mb"] = (estimacion["filas"] * estimacion["bytes_por_fila"] / 2**20).round(1)
+        return estimacion
+
+    def _claves_cache(self) -> Optional[Dict[str, str]]:
+        """
+        Claves de caché de las tablas seleccionadas (None sin caché activa o sin semilla).
+        """
+        activa = cache.activa()
+        if activa is None or self.seed is None:
+            return None
+        parametros = {
+            "n_clientes": self.n_clientes, "n_exclientes": self.n_exclientes,
+            "chunk_size": self.chunk_size if self.por_bloques else None,
+            "seed": self.seed, "hoy": self.hoy, "compacta": self.compacta, "pools": cache.parametros_pools(self.pools),
+            "esquema": esquemas.huella(self.esquema), "documentos_unicos": self.documentos_unicos,
+        }
+        return {tabla: activa.clave(f"main_{tabla}", parametros) for tabla in self.seleccion}
+
+    def _leer_cache(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Carga de la caché todas las tablas seleccionadas; None si falta alguna.
+        """
+        claves = self._claves_cache()
+        if claves is None:
+            return None
+        with metricas.etapa("cache", generador="main"):
+            tablas = {}
+            for tabla, clave in claves.items():
+                tablas[tabla] = cache.activa().obtener(clave)
+                if tablas[tabla] is None:
+                    return None
+        return tablas
+
+    def _guardar_cache(self):
+        """
+        Guarda en la caché las tablas generadas.
+        """
+        claves = self._claves_cache()
+        for tabla, clave in (claves or {}).items():
+            cache.activa().guardar(clave, self.tablas[tabla])
+
+    def _escritor(self) -> escritores.EscritorCSV:
+        """
+        Crea el escritor del formato de salida.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        return escritores.crear_escritor(self.formato, self.out_dir, **self.opciones_escritor)
+
+    def bloque_de_fila(self, n: int, fila: int) -> Tuple[int, int]:
+        """
+        Devuelve el bloque de stream() que contiene la fila indicada de una población de n registros
+        y la posición de la fila dentro del bloque.
+        """
+        tamanos = self._tamanos_bloque(n)
+        inicio = 0
+        for k, tamano in enumerate(tamanos):
+            if fila < inicio + tamano:
+                return k, fila - inicio
+            inicio += tamano
+        return len(tamanos), 0
+
+    def _tamanos_bloque(self, n: int, tamano: Optional[int] = None) -> List[int]:
+        """
+        Devuelve el tamaño de cada bloque de chunk_size (o de tamano) para n registros. Un último
+        bloque de menos de MIN_BLOQUE registros se une al anterior.
+        """
+        tamano = tamano or self.chunk_size
+        tamanos = [min(tamano, n - inicio) for inicio in range(0, n, tamano)]
+        if len(tamanos) > 1 and tamanos[-1] < MIN_BLOQUE:
+            ultimo = tamanos.pop()
+            tamanos[-1] += ultimo
+        return tamanos
+
+def _generar_bloque(compacta: bool, funcion, *args) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    Ejecuta la generación de un bloque (función de nivel de módulo para poder enviarla a otro proceso).
+    Si compacta es True, las tablas se compactan en el propio worker, antes de devolverlas.
+    """
+    resultado = funcion(*args)
+    if compacta:
+        with metricas.etapa("compactar", generador="main") as etapa:
+            resultado = [(tabla, compacto.compactar(df)) for tabla, df in resultado]
+            etapa.filas = sum(len(df) for _, df in resultado)
+    return resultado
+
+# Generadores de las tablas que dependen de un bloque de clientes
+GENERADORES_DEPENDIENTES = {
+    "contratos": lambda clientes, seed, bloque, hoy, pools, esquema, digitos, workers: ContratosFaker(
+        clientes, seed=seed, hoy=hoy, workers=workers, bloque=bloque, digitos_identificador=digitos, esquema=esquema).get_contratos(),
+    "contactos": lambda clientes, seed, bloque, hoy, pools, esquema, digitos, workers: ContactosFaker(
+        clientes, seed=seed, hoy=hoy, workers=workers, bloque=bloque, pools=pools, esquema=esquema).get_contactos(),
+    "direcciones": lambda clientes, seed, bloque, hoy, pools, esquema, digitos, workers: DireccionesFaker(
+        clientes, seed=seed, workers=workers, bloque=bloque, pools=pools, esquema=esquema).get_direcciones(),
+    "envios": lambda clientes, seed, bloque, hoy, pools, esquema, digitos, workers: EnviosFaker(
+        clientes, seed=seed, hoy=hoy, bloque=bloque, esquema=esquema).get_envios(),
+    "cuentas_bloqueadas": lambda clientes, seed, bloque, hoy, pools, esquema, digitos, workers: CuentasBloqueadasFaker(
+        clientes, seed=seed, hoy=hoy, bloque=bloque, esquema=esquema).get_cuentas_bloqueadas(),
+}
+
+def _generar_bloque_clientes(cliente_ids: List[str], seed: Optional[int], bloque: int, hoy: datetime,
+                             pools: Optional[pools_faker.PoolsFaker], esquema: Optional[Dict], digitos_identificador: int,
+                             con_clientes: bool = True, tablas: Sequence[str] = tuple(GENERADORES_DEPENDIENTES),
+                             documentos_unicos: bool = False, workers: int = 1) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    Genera un bloque de clientes y las tablas dependientes indicadas; cada tabla usa su propio flujo aleatorio.
+    con_clientes indica si la tabla de clientes se devuelve o solo se usa para las dependientes.
+    workers reparte los shards del bloque entre procesos (solo fuera de un worker).
+    """
+    clientes = ClientesFaker(cliente_ids=cliente_ids, seed=seed, hoy=hoy, workers=workers, bloque=bloque, pools=pools,
+                             esquema=esquema, documentos_unicos=documentos_unicos)
+    resultado = [("clientes", clientes.get_clientes())] if con_clientes else []
+    for tabla in tablas:
+        resultado.append((tabla, GENERADORES_DEPENDIENTES[tabla](clientes, seed, bloque, hoy, pools, esquema, digitos_identificador, workers)))
+    return resultado
+
+def _generar_bloque_exclientes(cliente_ids: List[str], seed: Optional[int], bloque: int, hoy: datetime,
+                               pools: Optional[pools_faker.PoolsFaker], esquema: Optional[Dict],
+                               documentos_unicos: bool = False, workers: int = 1) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    Genera un bloque de exclientes.
+    """
+    exclientes = ExClientesFaker(cliente_ids=cliente_ids, seed=seed, hoy=hoy, workers=workers, bloque=bloque, pools=pools,
+                                 esquema=esquema, documentos_unicos=documentos_unicos)
+    return [("exclientes", exclientes.get_exclientes())]
+
+def _tamano(escritor: escritores.EscritorCSV, tabla: str) -> float:
+    """
+    Bytes que ocupa una tabla escrita, ya sea un fichero, una carpeta particionada o una tabla
+    de SQLite (NaN si SQLite no permite medirla).
+    """
+    if isinstance(escritor, escritores.EscritorSQLite):
+        tamano = escritor.tamano(tabla)
+        return float("nan") if tamano is None else tamano
+    out_dir = escritor.out_dir
+    raiz = os.path.join(out_dir, tabla)
+    if os.path.isdir(raiz):
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(raiz) for f in fs)
+    return sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir) if os.path.splitext(f)[0] == tabla)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main = Main()
     main.read()
-    main.write()
\ No newline at end of file
+    main.write()
@@ -0,0 +1,288 @@
+"""
+Instrumentación de la generación: tiempos, filas, llamadas a Faker y memoria por generador y etapa.
+
+    with metricas.registrar(memoria=True) as m:
+        Main(n_clientes=100_000).write_stream()
+    print(m.resumen())
+    m.a_json("metricas.json")
+    m.a_prometheus("metricas.prom")
+
+Los generadores abren etapas con metricas.etapa(...); sin un registro activo son un contexto vacío.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Registro activo en este proceso (None si no se está instrumentando)
+_activa: Optional["Metricas"] = None
+
+class Etapa:
+    """
+    Etapa en curso de un generador. Quien la abre indica las filas producidas en `filas`.
+    """
+    def __init__(self, metricas: "Metricas", generador: Optional[str], nombre: str):
+        self.metricas = metricas
+        self.generador = generador
+        self.nombre = nombre
+        self.filas = 0
+        self.llamadas_faker = 0
+        self.pico_memoria = 0
+
+    def __enter__(self) -> "Etapa":
+        pila = self.metricas._pila()
+        padre = pila[-1] if pila else None
+        if self.generador is None:
+            self.generador = padre.generador if padre else ""
+        if self.metricas.memoria:
+            self._propagar_pico(padre)
+        # Una etapa dentro de otra igual (p. ej. los shards de un generador) no se registra
+        # aparte para no contar dos veces su tiempo
+        self.reentrante = any(e.generador == self.generador and e.nombre == self.nombre for e in pila)
+        pila.append(self)
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self._t0
+        pila = self.metricas._pila()
+        pila.pop()
+        padre = pila[-1] if pila else None
+        if self.metricas.memoria:
+            self._propagar_pico(self)
+            if padre is not None:
+                padre.pico_memoria = max(padre.pico_memoria, self.pico_memoria)
+        if padre is not None:
+            padre.llamadas_faker += self.llamadas_faker
+        if self.reentrante:
+            return
+        registro = {
+            "generador": self.generador,
+            "etapa": self.nombre,
+            "inicio": self.inicio,
+            "fin": self.inicio + segundos,
+            "segundos": segundos,
+            "filas": int(self.filas),
+            "filas_por_segundo": self.filas / segundos if segundos > 0 else None,
+            "llamadas_faker": self.llamadas_faker,
+            "pico_rss_mb": _pico_rss() / 2**20,
+            "pid": os.getpid(),
+        }
+        if self.metricas.memoria:
+            registro["pico_memoria_mb"] = self.pico_memoria / 2**20
+        self.metricas._registrar(registro)
+
+    def _propagar_pico(self, destino: Optional["Etapa"]):
+        """
+        Anota en destino el pico de tracemalloc desde la última lectura y reinicia el pico.
+        """
+        if destino is not None:
+            destino.pico_memoria = max(destino.pico_memoria, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+class _EtapaNula:
+    """
+    Etapa sin efecto, usada cuando no hay registro activo.
+    """
+    filas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NULA = _EtapaNula()
+
+class Metricas:
+    """
+    Registro de las etapas terminadas. Admite callbacks que reciben cada registro al terminar
+    la etapa y, opcionalmente, perfila con cProfile y mide la memoria con tracemalloc.
+    """
+    def __init__(self, perfil: bool = False, memoria: bool = False):
+        """
+        perfil: activa cProfile mientras el registro está activo.
+        memoria: mide el pico de memoria de cada etapa con tracemalloc (más lento).
+        """
+        self.perfil = cProfile.Profile() if perfil else None
+        self.memoria = memoria
+        self.registros: List[Dict[str, Any]] = []
+        self._callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def suscribir(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Registra una función a la que se llama con cada etapa terminada.
+        """
+        self._callbacks.append(callback)
+
+    def etapa(self, nombre: str, generador: Optional[str] = None) -> Etapa:
+        """
+        Abre una etapa; sin generador hereda el de la etapa que la contiene.
+        """
+        return Etapa(self, generador, nombre)
+
+    def contar_faker(self, n: int = 1):
+        """
+        Suma llamadas a Faker a la etapa en curso.
+        """
+        pila = self._pila()
+        if pila:
+            pila[-1].llamadas_faker += n
+
+    def incorporar(self, registros: List[Dict[str, Any]]):
+        """
+        Añade registros tomados en otro proceso. Los de etapas que aquí siguen abiertas se
+        descartan, como las etapas reentrantes, y sus llamadas a Faker pasan a la etapa en curso.
+        """
+        pila = self._pila()
+        abiertas = {(e.generador, e.nombre) for e in pila}
+        for registro in registros:
+            if (registro["generador"], registro["etapa"]) in abiertas:
+                pila[-1].llamadas_faker += registro["llamadas_faker"]
+            else:
+                self._registrar(registro)
+
+    def resumen(self) -> pd.DataFrame:
+        """
+        Agrega los registros por generador y etapa.
+        """
+        df = pd.DataFrame(self.registros)
+        if df.empty:
+            return df
+        resumen = df.groupby(["generador", "etapa"], sort=False).agg(
+            veces=("segundos", "size"),
+            segundos=("segundos", "sum"),
+            filas=("filas", "sum"),
+            llamadas_faker=("llamadas_faker", "sum"),
+            pico_rss_mb=("pico_rss_mb", "max"),
+        )
+        resumen["filas_por_segundo"] = (resumen["filas"] / resumen["segundos"]).where(resumen["segundos"] > 0)
+        return resumen.sort_values("segundos", ascending=False)
+
+    def a_json(self, ruta: str):
+        """
+        Guarda los registros en un fichero JSON.
+        """
+        with open(ruta, "w") as f:
+            json.dump({"registros": self.registros}, f, indent=2)
+
+    def a_prometheus(self, ruta: str, prefijo: str = "fakebiz"):
+        """
+        Guarda el resumen en formato textfile de Prometheus (para el node_exporter).
+        """
+        resumen = self.resumen()
+        metricas = [
+            ("etapa_segundos_total", "counter", "Segundos dedicados a la etapa", "segundos"),
+            ("etapa_filas_total", "counter", "Filas producidas por la etapa", "filas"),
+            ("etapa_llamadas_faker_total", "counter", "Llamadas a Faker de la etapa", "llamadas_faker"),
+            ("etapa_pico_rss_bytes", "gauge", "Pico de memoria residente al terminar la etapa", "pico_rss_mb"),
+        ]
+        lineas = []
+        for nombre, tipo, ayuda, columna in metricas:
+            lineas.append(f"# HELP {prefijo}_{nombre} {ayuda}")
+            lineas.append(f"# TYPE {prefijo}_{nombre} {tipo}")
+            for (generador, etapa), fila in resumen.iterrows():
+                valor = fila[columna] * 2**20 if columna == "pico_rss_mb" else fila[columna]
+                lineas.append(f'{prefijo}_{nombre}{{generador="{generador}",etapa="{etapa}"}} {valor}')
+        # Se escribe a un temporal y se renombra para que el exporter no lea ficheros a medias
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w") as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(temporal, ruta)
+
+    def perfil_texto(self, n: int = 30, orden: str = "cumulative") -> str:
+        """
+        Devuelve las n funciones con más tiempo según cProfile (requiere perfil=True).
+        """
+        if self.perfil is None:
+            return ""
+        salida = io.StringIO()
+        pstats.Stats(self.perfil, stream=salida).sort_stats(orden).print_stats(n)
+        return salida.getvalue()
+
+    def _registrar(self, registro: Dict[str, Any]):
+        with self._lock:
+            self.registros.append(registro)
+        for callback in self._callbacks:
+            callback(registro)
+
+    def _pila(self) -> List[Etapa]:
+        """
+        Pila de etapas abiertas del hilo actual.
+        """
+        if not hasattr(self._local, "pila"):
+            self._local.pila = []
+        return self._local.pila
+
+@contextmanager
+def registrar(perfil: bool = False, memoria: bool = False, metricas: Optional[Metricas] = None) -> Iterator[Metricas]:
+    """
+    Activa un registro de métricas mientras dura el bloque with y lo devuelve.
+    """
+    global _activa
+    registro = metricas or Metricas(perfil=perfil, memoria=memoria)
+    anterior, _activa = _activa, registro
+    iniciar_tracemalloc = registro.memoria and not tracemalloc.is_tracing()
+    if iniciar_tracemalloc:
+        tracemalloc.start()
+    if registro.perfil is not None:
+        registro.perfil.enable()
+    try:
+        yield registro
+    finally:
+        if registro.perfil is not None:
+            registro.perfil.disable()
+        if iniciar_tracemalloc:
+            tracemalloc.stop()
+        _activa = anterior
+
+def activa() -> Optional[Metricas]:
+    """
+    Devuelve el registro activo, si lo hay.
+    """
+    return _activa
+
+def etapa(nombre: str, generador: Optional[str] = None):
+    """
+    Abre una etapa en el registro activo; sin registro no hace nada.
+    """
+    if _activa is None:
+        return _NULA
+    return _activa.etapa(nombre, generador)
+
+def contar_faker(n: int = 1):
+    """
+    Suma n llamadas a Faker a la etapa en curso del registro activo.
+    """
+    if _activa is not None:
+        _activa.contar_faker(n)
+
+def registrando(memoria: bool, funcion: Callable[..., Any], *args) -> tuple:
+    """
+    Ejecuta funcion en otro proceso con un registro propio y devuelve (resultado, registros)
+    para que el proceso principal los incorpore.
+    """
+    with registrar(memoria=memoria) as registro:
+        resultado = funcion(*args)
+    return resultado, registro.registros
+
+def _pico_rss() -> int:
+    """
+    Pico de memoria residente del proceso en bytes.
+    """
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return maximo if sys.platform == "darwin" else maximo * 1024
@@ -0,0 +1,40 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
+import metricas
+
+# Tamaño fijo de shard: no depende del número de workers para que la salida sea idéntica
+TAMANO_SHARD = 10_000
+
+def ejecutar(funcion: Callable[..., Any], tareas: Iterable[Tuple], workers: int = 1) -> Iterator[Any]:
+    """
+    Ejecuta funcion(*tarea) para cada tarea y devuelve los resultados en el orden de las tareas.
+    Con workers > 1 usa un ProcessPoolExecutor con a lo sumo 2 * workers tareas en vuelo,
+    de modo que la memoria no crece si el consumidor es más lento que los procesos.
+    Si hay un registro de métricas activo, las etapas de los procesos se incorporan a él.
+    """
+    if workers <= 1:
+        for tarea in tareas:
+            yield funcion(*tarea)
+        return
+    registro = metricas.activa()
+    if registro is not None:
+        funcion = partial(metricas.registrando, registro.memoria, funcion)
+
+    def resultado(futuro):
+        if registro is None:
+            return futuro.result()
+        valor, registros = futuro.result()
+        registro.incorporar(registros)
+        return valor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = deque()
+        for tarea in tareas:
+            pendientes.append(executor.submit(funcion, *tarea))
+            if len(pendientes) >= 2 * workers:
+                yield resultado(pendientes.popleft())
+        while pendientes:
+            yield resultado(pendientes.popleft())
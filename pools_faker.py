@@ -0,0 +1,146 @@
+import os
+import threading
+import zlib
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import metricas
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+# Locales de la población de clientes
+LOCALES = ['es_ES', 'en_US', 'fr_FR', 'de_DE']
+
+# Instancias de Faker compartidas por locale; una por hilo porque no admiten uso concurrente
+_registro = threading.local()
+
+# Número de valores por locale y proveedor; más valores dan más variedad y tardan más en construirse
+TAMANO_POOL = 200_000
+
+class PoolsFaker:
+    """
+    Caché de pools de valores de Faker por locale y proveedor (first_name, email, street_address...).
+    Cada pool se genera una vez con Faker y después se muestrea por índice aleatorio.
+    Con directorio, los pools se guardan como .npy y en ejecuciones posteriores se cargan
+    con memory-map sin llamar a Faker.
+    """
+    def __init__(self, tamano: int = TAMANO_POOL, directorio: Optional[str] = None, seed: int = 0):
+        """
+        tamano: número de valores de cada pool.
+        directorio: carpeta donde guardar y de donde cargar los pools (opcional).
+        seed: semilla con la que se generan los pools.
+        """
+        self.tamano = tamano
+        self.directorio = directorio
+        self.seed = seed
+        self._pools: Dict[Tuple[str, str], np.ndarray] = {}
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def pool(self, locale: str, proveedor: str) -> np.ndarray:
+        """
+        Devuelve el pool de un locale y proveedor, cargándolo o generándolo si hace falta.
+        """
+        clave = (locale, proveedor)
+        if clave not in self._pools:
+            ruta = self._ruta(locale, proveedor)
+            if ruta and os.path.exists(ruta):
+                self._pools[clave] = np.load(ruta, mmap_mode="r")
+            else:
+                self._pools[clave] = self._construir(locale, proveedor)
+                if ruta:
+                    np.save(ruta, self._pools[clave])
+        return self._pools[clave]
+
+    def muestrear(self, rng: np.random.Generator, locales: Union[str, Sequence[str]], proveedor: str, n: int) -> np.ndarray:
+        """
+        Extrae n valores del proveedor. Con varios locales, cada valor toma un locale al azar,
+        como hace Faker con una lista de locales.
+        """
+        if isinstance(locales, str):
+            locales = [locales]
+        resultado = np.empty(n, dtype=object)
+        elegido = rng.integers(0, len(locales), size=n)
+        for i, locale in enumerate(locales):
+            mascara = elegido == i
+            k = int(mascara.sum())
+            if k:
+                pool = self.pool(locale, proveedor)
+                resultado[mascara] = pool[rng.integers(0, len(pool), size=k)]
+        return resultado
+
+    def precargar(self, locales: Sequence[str], proveedores: Sequence[str]):
+        """
+        Genera o carga de una vez los pools indicados.
+        """
+        for locale in locales:
+            for proveedor in proveedores:
+                self.pool(locale, proveedor)
+
+    def _construir(self, locale: str, proveedor: str) -> np.ndarray:
+        """
+        Genera un pool con Faker. Los proveedores que el locale no tiene dan cadenas vacías.
+        """
+        fake = faker(locale, self.seed + zlib.crc32(f"{locale}/{proveedor}".encode("utf-8")))
+        if not hasattr(fake, proveedor):
+            return np.full(1, "", dtype=str)
+        metodo = getattr(fake, proveedor)
+        with metricas.etapa(f"pool_{proveedor}", generador="pools") as etapa:
+            # Array de texto de ancho fijo: se puede guardar y mapear en memoria sin pickle
+            pool = np.array([metodo() for _ in range(self.tamano)], dtype=str)
+            metricas.contar_faker(self.tamano)
+            etapa.filas = self.tamano
+        return pool
+
+    def _ruta(self, locale: str, proveedor: str) -> Optional[str]:
+        """
+        Ruta del fichero .npy de un pool, que incluye tamaño y semilla para no mezclar configuraciones.
+        """
+        if not self.directorio:
+            return None
+        return os.path.join(self.directorio, f"{locale}_{proveedor}_{self.tamano}_{self.seed}.npy")
+
+    def __getstate__(self):
+        """
+        Al enviarse a otro proceso no se copian los pools si están en disco: se vuelven a mapear allí.
+        """
+        estado = self.__dict__.copy()
+        if self.directorio:
+            estado["_pools"] = {}
+        return estado
+
+def faker(locales: Union[str, Sequence[str]], semilla: Optional[int] = None) -> "Faker":
+    """
+    Devuelve la instancia de Faker de un locale o lista de locales compartida por todos los
+    generadores del hilo, creándola la primera vez que se pide. Con semilla se reinicia con
+    seed_instance, así que genera lo mismo que una instancia nueva con esa semilla; cada
+    generador debe terminar de usarla antes de que otro pida el mismo locale.
+    """
+    from faker import Faker  # Se importa al usarlo: importar los generadores no carga Faker
+
+    instancias = getattr(_registro, "instancias", None)
+    if instancias is None:
+        instancias = _registro.instancias = {}
+    clave = locales if isinstance(locales, str) else tuple(locales)
+    if clave not in instancias:
+        with metricas.etapa("faker_locale", generador="pools"):
+            instancias[clave] = Faker(clave if isinstance(clave, str) else list(clave))
+    fake = instancias[clave]
+    if semilla is not None:
+        fake.seed_instance(semilla)
+    return fake
+
+def valores(pools: Optional[PoolsFaker], rng: np.random.Generator, fake: "Faker", locales: Union[str, Sequence[str]],
+            proveedor: str, n: int) -> np.ndarray:
+    """
+    Devuelve n valores del proveedor: de los pools si se han indicado y, si no, llamando a fake.
+    """
+    if pools is not None:
+        return pools.muestrear(rng, locales, proveedor, n)
+    if not hasattr(fake, proveedor):
+        return np.full(n, "", dtype=object)
+    metodo = getattr(fake, proveedor)
+    metricas.contar_faker(n)
+    return np.array([metodo() for _ in range(n)], dtype=object)
@@ -0,0 +1,21 @@
+import zlib
+from typing import Optional
+
+import numpy as np
+
+def generador(seed: Optional[int], tabla: str, bloque: int = 0) -> np.random.Generator:
+    """
+    Devuelve un generador independiente para una tabla y un bloque de filas.
+    Todos derivan de la misma SeedSequence raíz (seed) con clave (tabla, bloque), así que
+    regenerar el bloque k de una tabla no exige generar los anteriores ni afecta a otras tablas.
+    Se usa Philox, un generador basado en contador que permite además avanzar sin recorrer.
+    Sin semilla se parte de entropía nueva.
+    """
+    clave = (zlib.crc32(tabla.encode("utf-8")), bloque)
+    return np.random.Generator(np.random.Philox(np.random.SeedSequence(seed, spawn_key=clave)))
+
+def semilla_faker(rng: np.random.Generator) -> int:
+    """
+    Extrae del generador una semilla entera para Faker.seed_instance.
+    """
+    return int(rng.integers(0, 2**63))
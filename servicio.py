@@ -0,0 +1,285 @@
+"""
+Servicio HTTP local que genera las tablas al vuelo y las sirve como NDJSON o CSV, sin pasar por disco.
+
+    python -m servicio --port 8080 --workers 4 --pools
+    curl 'http://localhost:8080/tablas/envios?seed=42&n=100000&offset=0&limite=50000&formato=ndjson'
+
+Parámetros de /tablas/<tabla>:
+    seed: semilla (opcional; sin ella cada petición genera datos distintos).
+    n: clientes de la población, como Main(n_clientes=n); n_exclientes para la tabla de exclientes.
+    offset: filas de la tabla que se saltan al principio (en clientes y exclientes se saltan
+        bloques enteros sin generarlos; en las demás tablas se generan y se descartan).
+    limite: número máximo de filas (opcional).
+    formato: 'ndjson' (por defecto) o 'csv'.
+    hoy: fecha de referencia ISO (opcional, por defecto la de arranque del servicio).
+
+La respuesta se envía con Transfer-Encoding: chunked en lotes de FILAS_LOTE filas. Cada bloque
+se genera en un hilo y el siguiente no se pide hasta haber enviado el anterior (await drain),
+así que un consumidor lento no hace crecer la memoria. Los parámetros se validan antes de enviar
+las cabeceras (400 si no son válidos); un error durante la generación se registra y la respuesta se
+corta sin el trozo final, para que el cliente la reconozca como incompleta.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import esquemas
+import fechas
+import pools_faker
+from main_fake_data import Main, TABLAS
+
+logger = logging.getLogger(__name__)
+
+# Filas por trozo de la respuesta
+FILAS_LOTE = 5_000
+# Tamaño máximo de la cabecera de una petición
+MAX_CABECERA = 16 * 1024
+
+TIPOS_CONTENIDO = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+class ErrorPeticion(Exception):
+    """
+    Petición inválida; se responde con el estado indicado.
+    """
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+class Servicio:
+    """
+    Servidor asyncio que atiende peticiones GET y genera las tablas con Main.stream().
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, workers: int = 1, chunk_size: Optional[int] = None,
+                 pools: Optional[pools_faker.PoolsFaker] = None, esquema: Optional[Dict] = None):
+        """
+        host, port: dirección de escucha.
+        workers: procesos que generan bloques en paralelo para cada petición.
+        chunk_size: clientes por bloque (opcional, por defecto el de Main).
+        pools: pools de valores de Faker compartidos por todas las peticiones (opcional).
+        esquema: variante del esquema de distribuciones de todas las peticiones (opcional).
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.pools = pools
+        self.esquema = esquema
+        self.hoy = fechas.hoy()
+        self.servidor: Optional[asyncio.AbstractServer] = None
+
+    async def iniciar(self) -> asyncio.AbstractServer:
+        """
+        Empieza a escuchar y devuelve el servidor.
+        """
+        self.servidor = await asyncio.start_server(self._atender, self.host, self.port, limit=MAX_CABECERA)
+        self.port = self.servidor.sockets[0].getsockname()[1]
+        logger.info(f"Servicio escuchando en http://{self.host}:{self.port}")
+        return self.servidor
+
+    async def servir(self):
+        """
+        Atiende peticiones hasta que se cancela.
+        """
+        servidor = await self.iniciar()
+        async with servidor:
+            await servidor.serve_forever()
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Atiende una conexión: una petición por conexión (Connection: close).
+        """
+        try:
+            ruta, consulta = await self._leer_peticion(reader)
+            if ruta in ("/", "/tablas"):
+                await self._responder(writer, 200, "application/json", json.dumps({"tablas": TABLAS}).encode())
+            elif ruta.startswith("/tablas/"):
+                await self._servir_tabla(writer, ruta[len("/tablas/"):], consulta)
+            else:
+                raise ErrorPeticion(404, f"Ruta desconocida: {ruta}")
+        except ErrorPeticion as e:
+            await self._responder(writer, e.estado, "application/json", json.dumps({"error": str(e)}).encode())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.info("El cliente cerró la conexión")
+        except Exception:
+            # Un fallo no debe quedar como excepción de la tarea: se registra y se cierra la conexión
+            logger.exception("Error al atender la petición")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _leer_peticion(self, reader: asyncio.StreamReader) -> Tuple[str, Dict[str, List[str]]]:
+        """
+        Lee la línea de petición y las cabeceras; devuelve la ruta y los parámetros de la consulta.
+        """
+        try:
+            cabecera = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise ErrorPeticion(431, "Cabecera demasiado grande")
+        linea = cabecera.split(b"\r\n", 1)[0].decode("latin-1").split()
+        if len(linea) != 3:
+            raise ErrorPeticion(400, "Petición mal formada")
+        metodo, destino, _ = linea
+        if metodo != "GET":
+            raise ErrorPeticion(405, f"Método no soportado: {metodo}")
+        partes = urlsplit(destino)
+        return partes.path.rstrip("/") or "/", parse_qs(partes.query)
+
+    async def _servir_tabla(self, writer: asyncio.StreamWriter, tabla: str, consulta: Dict[str, List[str]]):
+        """
+        Genera la tabla por bloques y la envía por trozos, esperando a que se vacíe el búfer de
+        salida antes de pedir el bloque siguiente.
+        """
+        if tabla not in TABLAS:
+            raise ErrorPeticion(404, f"Tabla desconocida: {tabla}. Opciones: {', '.join(TABLAS)}")
+        parametros = _parametros(consulta)
+        if tabla == "envios" and parametros["n"] < 2:
+            raise ErrorPeticion(400, "Los envíos necesitan al menos dos clientes (n >= 2)")
+        formato = parametros["formato"]
+        try:
+            main = Main(n_clientes=parametros["n"], n_exclientes=parametros["n_exclientes"], chunk_size=self.chunk_size,
+                        seed=parametros["seed"], workers=self.workers, pools=self.pools, seleccion=[tabla],
+                        hoy=parametros["hoy"] or self.hoy, esquema=self.esquema)
+        except ValueError as e:
+            raise ErrorPeticion(400, str(e))
+        offset, limite = parametros["offset"], parametros["limite"]
+        bloque_inicial = 0
+        if tabla in ("clientes", "exclientes"):
+            # Las filas por bloque se conocen de antemano: los bloques saltados no se generan
+            n = parametros["n"] if tabla == "clientes" else parametros["n_exclientes"]
+            bloque_inicial, offset = main.bloque_de_fila(n, offset)
+
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {TIPOS_CONTENIDO[formato]}\r\n"
+            "Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n".encode()
+        )
+        loop = asyncio.get_running_loop()
+        bloques = main.stream(bloque_inicial)
+        cabecera = formato == "csv"
+        enviadas = 0
+        try:
+            while limite is None or enviadas < limite:
+                # La generación del bloque (CPU) va en un hilo para no bloquear el bucle de eventos
+                siguiente = await loop.run_in_executor(None, next, bloques, None)
+                if siguiente is None:
+                    break
+                _, df = siguiente
+                if offset:
+                    descartar = min(offset, len(df))
+                    df, offset = df.iloc[descartar:], offset - descartar
+                if limite is not None:
+                    df = df.iloc[:limite - enviadas]
+                for inicio in range(0, len(df), FILAS_LOTE):
+                    lote = df.iloc[inicio:inicio + FILAS_LOTE]
+                    datos = await loop.run_in_executor(None, _serializar, lote, formato, cabecera)
+                    cabecera = False
+                    writer.write(b"%x\r\n%s\r\n" % (len(datos), datos))
+                    await writer.drain()
+                enviadas += len(df)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception:
+            # Las cabeceras ya se enviaron: se corta la respuesta sin el trozo final, y el
+            # cliente la recibe incompleta
+            logger.exception(f"{tabla}: error al generar la respuesta tras {enviadas} filas")
+            return
+        finally:
+            # Cierra el generador (y su pool de procesos) también si el cliente se desconecta
+            await loop.run_in_executor(None, bloques.close)
+        logger.info(f"{tabla}: {enviadas} filas enviadas")
+
+    async def _responder(self, writer: asyncio.StreamWriter, estado: int, tipo: str, cuerpo: bytes):
+        """
+        Envía una respuesta completa.
+        """
+        motivos = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 431: "Request Header Fields Too Large"}
+        writer.write(
+            f"HTTP/1.1 {estado} {motivos.get(estado, '')}\r\nContent-Type: {tipo}\r\n"
+            f"Content-Length: {len(cuerpo)}\r\nConnection: close\r\n\r\n".encode() + cuerpo
+        )
+        await writer.drain()
+
+def _parametros(consulta: Dict[str, List[str]]) -> Dict:
+    """
+    Valida los parámetros de la consulta.
+    """
+    def entero(nombre: str, defecto: Optional[int]) -> Optional[int]:
+        valores = consulta.get(nombre)
+        if not valores:
+            return defecto
+        try:
+            valor = int(valores[0])
+        except ValueError:
+            raise ErrorPeticion(400, f"{nombre} debe ser un entero")
+        if valor < 0:
+            raise ErrorPeticion(400, f"{nombre} no puede ser negativo")
+        return valor
+
+    formato = consulta.get("formato", ["ndjson"])[0]
+    if formato not in TIPOS_CONTENIDO:
+        raise ErrorPeticion(400, f"Formato no soportado: {formato}. Opciones: {', '.join(TIPOS_CONTENIDO)}")
+    hoy = None
+    if consulta.get("hoy"):
+        try:
+            hoy = datetime.fromisoformat(consulta["hoy"][0])
+        except ValueError:
+            raise ErrorPeticion(400, "hoy debe ser una fecha ISO")
+    return {
+        "seed": entero("seed", None),
+        "n": entero("n", 10_000),
+        "n_exclientes": entero("n_exclientes", 2_000),
+        "offset": entero("offset", 0),
+        "limite": entero("limite", None),
+        "formato": formato,
+        "hoy": hoy,
+    }
+
+def _serializar(df: pd.DataFrame, formato: str, cabecera: bool) -> bytes:
+    """
+    Convierte un lote a NDJSON (una fila por línea) o CSV.
+    """
+    if formato == "ndjson":
+        return df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso").encode()
+    return df.to_csv(index=False, header=cabecera).encode()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Arranca el servicio desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(prog="servicio", description="Sirve tablas de datos falsos por HTTP como NDJSON o CSV.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha.")
+    parser.add_argument("--port", type=int, default=8080, help="Puerto de escucha.")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos que generan bloques en paralelo por petición.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Clientes por bloque.")
+    parser.add_argument("--pools", action="store_true", help="Muestrea nombres, direcciones y contactos de pools de Faker.")
+    parser.add_argument("--schema", default=None, metavar="FICHERO",
+                        help="Variante del esquema de distribuciones en JSON o YAML, con solo lo que cambia.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el progreso de cada generador.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        esquema = esquemas.cargar(args.schema) if args.schema else None
+    except (ValueError, ImportError, OSError) as e:
+        parser.error(str(e))
+    servicio = Servicio(args.host, args.port, args.workers, args.chunk_size, pools_faker.PoolsFaker() if args.pools else None,
+                        esquema)
+    print(f"Sirviendo tablas en http://{args.host}:{args.port}/tablas")
+    try:
+        asyncio.run(servicio.servir())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
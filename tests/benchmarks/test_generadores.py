@@ -0,0 +1,38 @@
+"""
+Suite de pytest-benchmark de los generadores, para comparar tiempos entre commits:
+
+    python -m pytest tests/benchmarks --benchmark-only --benchmark-autosave
+    python -m pytest tests/benchmarks --benchmark-only --benchmark-compare
+
+benchmark.py mide además el pico de memoria y el escalado con tamaños mayores.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import benchmark as medidas
+from fake_clientes import ClientesFaker
+from main_fake_data import Main
+
+TAMANOS = [1_000, 10_000]
+SEED = 42
+
+@pytest.fixture(scope="module", params=TAMANOS, ids=lambda n: f"n{n}")
+def clientes(request) -> ClientesFaker:
+    return ClientesFaker(request.param, seed=SEED, hoy=medidas.HOY)
+
+def test_clientes(benchmark, clientes):
+    n = clientes.n_clientes
+    tabla = benchmark.pedantic(lambda: ClientesFaker(n, seed=SEED, hoy=medidas.HOY).get_clientes(), rounds=3, iterations=1)
+    benchmark.extra_info["filas"] = len(tabla)
+
+@pytest.mark.parametrize("tabla", ["contratos", "contactos", "direcciones", "exclientes", "envios", "cuentas_bloqueadas"])
+def test_tabla(benchmark, clientes, tabla):
+    funcion = medidas.generadores(clientes, SEED)[tabla]
+    benchmark.extra_info["filas"] = len(benchmark.pedantic(funcion, rounds=3, iterations=1))
+
+@pytest.mark.parametrize("n", TAMANOS, ids=lambda n: f"n{n}")
+def test_main_write_stream(benchmark, tmp_path, n):
+    def completo():
+        Main(n_clientes=n, n_exclientes=n // 5, seed=SEED, hoy=medidas.HOY, out_dir=str(tmp_path)).write_stream()
+    benchmark.pedantic(completo, rounds=3, iterations=1)
@@ -0,0 +1,15 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def hoy() -> datetime:
+    """
+    Fecha de referencia fija, para que dos ejecuciones con la misma semilla den lo mismo.
+    """
+    return datetime(2024, 1, 1)
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+import cache
+import compacto
+import fechas
+from fake_clientes import ClientesFaker
+
+def test_acierto_sin_fijar_hoy(tmp_path):
+    with cache.usar(str(tmp_path)) as tablas:
+        primera = ClientesFaker(500, seed=42).get_clientes()
+        assert (tablas.aciertos, tablas.fallos) == (0, 1)
+        segunda = ClientesFaker(500, seed=42).get_clientes()
+        assert tablas.aciertos == 1
+    pd.testing.assert_frame_equal(primera, segunda)
+
+def test_hoy_por_defecto_es_medianoche():
+    assert fechas.hoy().time() == fechas.hoy().min.time()
+
+def test_clave_estable(tmp_path, hoy):
+    tablas = cache.CacheTablas(str(tmp_path))
+    parametros = {"n": 10, "seed": 1, "hoy": hoy, "ids": cache.huella(["a", "b"])}
+    assert tablas.clave("clientes", parametros) == tablas.clave("clientes", dict(reversed(parametros.items())))
+    assert tablas.clave("clientes", parametros) != tablas.clave("clientes", {**parametros, "seed": 2})
+    assert tablas.clave("clientes", parametros) != tablas.clave("exclientes", parametros)
+    assert cache.huella(["a", "b"]) != cache.huella(["b", "a"])
+
+@pytest.mark.parametrize("compacta", [False, True])
+def test_ida_y_vuelta(tmp_path, hoy, compacta):
+    df = ClientesFaker(300, seed=3, hoy=hoy).get_clientes()
+    if compacta:
+        df = compacto.compactar(df)
+    tablas = cache.CacheTablas(str(tmp_path))
+    tablas.guardar("clientes-x", df)
+    pd.testing.assert_frame_equal(tablas.obtener("clientes-x"), df)
+
+def test_expulsion_lru(tmp_path):
+    df = pd.DataFrame({"a": range(50_000)})
+    tablas = cache.CacheTablas(str(tmp_path), max_mb=1)
+    tablas.guardar("t-vieja", df)
+    tablas.guardar("t-usada", df)
+    os.utime(tablas._ruta("t-vieja"), (1, 1))
+    os.utime(tablas._ruta("t-usada"), (2, 2))
+    tablas.obtener("t-usada")  # la marca como usada ahora
+    tablas.guardar("t-nueva", df)
+    assert tablas.obtener("t-vieja") is None
+    assert tablas.obtener("t-usada") is not None
+    assert tablas.obtener("t-nueva") is not None
+    assert tablas.tamano() <= tablas.max_bytes
+
+def test_suspendida_y_sin_semilla(tmp_path):
+    with cache.usar(str(tmp_path)) as tablas:
+        with cache.suspendida():
+            assert cache.activa() is None
+            ClientesFaker(100, seed=1).get_clientes()
+        assert cache.activa() is tablas
+        ClientesFaker(100).get_clientes()
+        assert tablas.tamano() == 0
+    assert cache.activa() is None
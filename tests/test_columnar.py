@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import columnar
+import semillas
+
+def _tabla(n: int) -> columnar.TablaColumnar:
+    tabla = columnar.TablaColumnar(n, ["id", "par", "texto"], tipos={"id": np.int64, "par": bool})
+    tabla["id"] = np.arange(n)
+    tabla["par"] = np.arange(n) % 2 == 0
+    tabla.rellenar("texto", tabla["par"], "par")
+    tabla.rellenar("texto", ~tabla["par"], "impar")
+    return tabla
+
+def test_desordenado_con_una_sola_permutacion():
+    n = 1_000
+    desordenada = _tabla(n).construir(semillas.generador(3, "test"))
+    # La misma permutación que DataFrame.sample(frac=1, random_state=rng) sobre la tabla ordenada
+    esperada = _tabla(n).construir().sample(frac=1, random_state=semillas.generador(3, "test")).reset_index(drop=True)
+    pd.testing.assert_frame_equal(desordenada, esperada)
+    # Cada fila conserva sus columnas alineadas
+    assert ((desordenada["id"] % 2 == 0) == desordenada["par"]).all()
+    assert (desordenada["texto"] == np.where(desordenada["par"], "par", "impar")).all()
+
+def test_columnas_enteras_se_adoptan_sin_copia():
+    valores = np.arange(10, dtype=np.int64)
+    tabla = columnar.TablaColumnar(10, ["id"], tipos={"id": np.int64})
+    tabla["id"] = valores
+    assert tabla["id"] is valores
+    df = tabla.construir()
+    assert list(df.columns) == ["id"] and df["id"].dtype == np.int64
+    assert not tabla.columnas  # cada array se libera al convertirlo
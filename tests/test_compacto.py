@@ -0,0 +1,35 @@
+import filecmp
+
+import numpy as np
+import pandas as pd
+
+import compacto
+from main_fake_data import Main, TABLAS
+
+def test_tipos_compactos(hoy):
+    main = Main(n_clientes=400, n_exclientes=20, seed=2, hoy=hoy, seleccion=["clientes", "contratos", "envios"])
+    main.read()
+    clientes = compacto.compactar(main.tablas["clientes"])
+    assert clientes["cliente_id"].dtype == np.uint32
+    assert clientes["fecha_nacimiento"].dtype == "datetime64[s]"
+    assert isinstance(clientes["tipo_docum"].dtype, pd.CategoricalDtype)
+    assert list(clientes["tipo_docum"].cat.categories) == compacto.CATEGORIAS["tipo_docum"]
+    envios = compacto.compactar(main.tablas["envios"])
+    assert envios["fecha_hora_envio"].dtype == "datetime64[s]"
+    assert envios["cliente_destino_id"].dtype == np.uint32
+    # La fecha centinela de los contratos activos cabe sin pasar por nanosegundos
+    contratos = compacto.compactar(main.tablas["contratos"])
+    assert (contratos["fecha_baja_contrato"] == np.datetime64("9999-12-31")).any()
+    assert compacto.memoria_mb(contratos) < compacto.memoria_mb(main.tablas["contratos"])
+
+def test_concatenar_conserva_categorias_de_los_datos():
+    partes = [compacto.compactar(pd.DataFrame({"motivo_envio": [motivo]})) for motivo in ("Otro motivo", "Regalo")]
+    assert isinstance(compacto.concatenar(partes)["motivo_envio"].dtype, pd.CategoricalDtype)
+
+def test_ida_y_vuelta_escribe_lo_mismo(tmp_path, hoy):
+    for compacta in (False, True):
+        Main(n_clientes=500, n_exclientes=30, chunk_size=200, seed=8, hoy=hoy, compacta=compacta,
+             out_dir=str(tmp_path / str(compacta))).write_stream()
+    iguales, distintos, errores = filecmp.cmpfiles(tmp_path / "False", tmp_path / "True",
+                                                   [f"{tabla}.csv" for tabla in TABLAS], shallow=False)
+    assert len(iguales) == len(TABLAS) and not distintos and not errores
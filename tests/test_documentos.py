@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import documentos
+
+def test_letra_de_control_del_dni_y_del_nie():
+    assert documentos.dni([12345678]).tolist() == ["12345678Z"]
+    # El NIE se calcula como el número con el prefijo como cifra inicial (X=0, Y=1, Z=2)
+    assert documentos.nie([0, 10**7, 2 * 10**7 + 1]).tolist() == ["X0000000T", "Y0000000Z", "Z0000001Y"]
+
+def test_formatos_no_se_solapan_entre_tipos():
+    rng = np.random.default_rng(0)
+    codigos = {tipo: set(formato(rng.integers(0, documentos.CAPACIDADES[tipo], size=5_000)))
+               for tipo, formato in documentos.FORMATOS.items()}
+    tipos = list(codigos)
+    for i, tipo in enumerate(tipos):
+        for otro in tipos[i + 1:]:
+            assert not codigos[tipo] & codigos[otro], (tipo, otro)
+
+def test_documentos_unicos_por_posicion():
+    generador = documentos.GeneradorDocumentos(seed=1, unicos=True)
+    tipos = np.array(["DNI", "NIE", "PASAPORTE", "OTRO", "DESCONOCIDO"] * 4_000, dtype=object)
+    posiciones = np.arange(len(tipos), dtype=np.uint64)
+    codigos = generador.generar(None, tipos, posiciones)
+    assert len(set(codigos)) == len(codigos)
+    # Mismas posiciones, mismos códigos: no depende de cómo se repartan los bloques
+    mitad = len(tipos) // 2
+    segunda = documentos.GeneradorDocumentos(seed=1, unicos=True).generar(None, tipos[mitad:], posiciones[mitad:])
+    np.testing.assert_array_equal(segunda, codigos[mitad:])
+
+def test_documentos_unicos_necesitan_semilla_y_capacidad():
+    with pytest.raises(ValueError):
+        documentos.GeneradorDocumentos(unicos=True)
+    generador = documentos.GeneradorDocumentos(seed=1, unicos=True)
+    with pytest.raises(ValueError, match="No caben"):
+        generador.generar(None, np.array(["NIE"], dtype=object), np.array([documentos.CAPACIDADES["NIE"]], dtype=np.uint64))
+
+def test_codigo_suelto_usa_el_generador_del_faker(hoy, monkeypatch):
+    from fake_clientes import ClientesFaker
+
+    clientes = ClientesFaker(200, seed=4, hoy=hoy, documentos_unicos=True)
+    sueltos = ClientesFaker(10, seed=4, hoy=hoy)
+    monkeypatch.setattr(documentos, "GeneradorDocumentos", None)  # no se crea otro generador por llamada
+    fila = clientes.get_clientes().iloc[17]
+    posicion = int(clientes.asignador.invertir(np.array([int(fila["cliente_id"])], dtype=np.uint64))[0])
+    assert clientes.gen_cod_docum(fila["tipo_docum"], posicion) == fila["cod_docum"]
+    with pytest.raises(ValueError, match="posición"):
+        clientes.gen_cod_docum("DNI")
+    assert len(sueltos.gen_cod_docum("DNI")) == 9
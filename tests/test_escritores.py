@@ -0,0 +1,62 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import compacto
+import escritores
+from main_fake_data import Main
+
+@pytest.fixture(scope="module")
+def bloques():
+    """
+    Bloques (tabla, DataFrame) de una población pequeña, como los que escribe write_stream.
+    """
+    main = Main(n_clientes=1_200, n_exclientes=30, chunk_size=500, seed=2, hoy=datetime(2024, 1, 1),
+                seleccion=["clientes", "contratos", "envios"])
+    return list(main.stream())
+
+def _leer(formato: str, out_dir, tabla: str) -> pd.DataFrame:
+    if formato == "sqlite":
+        with sqlite3.connect(out_dir / "fakebiz.sqlite") as conexion:
+            return pd.read_sql(f"SELECT * FROM {tabla}", conexion)
+    ruta = out_dir / f"{tabla}.{escritores.ESCRITORES[formato].extension}"
+    if formato == "csv":
+        return pd.read_csv(ruta, dtype=str, keep_default_na=False)
+    if formato == "parquet":
+        return pd.read_parquet(ruta)
+    return pd.read_feather(ruta)
+
+@pytest.mark.parametrize("formato", list(escritores.ESCRITORES))
+def test_escritura_por_bloques(tmp_path, bloques, formato):
+    with escritores.EscrituraConcurrente(escritores.crear_escritor(formato, str(tmp_path))) as escritura:
+        for tabla, df in bloques:
+            escritura.anadir(tabla, df)
+    for tabla in ("clientes", "contratos", "envios"):
+        esperado = pd.concat([df for t, df in bloques if t == tabla], ignore_index=True)
+        leido = _leer(formato, tmp_path, tabla)
+        assert list(leido.columns) == list(esperado.columns)
+        assert len(leido) == len(esperado)
+        columna = "cliente_id" if tabla != "envios" else "cliente_origen_id"
+        assert leido[columna].astype(str).str.zfill(escritores.DIGITOS_CLIENTE).tolist() == esperado[columna].tolist()
+
+def test_tablas_compactas_se_escriben_igual_en_csv(tmp_path, bloques):
+    normal, compacta = tmp_path / "normal", tmp_path / "compacta"
+    normal.mkdir()
+    compacta.mkdir()
+    escritores.escribir_tablas(escritores.EscritorCSV(str(normal)), {t: df for t, df in bloques[:3]})
+    escritores.escribir_tablas(escritores.EscritorCSV(str(compacta)), {t: compacto.compactar(df) for t, df in bloques[:3]})
+    for tabla, _ in bloques[:3]:
+        assert (normal / f"{tabla}.csv").read_bytes() == (compacta / f"{tabla}.csv").read_bytes()
+
+@pytest.mark.parametrize("formato, opciones", [
+    ("csv", {"compression": "gzip"}),
+    ("sqlite", {"compression": "zstd"}),
+    ("arrow", {"compression": "snappy"}),
+    ("csv", {"particiones": {}}),
+    ("xlsx", {}),
+])
+def test_opciones_no_validas(formato, opciones):
+    with pytest.raises(ValueError):
+        escritores.validar_opciones(formato, opciones)
@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pytest
+
+import esquemas
+from main_fake_data import Main
+
+def test_variante_con_solo_pesos_conserva_los_valores():
+    variante = {"contratos": {"columnas": {"situacion_actividad": {"pesos": [1, 0, 0, 0]}}}}
+    plan = esquemas.plan("contratos", variante)
+    assert plan.valores("situacion_actividad") == esquemas.valores("contratos", "situacion_actividad")
+    muestra = plan.muestrear("situacion_actividad", np.random.default_rng(0), 1_000)
+    assert set(muestra) == {plan.valores("situacion_actividad")[0]}
+
+def test_muestreo_sigue_los_pesos():
+    distribucion = esquemas.Distribucion(["a", "b", "c"], [0.7, 0.2, 0.1])
+    muestra = distribucion.muestrear(np.random.default_rng(1), 200_000)
+    frecuencias = [np.mean(muestra == v) for v in "abc"]
+    np.testing.assert_allclose(frecuencias, [0.7, 0.2, 0.1], atol=0.005)
+    assert esquemas.Distribucion.desde({"minimo": 2, "maximo": 4}).media() == 3
+
+@pytest.mark.parametrize("variante", [
+    {"tabla_inexistente": {}},
+    {"envios": {"cardinalidad": {"minimo": 5, "maximo": 1}}},
+    {"personas": {"columnas": {"genero": {"valores": ["M", "F"], "pesos": [1]}}}},
+    {"cuentas_bloqueadas": {"proporciones": {"bloqueadas": 2}}},
+])
+def test_variantes_invalidas_fallan_al_validar(variante):
+    with pytest.raises(ValueError):
+        esquemas.validar(variante)
+
+def test_cargar_json_y_huella(tmp_path):
+    variante = {"envios": {"cardinalidad": {"minimo": 5, "maximo": 5}}}
+    ruta = tmp_path / "variante.json"
+    ruta.write_text(json.dumps(variante))
+    assert esquemas.cargar(str(ruta)) == variante
+    assert esquemas.huella(None) is None
+    assert esquemas.huella(variante) == esquemas.huella(json.loads(json.dumps(variante)))
+
+def test_main_aplica_la_variante(hoy):
+    variante = {"envios": {"cardinalidad": {"minimo": 5, "maximo": 5}}}
+    main = Main(n_clientes=300, n_exclientes=10, seed=1, hoy=hoy, esquema=variante, seleccion=["envios"])
+    main.read()
+    assert (main.tablas["envios"]["cliente_origen_id"].value_counts() == 5).all()
+    assert len(main.tablas["envios"]) == 5 * 300
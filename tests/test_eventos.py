@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import eventos
+from main_fake_data import Main
+
+def _flujo(hoy, **kwargs):
+    return eventos.FlujoEnvios(n_clientes=500, seed=8, hoy=hoy, desde="2023-12-01", segundos_ventana=86_400, **kwargs)
+
+def test_flujo_ordenado_y_determinista(hoy):
+    lotes = list(_flujo(hoy).lotes())
+    instantes = np.concatenate([i for i, _ in lotes])
+    assert len(lotes) > 1
+    assert (np.diff(instantes.astype(np.int64)) >= 0).all()
+    assert instantes[0] >= np.datetime64("2023-12-01") and instantes[-1] <= np.datetime64(hoy, "s")
+    repetido = pd.concat([df for _, df in _flujo(hoy).lotes()], ignore_index=True)
+    pd.testing.assert_frame_equal(pd.concat([df for _, df in lotes], ignore_index=True), repetido)
+
+def test_reanudar_da_el_resto_del_flujo(hoy):
+    completo = pd.concat([df for _, df in _flujo(hoy).lotes()], ignore_index=True)
+    desde = "2023-12-15T12:00:00"
+    resto = pd.concat([df for _, df in _flujo(hoy).lotes(reanudar=desde)], ignore_index=True)
+    esperado = completo[completo["fecha_hora_envio"] >= desde.replace("T", " ")].reset_index(drop=True)
+    pd.testing.assert_frame_equal(resto, esperado)
+
+def test_ids_de_la_poblacion_de_main(hoy):
+    main = Main(n_clientes=500, n_exclientes=10, seed=8, hoy=hoy, seleccion=["clientes"])
+    main.read()
+    envios = pd.concat([df for _, df in _flujo(hoy).lotes()])
+    ids = set(main.tablas["clientes"]["cliente_id"])
+    assert set(envios["cliente_origen_id"]) <= ids and set(envios["cliente_destino_id"]) <= ids
+    assert (envios["cliente_origen_id"] != envios["cliente_destino_id"]).all()
+
+@pytest.mark.parametrize("formato", eventos.FORMATOS)
+def test_reproducir_a_fichero_con_limite(tmp_path, hoy, formato):
+    ruta = tmp_path / f"envios.{formato}"
+    estadisticas = eventos.reproducir(_flujo(hoy, sin_fin=True).lotes(), str(ruta), formato=formato, limite=1_000)
+    lineas = ruta.read_bytes().splitlines()
+    assert estadisticas["eventos"] == 1_000
+    assert len(lineas) == 1_000 + (formato == "csv")
+
+def test_necesita_dos_clientes(hoy):
+    with pytest.raises(ValueError):
+        eventos.FlujoEnvios(n_clientes=1, seed=1, hoy=hoy)
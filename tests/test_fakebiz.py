@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+import pytest
+
+import escritores
+import fakebiz
+
+COMBINACIONES = [("csv", None), ("sqlite", None)] + [
+    (formato, compresion) for formato, compresiones in escritores.COMPRESIONES.items() for compresion in (None, *compresiones)
+]
+
+@pytest.mark.parametrize("formato, compresion", COMBINACIONES)
+def test_formatos_y_compresiones_admitidos(tmp_path, capsys, formato, compresion):
+    argumentos = ["--tables", "clientes,contratos", "--n-clientes", "300", "--n-exclientes", "10", "--seed", "1",
+                  "--format", formato, "--out", str(tmp_path)]
+    if compresion:
+        argumentos += ["--compression", compresion]
+    assert fakebiz.main(argumentos) == 0
+    if formato == "sqlite":
+        assert os.path.getsize(tmp_path / "fakebiz.sqlite") > 0
+        return
+    ruta = tmp_path / f"contratos.{escritores.ESCRITORES[formato].extension}"
+    if formato == "csv":
+        contratos = pd.read_csv(ruta)
+    elif formato == "parquet":
+        contratos = pd.read_parquet(ruta)
+    else:
+        contratos = pd.read_feather(ruta)
+    assert len(contratos) > 0
+
+@pytest.mark.parametrize("formato, compresion", [("csv", "gzip"), ("sqlite", "zstd"), ("parquet", "rar"), ("arrow", "snappy")])
+def test_compresion_no_admitida_falla_antes_de_generar(tmp_path, formato, compresion):
+    with pytest.raises(SystemExit) as salida:
+        fakebiz.main(["--n-clientes", "300", "--seed", "1", "--format", formato, "--compression", compresion,
+                      "--out", str(tmp_path)])
+    assert salida.value.code == 2
+    assert not os.listdir(tmp_path)
+
+@pytest.mark.parametrize("opcion", [["--tables", "clientes"], ["--n-clientes", "50"], ["--n-exclientes", "5"], ["--chunk-size", "10"],
+                                    ["--schema", "variante.json"], ["--compact"], ["--dry-run"], ["--seed", "2"]])
+def test_delta_rechaza_opciones_de_la_poblacion(tmp_path, capsys, opcion):
+    with pytest.raises(SystemExit) as salida:
+        fakebiz.main(["--delta", "1", "--out", str(tmp_path), *opcion])
+    assert salida.value.code == 2
+    assert opcion[0] in capsys.readouterr().err
+
+def test_delta_no_construye_main(tmp_path, capsys, monkeypatch):
+    assert fakebiz.main(["--n-clientes", "300", "--n-exclientes", "10", "--seed", "1", "--state", "--out", str(tmp_path)]) == 0
+
+    def fallar(*args, **kwargs):
+        raise AssertionError("--delta no debe construir Main")
+
+    monkeypatch.setattr(fakebiz, "Main", fallar)
+    assert fakebiz.main(["--delta", "2", "--format", "parquet", "--out", str(tmp_path)]) == 0
+    assert "Delta 1" in capsys.readouterr().out
+    assert os.path.exists(tmp_path / "delta_0001" / "envios.parquet")
@@ -0,0 +1,19 @@
+import numpy as np
+
+import fechas
+
+def test_formatear_fechas_y_nat():
+    valores = np.array(["2024-02-29T13:05:09", "NaT"], dtype="datetime64[s]")
+    assert fechas.formatear(valores, "s").tolist() == ["2024-02-29 13:05:09", None]
+    assert fechas.formatear(valores.astype("datetime64[D]")).tolist() == ["2024-02-29", None]
+
+def test_formatear_array_vacio():
+    # Una ventana de eventos sin envíos formatea un array vacío
+    assert fechas.formatear(np.array([], dtype="datetime64[s]"), "s").tolist() == []
+
+def test_fechas_entre_respeta_los_limites_de_cada_fila():
+    rng = np.random.default_rng(0)
+    inicio = fechas.fechas_entre(rng, "2000-01-01", "2020-01-01", size=10_000)
+    fin = fechas.fechas_entre(rng, inicio, "2020-12-31")
+    assert (inicio >= np.datetime64("2000-01-01")).all() and (fin >= inicio).all()
+    assert (fin <= np.datetime64("2020-12-31")).all()
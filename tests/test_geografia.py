@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+
+import geografia
+import semillas
+
+@pytest.fixture
+def indices(tmp_path, monkeypatch):
+    monkeypatch.setattr(geografia, "DIRECTORIO_INDICES", str(tmp_path))
+    monkeypatch.setattr(geografia, "_indices", {})
+    return tmp_path
+
+def test_codigos_postales_de_la_provincia_en_espana(indices):
+    indice = geografia.indice("España")
+    ciudad, provincia, codigo_postal = indice.muestrear(semillas.generador(1, "test", 0), 5_000)
+    assert all(len(cp) == geografia.DIGITOS_CP for cp in codigo_postal)
+    prefijos = np.array([geografia.PREFIJOS_CP_ES[p] for p in provincia])
+    assert (np.array([int(cp[:2]) for cp in codigo_postal]) == prefijos).all()
+    assert all(c in indice.ciudades_de(p) for c, p in zip(ciudad[:200], provincia[:200]))
+
+@pytest.mark.parametrize("pais", ["España", "France", "United States"])
+def test_codigos_postales_dentro_del_rango(indices, pais):
+    indice = geografia.indice(pais)
+    provincias = indice.provincias[np.arange(2_000) % len(indice.provincias)]
+    _, provincia, codigo_postal = indice.muestrear(semillas.generador(2, "test", 0), 2_000, provincias=provincias)
+    assert (provincia == provincias).all()
+    p = indice.posiciones(provincia)
+    cp = codigo_postal.astype(np.int64)
+    assert ((indice.cp_min[p] <= cp) & (cp <= indice.cp_max[p])).all()
+
+def test_provincia_desconocida(indices):
+    with pytest.raises(ValueError, match="desconocidas"):
+        geografia.indice("España").posiciones(["Atlántida"])
+    assert geografia.indice("Deutschland") is None
+
+def test_indice_se_recarga_sin_cache_de_tablas(indices, monkeypatch):
+    construido = geografia.indice("España")
+    assert any(nombre.startswith("geografia-") for nombre in os.listdir(indices))
+
+    def fallar():
+        raise AssertionError("el índice guardado no se ha reutilizado")
+
+    monkeypatch.setattr(geografia, "_indices", {})
+    monkeypatch.setitem(geografia.FUENTES, "España", fallar)
+    recargado = geografia.indice("España")
+    assert recargado is not construido
+    np.testing.assert_array_equal(recargado.provincias, construido.provincias)
+    np.testing.assert_array_equal(recargado.ciudades, construido.ciudades)
+    np.testing.assert_array_equal(recargado.cp_min, construido.cp_min)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from ids import AsignadorIds
+
+def test_permutacion_biyectiva_e_invertible():
+    asignador = AsignadorIds(seed=1, espacio="prueba", capacidad=1_000)
+    imagen = asignador.permutar(np.arange(1_000, dtype=np.uint64))
+    assert sorted(imagen.tolist()) == list(range(1_000))
+    np.testing.assert_array_equal(asignador.invertir(imagen), np.arange(1_000, dtype=np.uint64))
+
+def test_ids_unicos_y_de_ancho_fijo():
+    asignador = AsignadorIds(seed=2, digitos=6)
+    ids = asignador.asignar_texto(50_000)
+    assert len(set(ids)) == len(ids)
+    assert {len(i) for i in ids} == {6}
+
+def test_misma_semilla_mismos_ids_y_saltar_equivale_a_asignar():
+    completo = AsignadorIds(seed=3).asignar(1_000)
+    parcial = AsignadorIds(seed=3)
+    parcial.saltar(400)
+    np.testing.assert_array_equal(parcial.asignar(600), completo[400:])
+    assert not np.array_equal(AsignadorIds(seed=4).asignar(1_000), completo)
+
+def test_emitido_y_excluidos():
+    asignador = AsignadorIds(seed=5, digitos=4)
+    emitidos = asignador.asignar(100)
+    assert asignador.emitido(emitidos).all()
+    siguientes = AsignadorIds(seed=5, digitos=4, inicio=100).asignar(10)
+    assert not asignador.emitido(siguientes).any()
+    excluyente = AsignadorIds(seed=5, digitos=4, excluir=siguientes[:5])
+    excluyente.saltar(100)
+    assert not np.isin(excluyente.asignar(10), siguientes[:5]).any()
+
+def test_espacio_agotado():
+    asignador = AsignadorIds(seed=6, digitos=2)
+    asignador.asignar(90)
+    with pytest.raises(ValueError, match="agotado"):
+        asignador.asignar(11)
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import incremental
+from main_fake_data import Main
+
+def test_deltas_grandes_encadenados_no_repiten_identificadores(hoy):
+    main = Main(n_clientes=3_000, n_exclientes=100, chunk_size=1_000, seed=7, hoy=hoy,
+                seleccion=["clientes", "contratos", "exclientes"])
+    estado = incremental.EstadoIncremental.desde_main(main)
+    main.read()
+    clientes = [main.tablas["clientes"]["cliente_id"], main.tablas["exclientes"]["cliente_id"]]
+    identificadores = [main.tablas["contratos"]["identificador"]]
+    # Más de paralelo.TAMANO_SHARD altas por delta: sus contratos se generan en varios shards, cada uno
+    # con su rango de CONTRATOS_POR_SHARD, y el segundo delta no debe empezar dentro de los del primero
+    for n_nuevos in (25_000, 20_000):
+        delta = incremental.DeltaFaker(estado, dias=1, n_clientes_nuevos=n_nuevos)
+        tablas = delta.get_tablas()
+        assert len(tablas["clientes"]) == n_nuevos
+        clientes.append(tablas["clientes"]["cliente_id"])
+        identificadores.append(tablas["contratos"]["identificador"])
+    assert pd.concat(clientes).is_unique
+    assert pd.concat(identificadores).is_unique
+    assert estado.deltas == 2
+
+def test_manifiesto_se_guarda_y_carga(tmp_path, hoy):
+    main = Main(n_clientes=500, n_exclientes=10, seed=3, hoy=hoy)
+    estado = incremental.EstadoIncremental.desde_main(main)
+    incremental.DeltaFaker(estado, dias=2, n_clientes_nuevos=50)
+    ruta = str(tmp_path / incremental.MANIFIESTO)
+    estado.guardar(ruta)
+    cargado = incremental.EstadoIncremental.cargar(ruta)
+    np.testing.assert_array_equal(cargado.cerrados, estado.cerrados)
+    assert {**vars(cargado), "cerrados": None} == {**vars(estado), "cerrados": None}
+
+def test_bajas_repartidas_entre_bloques(tmp_path, hoy, monkeypatch):
+    # Sin altas, las bajas de varios deltas caen en todos los bloques de la población y no se repiten
+    monkeypatch.setattr(incremental, "TASA_BAJAS_CONTRATO", 50 / incremental.DIAS_ANIO)
+    main = Main(n_clientes=4_000, n_exclientes=10, chunk_size=1_000, seed=11, hoy=hoy, seleccion=["clientes", "contratos"])
+    estado = incremental.EstadoIncremental.desde_main(main)
+    main.read()
+    bloque_de = dict(zip(main.tablas["clientes"]["cliente_id"], main.tablas["clientes"].index // 1_000))
+    bajas = pd.concat([incremental.DeltaFaker(estado, n_clientes_nuevos=0).get_tablas()["contratos_bajas"] for _ in range(3)])
+    assert bajas["identificador"].is_unique
+    assert set(bajas["cliente_id"].map(bloque_de)) == {0, 1, 2, 3}
+    activos = main.tablas["contratos"].query("situacion_actividad == 'Activa'")
+    assert bajas["identificador"].isin(activos["identificador"]).all()
+    assert len(estado.cerrados) == len(bajas)
+
+    ruta = str(tmp_path / incremental.MANIFIESTO)
+    estado.guardar(ruta)
+    with open(ruta) as f:
+        assert isinstance(json.load(f)["cerrados"], str)
+    np.testing.assert_array_equal(incremental.EstadoIncremental.cargar(ruta).cerrados,
+                                  np.sort(bajas["identificador"].astype(np.uint64).to_numpy()))
+
+def test_manifiesto_version_1(tmp_path, hoy):
+    estado = incremental.EstadoIncremental.desde_main(Main(n_clientes=100, n_exclientes=10, seed=3, hoy=hoy))
+    ruta = str(tmp_path / incremental.MANIFIESTO)
+    estado.guardar(ruta)
+    with open(ruta) as f:
+        datos = json.load(f)
+    datos.update(version=1, cerrados=["0000042", "0000007"])
+    with open(ruta, "w") as f:
+        json.dump(datos, f)
+    assert incremental.EstadoIncremental.cargar(ruta).cerrados.tolist() == [7, 42]
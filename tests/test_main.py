@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from main_fake_data import Main
+
+def _tablas(**kwargs):
+    main = Main(**kwargs)
+    main.read()
+    return main.tablas
+
+def test_read_sin_chunk_size_genera_un_unico_bloque(hoy):
+    # 10.001 clientes: con bloques de 10.000 quedaría uno de un solo cliente
+    tablas = _tablas(n_clientes=10_001, n_exclientes=10, seed=1, hoy=hoy, seleccion=["clientes", "envios"])
+    assert len(tablas["clientes"]) == 10_001
+    destinos = set(tablas["envios"]["cliente_destino_id"])
+    # Los destinos se eligen en toda la población, no dentro de un bloque de 10.000
+    assert len(destinos) > 10_000
+
+@pytest.mark.parametrize("chunk_size", [1_000, 10_000])
+def test_ultimo_bloque_corto_se_une_al_anterior(hoy, chunk_size):
+    n = 2 * chunk_size + 1
+    main = Main(n_clientes=n, n_exclientes=chunk_size + 1, chunk_size=chunk_size, seed=1, hoy=hoy)
+    assert main._tamanos_bloque(n) == [chunk_size, chunk_size + 1]
+    assert main.bloque_de_fila(n, n - 1) == (1, chunk_size)
+    main.read()
+    assert len(main.tablas["clientes"]) == n
+    assert len(main.tablas["exclientes"]) == chunk_size + 1
+    assert main.tablas["contratos"]["identificador"].is_unique
+    ids = pd.concat([main.tablas["clientes"]["cliente_id"], main.tablas["exclientes"]["cliente_id"]])
+    assert ids.is_unique
+
+def test_stream_y_read_por_bloques_coinciden(hoy):
+    main = Main(n_clientes=2_501, n_exclientes=20, chunk_size=1_000, seed=3, hoy=hoy)
+    main.read()
+    partes = {}
+    for tabla, df in main.stream():
+        partes.setdefault(tabla, []).append(df)
+    for tabla, dfs in partes.items():
+        pd.testing.assert_frame_equal(pd.concat(dfs, ignore_index=True), main.tablas[tabla].reset_index(drop=True))
+
+@pytest.mark.parametrize("chunk_size", [None, 700])
+def test_salida_identica_con_cualquier_numero_de_workers(tmp_path, hoy, chunk_size):
+    salidas = {}
+    for workers in (1, 3):
+        out_dir = tmp_path / f"w{workers}"
+        main = Main(n_clientes=2_001, n_exclientes=50, chunk_size=chunk_size, seed=11, workers=workers, hoy=hoy,
+                    out_dir=str(out_dir))
+        main.write_stream()
+        salidas[workers] = {f.name: f.read_bytes() for f in out_dir.iterdir()}
+    assert salidas[1] == salidas[3]
+
+def test_read_igual_con_cualquier_numero_de_workers(hoy):
+    # Más de un shard en el único bloque: los workers reparten los shards
+    uno = _tablas(n_clientes=12_000, n_exclientes=20, seed=12, hoy=hoy, workers=1, seleccion=["clientes", "contratos", "direcciones"])
+    dos = _tablas(n_clientes=12_000, n_exclientes=20, seed=12, hoy=hoy, workers=2, seleccion=["clientes", "contratos", "direcciones"])
+    for tabla in uno:
+        pd.testing.assert_frame_equal(uno[tabla], dos[tabla])
+    assert uno["contratos"]["identificador"].is_unique
@@ -0,0 +1,44 @@
+import json
+
+import metricas
+from main_fake_data import Main
+
+def test_etapas_registradas_de_main(hoy):
+    with metricas.registrar() as registro:
+        main = Main(n_clientes=300, n_exclientes=20, seed=1, hoy=hoy, seleccion=["clientes", "contratos"])
+        main.read()
+    resumen = registro.resumen()
+    assert resumen.loc[("main", "read"), "filas"] == sum(len(df) for df in main.tablas.values())
+    for tabla in ("clientes", "contratos"):
+        assert resumen.loc[(tabla, "total"), "filas"] == len(main.tablas[tabla])
+        assert resumen.loc[(tabla, "total"), "segundos"] > 0
+    assert ("contratos", "ids") in resumen.index
+    assert metricas.activa() is None
+
+def test_etapas_anidadas_y_llamadas_a_faker():
+    vistos = []
+    with metricas.registrar() as registro:
+        registro.suscribir(vistos.append)
+        with metricas.etapa("total", generador="g") as total:
+            with metricas.etapa("total", generador="g"):  # reentrante: no se cuenta dos veces
+                metricas.contar_faker(3)
+            with metricas.etapa("nombres") as nombres:  # hereda el generador
+                metricas.contar_faker(2)
+                nombres.filas = 10
+            total.filas = 10
+    assert [(r["generador"], r["etapa"]) for r in registro.registros] == [("g", "nombres"), ("g", "total")]
+    assert [r["llamadas_faker"] for r in registro.registros] == [2, 5]
+    assert vistos == registro.registros
+
+def test_exportacion(tmp_path):
+    with metricas.registrar() as registro:
+        with metricas.etapa("total", generador="clientes") as etapa:
+            etapa.filas = 7
+    registro.a_json(str(tmp_path / "metricas.json"))
+    registro.a_prometheus(str(tmp_path / "metricas.prom"))
+    assert json.loads((tmp_path / "metricas.json").read_text())["registros"][0]["filas"] == 7
+    assert 'fakebiz_etapa_filas_total{generador="clientes",etapa="total"} 7' in (tmp_path / "metricas.prom").read_text()
+    # Sin registro activo las etapas no hacen nada
+    with metricas.etapa("total") as etapa:
+        etapa.filas = 1
+    assert len(registro.registros) == 1
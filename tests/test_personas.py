@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+import paralelo
+from fake_clientes import ClientesFaker
+from fake_exclientes import ExClientesFaker
+
+@pytest.mark.parametrize("clase, getter", [(ClientesFaker, "get_clientes"), (ExClientesFaker, "get_exclientes")])
+def test_shards_iguales_con_cualquier_numero_de_workers(hoy, clase, getter):
+    n = paralelo.TAMANO_SHARD + 500
+    uno = clase(n, seed=5, hoy=hoy, workers=1)
+    dos = clase(n, seed=5, hoy=hoy, workers=2)
+    pd.testing.assert_frame_equal(getattr(uno, getter)(), getattr(dos, getter)())
+    assert uno.get_tabla() is getattr(uno, getter)()
+    assert getattr(uno, getter)()["cliente_id"].is_unique
+    assert list(uno.get_tabla().columns) == clase.COLUMNAS
+
+def test_documentos_unicos_entre_clientes_y_exclientes(hoy):
+    clientes = ClientesFaker(3_000, seed=9, hoy=hoy, documentos_unicos=True)
+    exclientes = ExClientesFaker(3_000, seed=9, hoy=hoy, asignador=clientes.asignador, documentos_unicos=True)
+    documentos = pd.concat([clientes.get_clientes()["cod_docum"], exclientes.get_exclientes()["cod_docum"]])
+    assert documentos.is_unique
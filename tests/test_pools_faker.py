@@ -0,0 +1,24 @@
+import numpy as np
+
+import pools_faker
+import semillas
+
+def test_muestreo_dentro_del_pool():
+    pools = pools_faker.PoolsFaker(tamano=50, seed=1)
+    valores = pools.muestrear(semillas.generador(1, "test"), ["es_ES", "fr_FR"], "first_name", 2_000)
+    es, fr = pools.pool("es_ES", "first_name"), pools.pool("fr_FR", "first_name")
+    assert len(es) == len(fr) == 50
+    assert set(valores) <= set(es) | set(fr)
+    # Con varios locales, cada valor toma uno al azar
+    assert set(valores) & set(es) - set(fr) and set(valores) & set(fr) - set(es)
+
+def test_pools_deterministas_y_guardados(tmp_path):
+    construido = pools_faker.PoolsFaker(tamano=30, directorio=str(tmp_path), seed=7).pool("en_US", "city")
+    cargado = pools_faker.PoolsFaker(tamano=30, directorio=str(tmp_path), seed=7).pool("en_US", "city")
+    assert isinstance(cargado, np.memmap)
+    np.testing.assert_array_equal(construido, cargado)
+    np.testing.assert_array_equal(construido, pools_faker.PoolsFaker(tamano=30, seed=7).pool("en_US", "city"))
+
+def test_proveedor_que_el_locale_no_tiene():
+    pools = pools_faker.PoolsFaker(tamano=10)
+    assert set(pools.muestrear(semillas.generador(1, "test"), "es_ES", "no_existe", 5)) == {""}
@@ -0,0 +1,20 @@
+import numpy as np
+
+import semillas
+
+def test_flujos_independientes_por_tabla_y_bloque():
+    primeros = {(tabla, bloque): semillas.generador(42, tabla, bloque).integers(0, 2**62, size=4).tolist()
+                for tabla in ("clientes", "contratos") for bloque in range(3)}
+    # Cada (tabla, bloque) tiene su propio flujo
+    assert len({tuple(valores) for valores in primeros.values()}) == len(primeros)
+    # Regenerar un bloque no exige generar los anteriores y da lo mismo
+    assert semillas.generador(42, "contratos", 2).integers(0, 2**62, size=4).tolist() == primeros[("contratos", 2)]
+
+def test_consumir_un_flujo_no_afecta_a_otro():
+    aislado = semillas.generador(1, "envios", 1).random(100)
+    semillas.generador(1, "envios", 0).random(10**5)
+    np.testing.assert_array_equal(semillas.generador(1, "envios", 1).random(100), aislado)
+
+def test_sin_semilla_no_es_reproducible():
+    assert semillas.generador(None, "clientes").integers(0, 2**62) != semillas.generador(None, "clientes").integers(0, 2**62)
+    assert 0 <= semillas.semilla_faker(semillas.generador(5, "clientes")) < 2**63
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+import servicio
+from servicio import Servicio
+
+async def _pedir(puerto: int, ruta: str) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    writer.write(f"GET {ruta} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    respuesta = await reader.read()
+    writer.close()
+    return respuesta
+
+def _cuerpo(respuesta: bytes) -> bytes:
+    """
+    Junta los trozos de una respuesta chunked.
+    """
+    resto, cuerpo = respuesta.split(b"\r\n\r\n", 1)[1], b""
+    while resto:
+        tamano, resto = resto.split(b"\r\n", 1)
+        if int(tamano, 16) == 0:
+            break
+        cuerpo, resto = cuerpo + resto[:int(tamano, 16)], resto[int(tamano, 16) + 2:]
+    return cuerpo
+
+def _atender(ruta: str):
+    """
+    Arranca el servicio en un puerto libre, hace una petición y devuelve la respuesta y los
+    errores que el bucle de eventos haya registrado (excepciones no capturadas de las tareas).
+    """
+    async def ejecutar():
+        errores = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, contexto: errores.append(contexto))
+        servidor = await Servicio(port=0, chunk_size=100).iniciar()
+        async with servidor:
+            respuesta = await _pedir(servidor.sockets[0].getsockname()[1], ruta)
+        return respuesta, errores
+    return asyncio.run(ejecutar())
+
+def test_tabla_completa_termina_con_trozo_final():
+    respuesta, errores = _atender("/tablas/clientes?seed=1&n=250&formato=ndjson")
+    cabecera, cuerpo = respuesta.split(b"\r\n\r\n", 1)
+    assert cabecera.startswith(b"HTTP/1.1 200")
+    assert cuerpo.endswith(b"0\r\n\r\n")
+    assert not errores
+
+def test_offset_en_ultimo_bloque_unido():
+    # 201 clientes en bloques de 100: el último cliente va en el segundo bloque
+    respuesta, _ = _atender("/tablas/clientes?seed=1&n=201&offset=200&formato=csv")
+    filas = _cuerpo(respuesta).decode().splitlines()
+    assert len(filas) == 2  # cabecera y una fila
+
+@pytest.mark.parametrize("n", [0, 1])
+def test_envios_con_menos_de_dos_clientes_es_400(n):
+    respuesta, errores = _atender(f"/tablas/envios?seed=1&n={n}")
+    cabecera, cuerpo = respuesta.split(b"\r\n\r\n", 1)
+    assert cabecera.startswith(b"HTTP/1.1 400")
+    assert "error" in json.loads(cuerpo)
+    assert not errores
+
+def test_error_al_generar_cierra_la_conexion_sin_excepcion(monkeypatch):
+    def stream(self, bloque_inicial=0, tamano_bloque=None):
+        raise RuntimeError("fallo de generación")
+        yield
+    monkeypatch.setattr(servicio.Main, "stream", stream)
+    respuesta, errores = _atender("/tablas/clientes?seed=1&n=10")
+    assert respuesta.startswith(b"HTTP/1.1 200")
+    # Sin trozo final: el cliente sabe que la respuesta está incompleta
+    assert not respuesta.endswith(b"0\r\n\r\n")
+    assert not errores
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import validador
+from main_fake_data import Main
+
+def _generar(out_dir, formato: str, hoy):
+    Main(n_clientes=2_000, n_exclientes=100, chunk_size=1_000, seed=4, hoy=hoy, out_dir=str(out_dir),
+         formato=formato).write_stream()
+
+@pytest.mark.parametrize("formato", ["csv", "parquet", "sqlite"])
+def test_datos_generados_pasan_la_validacion(tmp_path, hoy, formato):
+    _generar(tmp_path, formato, hoy)
+    informe = validador.validar(str(tmp_path), formato=formato)
+    assert informe.ok, informe.resumen()[~informe.resumen()["ok"]]
+    assert informe.filas["clientes"] == 2_000
+
+def test_detecta_datos_corruptos(tmp_path, hoy):
+    _generar(tmp_path, "csv", hoy)
+    clientes = pd.read_csv(tmp_path / "clientes.csv", dtype=str, keep_default_na=False)
+    exclientes = pd.read_csv(tmp_path / "exclientes.csv", dtype=str, keep_default_na=False)
+    envios = pd.read_csv(tmp_path / "envios.csv", dtype=str, keep_default_na=False)
+    # Un cliente repetido, un excliente que también es cliente y un envío a un cliente inexistente
+    pd.concat([clientes, clientes.iloc[:1]]).to_csv(tmp_path / "clientes.csv", index=False)
+    exclientes.loc[0, "cliente_id"] = clientes.loc[1, "cliente_id"]
+    exclientes.to_csv(tmp_path / "exclientes.csv", index=False)
+    envios.loc[0, "cliente_destino_id"] = "999999999"
+    envios.to_csv(tmp_path / "envios.csv", index=False)
+
+    informe = validador.validar(str(tmp_path))
+    fallidas = {c["nombre"] for c in informe.comprobaciones if not c["ok"]}
+    assert not informe.ok
+    assert "clientes.cliente_id" in fallidas
+    assert "clientes.cliente_id ∩ exclientes.cliente_id" in fallidas
+    assert "envios.cliente_destino_id -> clientes.cliente_id" in fallidas
+    assert validador.main([str(tmp_path)]) == 1
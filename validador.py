@@ -0,0 +1,538 @@
+"""
+Validación de un conjunto de tablas generado, sin cargar las tablas enteras: cada tabla se recorre
+por lotes y se comprueban integridad referencial, IDs disjuntos entre clientes y exclientes, orden
+de las fechas y deriva de las distribuciones respecto al esquema. Las claves de clientes se guardan
+como un array ordenado de enteros (8 bytes por clave, más 4 de su fecha de alta) y las claves
+foráneas de cada lote se buscan en él con searchsorted, así que la memoria está acotada por los
+conjuntos de claves y no por el tamaño de las tablas.
+
+    informe = validar("./data/out", formato="parquet")
+    informe.guardar("./data/out/validacion.json")
+
+    python -m validador ./data/out --format parquet --report ./data/out/validacion.json
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import escritores
+import esquemas
+import metricas
+from main_fake_data import TABLAS
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow solo es necesario para validar Parquet y Arrow IPC (en CSV acelera la lectura)
+    pa = None
+    pcsv = None
+    ds = None
+
+logger = logging.getLogger(__name__)
+
+# Filas por lote de lectura (CSV y SQLite; en Arrow IPC cada lote es un bloque escrito)
+FILAS_LOTE = 250_000
+# Bytes por bloque del lector CSV de pyarrow (unas 300.000 filas de envíos)
+BYTES_BLOQUE_CSV = 16 << 20
+# Distancia de variación total máxima entre la distribución observada y la del esquema
+TOLERANCIA = 0.02
+# Error relativo máximo de las filas por cliente respecto a la media del esquema
+TOLERANCIA_CARDINALIDAD = 0.05
+# Filas mínimas para comprobar la deriva (con menos, el ruido de muestreo supera la tolerancia)
+MIN_FILAS_DERIVA = 5_000
+# Valores de ejemplo guardados por comprobación fallida
+MAX_EJEMPLOS = 5
+# Columnas cuya distribución en la salida no es la del esquema (el subproducto depende del producto)
+SIN_DERIVA = {"codigo_subproducto"}
+
+# Pares de fechas (anterior, posterior) de cada tabla que deben estar en orden cuando ambas existen
+ORDEN_FECHAS = {
+    "clientes": [("fecha_nacimiento", "fecha_cliente")],
+    "exclientes": [("fecha_nacimiento", "fecha_cliente"), ("fecha_cliente", "fecha_inclusion_excliente"),
+                   ("fecha_inclusion_excliente", "fecha_recuperacion_excliente")],
+    "contratos": [("fecha_alta_contrato", "fecha_baja_contrato")],
+    "contactos": [("fecha_alta_contacto", "fecha_baja_contacto")],
+    "cuentas_bloqueadas": [("fecha_inclusion", "fecha_bloqueo")],
+}
+# Fechas que deben ser posteriores al alta de su cliente
+POSTERIORES_ALTA = {"contactos": "fecha_alta_contacto"}
+# Claves únicas de cada tabla (además de las claves primarias)
+CLAVES_UNICAS = {"contratos": "identificador"}
+
+class Informe:
+    """
+    Resultado de una validación: filas por tabla y lista de comprobaciones, cada una un dict con
+    'tipo', 'nombre', 'tabla', 'ok' y sus detalles (fallos, ejemplos, distancia...).
+    """
+    def __init__(self, directorio: str, formato: str):
+        self.directorio = directorio
+        self.formato = formato
+        self.filas: Dict[str, int] = {}
+        self.comprobaciones: List[Dict[str, Any]] = []
+
+    @property
+    def ok(self) -> bool:
+        """
+        True si todas las comprobaciones han pasado.
+        """
+        return all(c["ok"] for c in self.comprobaciones)
+
+    def anadir(self, tipo: str, nombre: str, tabla: str, ok: bool, **detalles):
+        """
+        Añade una comprobación al informe.
+        """
+        self.comprobaciones.append({"tipo": tipo, "nombre": nombre, "tabla": tabla, "ok": bool(ok), **detalles})
+        if not ok:
+            logger.warning(f"Validación fallida: {nombre} {detalles}")
+
+    def a_dict(self) -> Dict[str, Any]:
+        """
+        Informe como dict serializable a JSON.
+        """
+        return {"directorio": self.directorio, "formato": self.formato, "ok": self.ok, "filas": self.filas,
+                "comprobaciones": self.comprobaciones}
+
+    def guardar(self, ruta: str):
+        """
+        Guarda el informe como JSON.
+        """
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.a_dict(), f, indent=1, ensure_ascii=False, default=_json)
+
+    def resumen(self) -> pd.DataFrame:
+        """
+        Una fila por comprobación con su resultado, para mostrar por consola.
+        """
+        return pd.DataFrame([
+            {"tipo": c["tipo"], "nombre": c["nombre"], "ok": c["ok"],
+             "detalle": c.get("fallos", c.get("distancia", c.get("error_relativo", "")))}
+            for c in self.comprobaciones
+        ], columns=["tipo", "nombre", "ok", "detalle"])
+
+class LectorTablas:
+    """
+    Lee por lotes las tablas escritas por un escritor de escritores.py (CSV, Parquet, también
+    particionado, Arrow IPC, Feather o SQLite), solo con las columnas pedidas.
+    """
+    def __init__(self, directorio: str, formato: str = "csv", filas_lote: int = FILAS_LOTE):
+        """
+        directorio: carpeta de salida de la generación.
+        formato: formato de salida ('csv', 'parquet', 'arrow', 'feather' o 'sqlite').
+        filas_lote: filas por lote de lectura.
+        """
+        if formato not in escritores.ESCRITORES:
+            raise ValueError(f"Formato no soportado: {formato}. Opciones: {', '.join(escritores.ESCRITORES)}")
+        if formato in ("parquet", "arrow", "feather") and pa is None:
+            raise ImportError("Se necesita pyarrow para validar este formato: pip install pyarrow")
+        self.directorio = directorio
+        self.formato = formato
+        self.filas_lote = filas_lote
+        self.base = os.path.join(directorio, "fakebiz.sqlite") if formato == "sqlite" else None
+
+    def existe(self, tabla: str) -> bool:
+        """
+        Indica si la tabla está en la salida.
+        """
+        if self.formato == "sqlite":
+            if not os.path.exists(self.base):
+                return False
+            with sqlite3.connect(self.base) as conexion:
+                return conexion.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)).fetchone() is not None
+        return os.path.exists(self._ruta(tabla)) or (self.formato == "parquet" and os.path.isdir(self._raiz(tabla)))
+
+    def columnas(self, tabla: str) -> List[str]:
+        """
+        Columnas de la tabla.
+        """
+        if self.formato == "csv":
+            return list(pd.read_csv(self._ruta(tabla), nrows=0).columns)
+        if self.formato == "sqlite":
+            with sqlite3.connect(self.base) as conexion:
+                return [fila[1] for fila in conexion.execute(f"PRAGMA table_info({tabla})")]
+        if self.formato == "parquet":
+            return self._dataset(tabla).schema.names
+        with pa.memory_map(self._ruta(tabla)) as fuente:
+            return pa.ipc.open_file(fuente).schema.names
+
+    def lotes(self, tabla: str, columnas: List[str]) -> Iterator[pd.DataFrame]:
+        """
+        Devuelve la tabla por lotes, con las columnas pedidas que existan.
+        """
+        columnas = [c for c in columnas if c in set(self.columnas(tabla))]
+        if self.formato == "csv" and pcsv is not None:
+            # Lector en streaming de pyarrow: varias veces más rápido que read_csv por trozos
+            lector = pcsv.open_csv(self._ruta(tabla), read_options=pcsv.ReadOptions(block_size=BYTES_BLOQUE_CSV),
+                                   convert_options=pcsv.ConvertOptions(include_columns=columnas, strings_can_be_null=True,
+                                                                       column_types={c: pa.string() for c in columnas}))
+            for lote in lector:
+                yield lote.to_pandas()
+        elif self.formato == "csv":
+            yield from pd.read_csv(self._ruta(tabla), usecols=columnas, dtype=str, chunksize=self.filas_lote)
+        elif self.formato == "sqlite":
+            with sqlite3.connect(self.base) as conexion:
+                yield from pd.read_sql_query(f"SELECT {', '.join(columnas)} FROM {tabla}", conexion, chunksize=self.filas_lote)
+        elif self.formato == "parquet":
+            for lote in self._dataset(tabla).to_batches(columns=columnas, batch_size=self.filas_lote):
+                yield lote.to_pandas()
+        else:
+            with pa.memory_map(self._ruta(tabla)) as fuente:
+                lector = pa.ipc.open_file(fuente)
+                for i in range(lector.num_record_batches):
+                    yield lector.get_batch(i).select(columnas).to_pandas()
+
+    def _ruta(self, tabla: str) -> str:
+        return os.path.join(self.directorio, f"{tabla}.{self.formato}")
+
+    def _raiz(self, tabla: str) -> str:
+        return os.path.join(self.directorio, tabla)
+
+    def _dataset(self, tabla: str) -> "ds.Dataset":
+        """
+        Dataset de Parquet de un fichero o de una carpeta particionada (particiones Hive).
+        """
+        if os.path.isdir(self._raiz(tabla)):
+            return ds.dataset(self._raiz(tabla), format="parquet", partitioning="hive")
+        return ds.dataset(self._ruta(tabla), format="parquet")
+
+class ClavesClientes:
+    """
+    Claves de una población de clientes como array ordenado de enteros, con la fecha de alta de
+    cada una (días desde 1970) alineada, para buscar claves foráneas por lotes.
+    """
+    def __init__(self, claves: np.ndarray, altas: np.ndarray):
+        """
+        claves: cliente_id numéricos (int64), sin ordenar.
+        altas: fecha de alta de cada cliente (datetime64[D]).
+        """
+        orden = np.argsort(claves, kind="stable")
+        self.claves = claves[orden]
+        self.altas = altas.astype("datetime64[D]")[orden]
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    def buscar(self, valores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve la posición de cada valor en las claves y una máscara de los que existen.
+        """
+        posiciones = np.searchsorted(self.claves, valores)
+        existe = posiciones < len(self.claves)
+        existe[existe] = self.claves[posiciones[existe]] == valores[existe]
+        return np.minimum(posiciones, max(0, len(self.claves) - 1)), existe
+
+    def duplicadas(self) -> np.ndarray:
+        """
+        Claves que aparecen más de una vez.
+        """
+        return np.unique(self.claves[1:][self.claves[1:] == self.claves[:-1]])
+
+def validar(directorio: str, formato: str = "csv", esquema: Optional[Dict] = None, tolerancia: float = TOLERANCIA,
+            tolerancia_cardinalidad: float = TOLERANCIA_CARDINALIDAD, filas_lote: int = FILAS_LOTE) -> Informe:
+    """
+    Valida las tablas escritas en un directorio y devuelve el informe. Las tablas que no están en
+    la salida se omiten, igual que las comprobaciones que las necesitan.
+    directorio: carpeta de salida de la generación.
+    formato: formato de salida de la generación.
+    esquema: variante del esquema con la que se generaron los datos (opcional), para la deriva.
+    tolerancia: distancia de variación total máxima de cada columna categórica.
+    tolerancia_cardinalidad: error relativo máximo de las filas por cliente.
+    filas_lote: filas por lote de lectura.
+    """
+    lector = LectorTablas(directorio, formato, filas_lote)
+    informe = Informe(directorio, formato)
+    with metricas.etapa("total", generador="validador") as etapa:
+        validador = _Validacion(lector, informe, esquema, tolerancia, tolerancia_cardinalidad)
+        validador.ejecutar()
+        etapa.filas = sum(informe.filas.values())
+    return informe
+
+class _Validacion:
+    """
+    Recorrido de las tablas de una validación: primero clientes y exclientes (claves), después las dependientes.
+    """
+    def __init__(self, lector: LectorTablas, informe: Informe, esquema: Optional[Dict], tolerancia: float,
+                 tolerancia_cardinalidad: float):
+        self.lector = lector
+        self.informe = informe
+        self.esquema = esquema
+        self.tolerancia = tolerancia
+        self.tolerancia_cardinalidad = tolerancia_cardinalidad
+        self.clientes: Optional[ClavesClientes] = None
+
+    def ejecutar(self):
+        """
+        Valida las tablas presentes y añade las comprobaciones al informe.
+        """
+        presentes = [t for t in TABLAS if self.lector.existe(t)]
+        if not presentes:
+            raise ValueError(f"No hay tablas en formato {self.lector.formato} en {self.lector.directorio}")
+        if "clientes" in presentes:
+            self.clientes = self._poblacion("clientes")
+        if "exclientes" in presentes:
+            exclientes = self._poblacion("exclientes")
+            if self.clientes is not None:
+                comunes = np.intersect1d(self.clientes.claves, exclientes.claves)
+                self.informe.anadir("disjuntas", "clientes.cliente_id ∩ exclientes.cliente_id", "exclientes", len(comunes) == 0,
+                                    fallos=int(len(comunes)), ejemplos=_ejemplos(comunes, escritores.DIGITOS_CLIENTE))
+        for tabla in presentes:
+            if tabla not in ("clientes", "exclientes"):
+                self._dependiente(tabla)
+
+    def _poblacion(self, tabla: str) -> ClavesClientes:
+        """
+        Recorre clientes o exclientes: claves, unicidad, orden de fechas y deriva.
+        """
+        claves, altas = [], []
+        comprobacion = _Comprobaciones(self, tabla)
+        with metricas.etapa("poblacion", generador=tabla) as etapa:
+            for lote in self.lector.lotes(tabla, comprobacion.columnas(["cliente_id", "fecha_cliente"])):
+                ids, nulos = _enteros(lote["cliente_id"])
+                claves.append(ids[~nulos])
+                altas.append(_fechas(lote["fecha_cliente"], "D")[~nulos] if "fecha_cliente" in lote else
+                             np.full(int((~nulos).sum()), np.datetime64("NaT", "D")))
+                comprobacion.lote(lote)
+                comprobacion.nulos("cliente_id", nulos, ids)
+                etapa.filas += len(lote)
+        poblacion = ClavesClientes(np.concatenate(claves) if claves else np.empty(0, np.int64),
+                                   np.concatenate(altas) if altas else np.empty(0, "datetime64[D]"))
+        duplicadas = poblacion.duplicadas()
+        self.informe.anadir("unicidad", f"{tabla}.cliente_id", tabla, len(duplicadas) == 0,
+                            fallos=int(len(duplicadas)), ejemplos=_ejemplos(duplicadas, escritores.DIGITOS_CLIENTE))
+        comprobacion.cerrar()
+        return poblacion
+
+    def _dependiente(self, tabla: str):
+        """
+        Recorre una tabla que depende de clientes: claves foráneas, fechas, claves únicas y deriva.
+        """
+        foraneas = list(escritores.CLAVES_FORANEAS.get(tabla, {}))
+        unica = CLAVES_UNICAS.get(tabla)
+        comprobacion = _Comprobaciones(self, tabla)
+        huerfanas = {columna: [0, []] for columna in foraneas}
+        anteriores = [0, []]
+        claves_unicas = []
+        digitos_unica = 0
+        origen_destino = [0, []]
+        with metricas.etapa("dependiente", generador=tabla) as etapa:
+            for lote in self.lector.lotes(tabla, comprobacion.columnas(foraneas + ([unica] if unica else []))):
+                comprobacion.lote(lote)
+                valores = {}
+                for columna in foraneas:
+                    ids, nulos = _enteros(lote[columna])
+                    valores[columna] = ids
+                    comprobacion.nulos(columna, nulos, ids)
+                    if self.clientes is None:
+                        continue
+                    posiciones, existe = self.clientes.buscar(ids)
+                    texto = lote[columna].to_numpy()
+                    _acumular(huerfanas[columna], ~existe & ~nulos, texto)
+                    if columna == "cliente_id" and tabla in POSTERIORES_ALTA:
+                        fecha = _fechas(lote[POSTERIORES_ALTA[tabla]], "D")
+                        _acumular(anteriores, existe & ~nulos & (fecha < self.clientes.altas[posiciones]), texto)
+                if tabla == "envios":
+                    _acumular(origen_destino, valores["cliente_origen_id"] == valores["cliente_destino_id"],
+                              lote["cliente_origen_id"].to_numpy())
+                if unica:
+                    claves_unicas.append(_enteros(lote[unica])[0])
+                    digitos_unica = max(digitos_unica, int(lote[unica].astype(str).str.len().max() or 0))
+                etapa.filas += len(lote)
+        if self.clientes is not None:
+            for columna, (fallos, ejemplos) in huerfanas.items():
+                self.informe.anadir("integridad", f"{tabla}.{columna} -> clientes.cliente_id", tabla, fallos == 0,
+                                    fallos=fallos, ejemplos=ejemplos)
+            if tabla in POSTERIORES_ALTA:
+                self.informe.anadir("orden_fechas", f"{tabla}.{POSTERIORES_ALTA[tabla]} >= clientes.fecha_cliente", tabla,
+                                    anteriores[0] == 0, fallos=anteriores[0], ejemplos=anteriores[1])
+        if tabla == "envios":
+            self.informe.anadir("integridad", "envios.cliente_origen_id != envios.cliente_destino_id", tabla,
+                                origen_destino[0] == 0, fallos=origen_destino[0], ejemplos=origen_destino[1])
+        if unica:
+            claves = np.sort(np.concatenate(claves_unicas)) if claves_unicas else np.empty(0, np.int64)
+            duplicadas = np.unique(claves[1:][claves[1:] == claves[:-1]])
+            self.informe.anadir("unicidad", f"{tabla}.{unica}", tabla, len(duplicadas) == 0,
+                                fallos=int(len(duplicadas)), ejemplos=_ejemplos(duplicadas, digitos_unica))
+        comprobacion.cerrar()
+        self._cardinalidad(tabla)
+
+    def _cardinalidad(self, tabla: str):
+        """
+        Compara las filas por cliente con la media del esquema.
+        """
+        if self.clientes is None or not len(self.clientes):
+            return
+        n_clientes = len(self.clientes)
+        plan = esquemas.plan(tabla, self.esquema)
+        if plan.cardinalidad is not None:
+            esperado = plan.cardinalidad.media() * n_clientes
+        elif "bloqueadas" in plan.proporciones:
+            esperado = plan.proporciones["bloqueadas"] * n_clientes
+        else:
+            return
+        filas = self.informe.filas[tabla]
+        omitida = filas < MIN_FILAS_DERIVA
+        error = abs(filas - esperado) / esperado if esperado else 0.0
+        self.informe.anadir("cardinalidad", f"{tabla} por cliente", tabla, omitida or error <= self.tolerancia_cardinalidad,
+                            observado=round(filas / n_clientes, 4), esperado=round(esperado / n_clientes, 4),
+                            error_relativo=round(error, 4), tolerancia=self.tolerancia_cardinalidad, omitida=omitida)
+
+class _Comprobaciones:
+    """
+    Comprobaciones por lote de una tabla que no necesitan otras tablas: nulos en claves, orden de
+    sus fechas y recuento de las columnas categóricas para la deriva.
+    """
+    def __init__(self, validacion: _Validacion, tabla: str):
+        self.validacion = validacion
+        self.informe = validacion.informe
+        self.tabla = tabla
+        self.filas = 0
+        existentes = set(validacion.lector.columnas(tabla))
+        self.pares = [(a, b) for a, b in ORDEN_FECHAS.get(tabla, []) if a in existentes and b in existentes]
+        self.desordenadas = {par: [0, []] for par in self.pares}
+        self.nulas: Dict[str, List] = {}
+        # Distribuciones del esquema de las columnas de la tabla (las de personas en clientes y exclientes)
+        planes = ([esquemas.plan("personas", validacion.esquema)] if tabla in ("clientes", "exclientes") else []) + \
+                 ([esquemas.plan(tabla, validacion.esquema)] if tabla in esquemas.ESQUEMA else [])
+        self.distribuciones = {columna: distribucion for plan in planes for columna, distribucion in plan.columnas.items()
+                               if columna in existentes and columna not in SIN_DERIVA}
+        self.recuentos = {columna: Counter() for columna in self.distribuciones}
+
+    def columnas(self, extra: List[str]) -> List[str]:
+        """
+        Columnas que hay que leer: las extra más las de fechas (con cliente_id para los ejemplos) y categorías comprobadas.
+        """
+        fechas = [c for par in self.pares for c in par]
+        return list(dict.fromkeys(extra + (["cliente_id"] if fechas else []) + fechas + list(self.distribuciones)))
+
+    def lote(self, lote: pd.DataFrame):
+        """
+        Comprueba un lote.
+        """
+        self.filas += len(lote)
+        for anterior, posterior in self.pares:
+            unidad = "s" if anterior in escritores.FECHAS_HORA else "D"
+            a = _fechas(lote[anterior], unidad)
+            b = _fechas(lote[posterior], unidad)
+            # Las fechas vacías (p. ej. sin recuperación o sin bloqueo) no se comparan
+            ejemplos = lote["cliente_id"].to_numpy() if "cliente_id" in lote else a
+            _acumular(self.desordenadas[(anterior, posterior)], ~np.isnat(a) & ~np.isnat(b) & (b < a), ejemplos)
+        for columna in self.distribuciones:
+            self.recuentos[columna].update({str(valor): n for valor, n in lote[columna].value_counts(dropna=False).items() if n})
+
+    def nulos(self, columna: str, nulos: np.ndarray, ids: np.ndarray):
+        """
+        Cuenta los valores nulos de una columna de clave.
+        """
+        _acumular(self.nulas.setdefault(columna, [0, []]), nulos, ids)
+
+    def cerrar(self):
+        """
+        Añade al informe las comprobaciones acumuladas de la tabla.
+        """
+        informe = self.informe
+        informe.filas[self.tabla] = self.filas
+        for columna, (fallos, _) in self.nulas.items():
+            informe.anadir("nulos", f"{self.tabla}.{columna}", self.tabla, fallos == 0, fallos=fallos)
+        for (anterior, posterior), (fallos, ejemplos) in self.desordenadas.items():
+            informe.anadir("orden_fechas", f"{self.tabla}.{posterior} >= {anterior}", self.tabla, fallos == 0,
+                           fallos=fallos, ejemplos=ejemplos)
+        for columna, distribucion in self.distribuciones.items():
+            self._deriva(columna, distribucion)
+
+    def _deriva(self, columna: str, distribucion: esquemas.Distribucion):
+        """
+        Distancia de variación total entre las frecuencias observadas y las probabilidades del esquema.
+        """
+        recuento = self.recuentos[columna]
+        total = sum(recuento.values())
+        esperadas = dict(zip(distribucion.valores.tolist(), distribucion.probabilidades().tolist()))
+        observadas = {valor: n / total for valor, n in recuento.items()} if total else {}
+        distancia = 0.5 * sum(abs(observadas.get(v, 0.0) - esperadas.get(v, 0.0)) for v in set(observadas) | set(esperadas))
+        omitida = total < MIN_FILAS_DERIVA
+        inesperados = sorted(v for v in observadas if v not in esperadas)
+        tolerancia = self.validacion.tolerancia
+        self.informe.anadir("deriva", f"{self.tabla}.{columna}", self.tabla, omitida or distancia <= tolerancia,
+                            distancia=round(distancia, 4), tolerancia=tolerancia, filas=total, omitida=omitida,
+                            inesperados=inesperados[:MAX_EJEMPLOS])
+
+def _enteros(valores: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte una columna de IDs (texto o números) a int64; devuelve los valores (0 en los nulos) y la máscara de nulos.
+    """
+    nulos = valores.isna().to_numpy()
+    if nulos.any():
+        valores = valores.where(~nulos, 0)
+    return np.asarray(valores.to_numpy()).astype(np.int64), nulos
+
+def _fechas(valores: pd.Series, unidad: str) -> np.ndarray:
+    """
+    Convierte fechas (texto ISO, date de Python o datetime64) a datetime64 con la unidad indicada, con NaT en los vacíos.
+    """
+    if pd.api.types.is_datetime64_dtype(valores.dtype):
+        return valores.to_numpy(dtype=f"datetime64[{unidad}]")
+    return valores.astype(object).where(valores.notna(), "NaT").to_numpy(dtype=object).astype(f"datetime64[{unidad}]")
+
+def _acumular(acumulado: List, fallos: np.ndarray, valores: np.ndarray):
+    """
+    Suma los fallos de un lote a [número de fallos, ejemplos].
+    """
+    n = int(fallos.sum())
+    if n:
+        acumulado[0] += n
+        if len(acumulado[1]) < MAX_EJEMPLOS:
+            acumulado[1].extend(_ejemplos(valores[fallos])[:MAX_EJEMPLOS - len(acumulado[1])])
+
+def _ejemplos(valores: np.ndarray, digitos: int = 0) -> List:
+    """
+    Primeros valores de un array como tipos de Python, para el informe JSON; con digitos, las
+    claves numéricas se devuelven como texto de ese ancho, igual que en la salida.
+    """
+    if digitos:
+        return [str(int(v)).zfill(digitos) for v in np.asarray(valores)[:MAX_EJEMPLOS]]
+    return [_json(v) for v in np.asarray(valores)[:MAX_EJEMPLOS]]
+
+def _json(valor: Any) -> Any:
+    """
+    Convierte escalares de numpy a tipos serializables en JSON.
+    """
+    if isinstance(valor, np.datetime64):
+        return str(valor)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Valida una salida desde la línea de comandos; termina con código 1 si alguna comprobación falla.
+    """
+    parser = argparse.ArgumentParser(prog="validador", description="Valida por lotes las tablas generadas.")
+    parser.add_argument("directorio", help="Carpeta de salida de la generación.")
+    parser.add_argument("--format", default="csv", choices=list(escritores.ESCRITORES), help="Formato de la salida.")
+    parser.add_argument("--schema", default=None, metavar="FICHERO", help="Variante del esquema con la que se generaron los datos.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCIA, help="Distancia de variación total máxima por columna.")
+    parser.add_argument("--batch-size", type=int, default=FILAS_LOTE, help="Filas por lote de lectura.")
+    parser.add_argument("--report", default=None, help="Fichero JSON del informe (por defecto validacion.json en el directorio).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el progreso.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        esquema = esquemas.cargar(args.schema) if args.schema else None
+        informe = validar(args.directorio, args.format, esquema=esquema, tolerancia=args.tolerance, filas_lote=args.batch_size)
+    except (ValueError, ImportError, OSError) as e:
+        parser.error(str(e))
+    ruta = args.report or os.path.join(args.directorio, "validacion.json")
+    informe.guardar(ruta)
+    print(informe.resumen().to_string(index=False))
+    print(f"{'Validación correcta' if informe.ok else 'Validación con fallos'}; informe en {ruta}")
+    return 0 if informe.ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())